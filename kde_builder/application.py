@@ -42,8 +42,13 @@ from kde_builder.recursive_config_nodes_iterator import RecursiveConfigNodesIter
 from kde_builder.start_program import StartProgram
 from kde_builder.task_manager import TaskManager
 from kde_builder.updater.updater import Updater
+from kde_builder.util.file_watcher import FileWatcher
+from kde_builder.util.metrics import Metrics
+from kde_builder.util.profiler import Profiler
 from kde_builder.util.util import Util
 from kde_builder.util.textwrap_mod import dedent
+from kde_builder.util.trace import Trace
+from kde_builder.util.warm_cache import WarmCache
 from kde_builder.version import Version
 
 logger_app = KBLogger.getLogger("application")
@@ -67,6 +72,8 @@ class Application:
         self.module_resolver = None
         """ModuleResolver object, that makes a new Module. See generate_module_list()."""
         self._base_pid = os.getpid()  # See finish()
+        Trace().start_time = Trace.now()  # The timeline of the run starts here
+        Metrics().start_time = time()
 
         # Default to colorized output if sending to TTY
         Debug().set_colorful_output(True if sys.stdout.isatty() else False)
@@ -78,6 +85,9 @@ class Application:
         opts: dict = c.read_command_line_options_and_selectors(options)
         self.cmdline_opts = opts
 
+        self.profiler = Profiler(opts["global"].get("profile"))
+        self.profiler.start_phase("metadata")
+
         ctx.phases.reset_to(opts["phases"])
         self.run_mode: str = opts["run_mode"]
 
@@ -174,6 +184,7 @@ class Application:
         # module-specific options to any returned modules/sets.
         modules_and_sets_from_userconfig: list[Module | ModuleSet]
         overrides_from_userconfig: list[OptionsBase]  # "override" nodes.
+        self.profiler.start_phase("config")
         modules_and_sets_from_userconfig, overrides_from_userconfig = self._process_configs_content(ctx, ctx.rc_file, cmdline_global_options)
 
         ctx.load_persistent_options()
@@ -211,6 +222,10 @@ class Application:
                 logger_app.debug("Some command line selectors were presented alongside with --rebuild-failures, ignoring them.")
             cmdline_selectors = re.split(r",\s*", module_list)
 
+            skipped_module_list = ctx.get_persistent_option("global", "last-skipped-module-list")
+            if skipped_module_list:
+                cmdline_selectors.extend([name for name in re.split(r",\s*", skipped_module_list) if name not in cmdline_selectors])
+
         if "list-installed" in cmdline_global_options:
             for key in ctx.persistent_options.keys():
                 if "install-dir" in ctx.persistent_options[key]:
@@ -235,7 +250,12 @@ class Application:
         if not Debug().is_testing():
             # Running in a test harness, avoid downloading metadata which will be
             # ignored in the test or making changes to git config
-            Updater.verify_git_config(ctx)
+            # In the daemon, it is verified again only when the global git config has changed.
+            git_config_files = [os.environ.get("GIT_CONFIG_GLOBAL", os.environ["HOME"] + "/.gitconfig"),
+                                os.environ.get("XDG_CONFIG_HOME", os.environ["HOME"] + "/.config") + "/git/config"]
+            WarmCache().get(f"verify-git-config {ctx.get_option('git-push-protocol')}",
+                            lambda: WarmCache.files_signature(git_config_files),
+                            lambda: Updater.verify_git_config(ctx))
 
         # At this point we have our list of candidate modules / module-sets (as read in
         # from rc-file). The module sets have not been expanded into modules.
@@ -244,6 +264,7 @@ class Application:
 
         cmdline_selectors_len = len(cmdline_selectors)
 
+        self.profiler.start_phase("modules")
         module_resolver = ModuleResolver(ctx)
         module_resolver.cmdline_per_project_options = cmdline_per_project_options
         module_resolver.set_deferred_options(overrides_from_userconfig)
@@ -288,8 +309,13 @@ class Application:
         branch_group = ctx.get_option("branch-group")
         self._warn_if_branch_group_does_not_exists(branch_group)
 
+        self.profiler.start_phase("dependencies")
         self.dependency_resolver = DependencyResolver(self.module_resolver)
         self._read_kde_dependencies()
+
+        if "rebuild-dependents" in cmdline_global_options:
+            modules = self._add_transitive_dependents(modules, modules_and_sets_from_userconfig)
+
         self._resolve_module_dependency_graph(modules)
 
         if "dependency-tree" in cmdline_global_options or "dependency-tree-fullpath" in cmdline_global_options:
@@ -357,7 +383,8 @@ class Application:
                 metadata_module.current_phase = "update"
                 logger_app.warning(f"Updating g[repo-metadata]")
                 if not Debug().is_testing():
-                    metadata_module.scm.update_internal()
+                    with Trace().span("update repo-metadata", "setup"), metadata_module.lock_directories(["update"]):
+                        metadata_module.scm.update_internal()
                 logger_app.warning("")  # Space after "Updating repo-metadata" block
                 metadata_module.current_phase = None
                 logger_app.debug("Return to the original working directory after metadata downloading")  # This is needed to pick the config file from that directory
@@ -435,11 +462,18 @@ class Application:
             dependency_files.append(f"{srcdir}/kde-dependencies/kde-dependencies-{branch_group}")
             dependency_files.append(f"{srcdir}/kde-dependencies/third-party-dependencies")
 
-        try:
+        def read_dependency_files() -> dict:
             for dependency_file in dependency_files:
                 with open(dependency_file, "r") as dependencies:
                     logger_app.debug(f" -- Reading dependencies from {dependency_file}")
                     dependency_resolver.read_dependency_data(dependencies)
+            return dependency_resolver.dependencies_of
+
+        try:
+            # In the daemon, the files are read only when they have changed. The dependency data is not modified after reading.
+            dependency_resolver.dependencies_of = WarmCache().get(f"kde-dependencies {' '.join(dependency_files)}",
+                                                                  lambda: WarmCache.files_signature(dependency_files),
+                                                                  read_dependency_files)
         except FileNotFoundError as e:
             e = str(e).replace("[", "").replace("]", "")
             logger_app.warning(" r[b[*] Unable to read kde-dependencies:")
@@ -447,6 +481,58 @@ class Application:
             logger_app.warning(" r[b[*] Will attempt to continue.")
 
             dependency_resolver.dependencies_of.clear()
+            return
+
+        if ctx.get_option("rebuild-dependents"):
+            self._load_reverse_dependency_index(dependency_files)
+
+    def _load_reverse_dependency_index(self, dependency_files: list[str]) -> None:
+        """
+        Restore the reverse dependency index from persistent data, or rebuild and store it if the dependency files have changed since it was saved.
+        """
+        ctx = self.context
+        dependency_resolver = self.dependency_resolver
+
+        files_state = []
+        for dependency_file in dependency_files:
+            file_stat = os.stat(dependency_file)
+            files_state.append(f"{dependency_file}:{file_stat.st_mtime_ns}:{file_stat.st_size}")
+        digest = Util.get_list_digest(files_state)
+
+        stored_index = ctx.get_persistent_option("global", "reverse-dependency-index")
+        if isinstance(stored_index, dict) and stored_index.get("digest") == digest:
+            logger_app.debug(" -- Using the stored reverse dependency index")
+            dependency_resolver.reverse_dependency_index = stored_index["index"]
+            return
+
+        logger_app.debug(" -- Rebuilding the reverse dependency index")
+        index = dependency_resolver.build_reverse_dependency_index()
+        ctx.set_persistent_option("global", "reverse-dependency-index", {"digest": digest, "index": index})
+
+    def _add_transitive_dependents(self, modules: list[Module], modules_and_sets_from_userconfig: list[Module | ModuleSet]) -> list[Module]:
+        """
+        Return the given modules followed by all of their transitive dependents that are defined in the user config.
+
+        Used for ``--rebuild-dependents``. The build order is established later by the dependency resolver.
+        """
+        dependency_resolver = self.dependency_resolver
+
+        wanted_names: set[str] = set()
+        for module in modules:
+            wanted_names.update(dependency_resolver.get_transitive_dependents(module.name))
+
+        selectors_list = [el.name for el in modules_and_sets_from_userconfig]
+        config_projects: list[Module] = self.module_resolver.resolve_selectors_into_modules(selectors_list)
+
+        result: list[Module] = list(modules)
+        selected_names: set[str] = {module.name for module in modules}
+        for module in config_projects:
+            if module.name in wanted_names and module.name not in selected_names:
+                selected_names.add(module.name)
+                result.append(module)
+
+        logger_app.info(f" b[*] Added g[{len(result) - len(modules)}] dependent projects for b[--rebuild-dependents].")
+        return result
 
     def _resolve_module_dependency_graph(self, modules: list[Module]) -> None:
         """
@@ -455,7 +541,8 @@ class Application:
         dependency_resolver = self.dependency_resolver
 
         try:
-            dependency_resolver.resolve_to_module_graph(modules)
+            with Trace().span("resolve dependencies", "setup", modules=len(modules)):
+                dependency_resolver.resolve_to_module_graph(modules)
         except Exception as e:
             e = str(e).replace("[", "").replace("]", "")
             logger_app.warning(" r[b[*] Problems encountered trying to determine correct project graph:")
@@ -475,6 +562,7 @@ class Application:
 
         Basically this *is* the script. The metadata module must already have performed its update by this point.
         """
+        self.profiler.start_phase("tasks")
         ctx = self.context
         modules = self.modules
 
@@ -552,9 +640,8 @@ class Application:
 
             return 0
 
-        # After this call, we must run the finish() method to cleanly complete process execution.
-        if not Debug().pretending() and not self.context.take_lock():
-            exit(1)  # Don't finish(), it's not our lockfile!
+        # Other kde-builder runs may work at the same time, as long as they work on other projects. The directories of
+        # a project are locked while it is worked on, see Module.lock_directories().
 
         result = None  # shell-style (0 == success)
 
@@ -606,12 +693,17 @@ class Application:
             # --rebuild-failures
             ctx.set_persistent_option("global", "last-failed-module-list", failed_modules)
 
+        # Modules skipped because of a failed dependency were never attempted, so --rebuild-failures should pick them up as well.
+        skipped_modules = ",".join(map(str, ctx.list_skipped_modules()))
+        if failed_modules:
+            ctx.set_persistent_option("global", "last-skipped-module-list", skipped_modules)
+
         if ctx.get_option("install-login-session") or run_mode == "install-login-session-only":
             res = self.install_login_session()
             if res and not result:
                 result = res
 
-        if ctx.get_option("check-self-updates"):
+        if ctx.get_option("check-self-updates") and ctx.get_option("network-update"):
             last_self_updates_check = ctx.get_persistent_option("global", "last-self-updates-check") or 0
             try:
                 last_self_updates_check = int(last_self_updates_check)
@@ -641,11 +733,100 @@ class Application:
         smile = ":-(" if result else ":-)"
         logger_app.info(f"\n{color}{smile}")
 
+        if run_mode == "build" and ctx.get_option("watch"):
+            result = self._watch_and_rebuild(result)
+
         return result
 
+    def _watch_and_rebuild(self, result: int) -> int:
+        """
+        Rebuild and install the projects whose sources change, and the projects depending on them, until interrupted. Used for ``--watch``.
+
+        Args:
+            result: The result of the build that was done before watching.
+
+        Returns:
+            The result of the last build, when watching is stopped with Ctrl+C (or at once if there are no source
+            directories to watch).
+        """
+        ctx = self.context
+        modules = self.modules
+
+        watcher = FileWatcher()
+        build_dirs = [module.fullpath("build") for module in modules]
+        for module in modules:
+            source_dir = module.fullpath("source")
+            if os.path.isdir(source_dir):
+                watcher.add_tree(module.name, source_dir, excluded=build_dirs)
+
+        if not watcher.trees:
+            logger_app.error(" r[b[*] None of the selected projects has a source directory to watch.")
+            return result
+
+        # The loop is left with Ctrl+C while waiting for changes. This returns, so that finish() stores the persistent
+        # options of the builds, and exits with the result of the last build. Ctrl+C during a rebuild is handled as usual.
+        try:
+            while True:
+                logger_app.info(f" b[*] Watching the sources of g[{len(watcher.trees)}] projects for changes. Press Ctrl+C to stop.")
+                previous_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+                try:
+                    changed_names = watcher.wait_for_changes()
+                finally:
+                    signal.signal(signal.SIGINT, previous_handler)
+
+                rebuilt_modules = self._modules_to_rebuild(modules, self.dependency_resolver.dependency_graph, changed_names)
+                changed_str = ", ".join(sorted(changed_names))
+                logger_app.info(f"\n b[*] Sources changed in g[{changed_str}], rebuilding g[{len(rebuilt_modules)}] projects.")
+
+                for module in rebuilt_modules:
+                    module.phases.filter_out_phase("update")  # Only build and install, as with --no-src
+                    module.failed_phase = ""
+                ctx.modules = rebuilt_modules
+                ctx.errors.clear()
+                ctx.skipped.clear()
+                ctx.status_view.mod_success = ctx.status_view.mod_failed = ctx.status_view.mod_skipped = 0
+
+                result = TaskManager(self).run_all_tasks()
+                self._print_failed_modules_in_each_phase(ctx)
+                ctx.store_persistent_options()  # Not lost if kde-builder is killed while watching
+
+                color = "r[b[" if result else "g[b["
+                smile = ":-(" if result else ":-)"
+                logger_app.info(f"\n{color}{smile}")
+        except KeyboardInterrupt:
+            logger_app.info("\n b[*] Stopped watching.")
+        finally:
+            watcher.close()
+        return result
+
+    @staticmethod
+    def _modules_to_rebuild(modules: list[Module], dependency_graph: dict, changed_names: set[str]) -> list[Module]:
+        """
+        Return the changed modules and the modules depending on them, directly or transitively, in the order of the given modules.
+
+        Args:
+            modules: The selected modules, in build order.
+            dependency_graph: The graph of the dependency resolver, which also has the dependencies that are not selected.
+            changed_names: Names of the modules whose sources have changed.
+        """
+        dependents_of: dict[str, list[str]] = {}
+        for name, info in dependency_graph.items():
+            for dependency in info["deps"]:
+                dependents_of.setdefault(dependency, []).append(name)
+
+        affected = set(changed_names)
+        queue = list(changed_names)
+        while queue:
+            for dependent in dependents_of.get(queue.pop(), []):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+
+        return [module for module in modules if module.name in affected]
+
     def finish(self, exitcode: int | bool = 0) -> NoReturn:
         """
-        Exit the script cleanly, including removing any lock files created.
+        Exit the script cleanly, including storing the persistent options.
 
         Args:
             exitcode: Optional; if passed, is used as the exit code, otherwise 0 is used.
@@ -661,8 +842,9 @@ class Application:
             # that was started by the user (e.g. async mode, forked pipe-opens
             exit(exitcode)
 
-        ctx.close_lock()
         ctx.store_persistent_options()
+        Trace().close()
+        Metrics().write(finished=True)
 
         # modules in different source dirs may have different log dirs. If there
         # are multiple, show them all.
@@ -705,12 +887,11 @@ class Application:
         Raises:
             SetOptionError
         """
-        with open(ctx.rc_file, "r") as f:
-            try:
-                config_content = yaml.safe_load(f)
-            except yaml.YAMLError as exc:
-                exc_msgs = "\n  " + "\n  ".join(str(x) for x in exc.args)
-                raise ConfigError("Error parsing yaml configuration file:" + exc_msgs)
+        try:
+            config_content = WarmCache().load_yaml(ctx.rc_file)
+        except yaml.YAMLError as exc:
+            exc_msgs = "\n  " + "\n  ".join(str(x) for x in exc.args)
+            raise ConfigError("Error parsing yaml configuration file:" + exc_msgs)
         module_and_module_set_list = []
         rcfile = ctx.rc_file
 
@@ -742,6 +923,8 @@ class Application:
 
         # Now we have determined log-dir, and can set screen log file.
         Debug().set_log_file(ctx.get_log_dir() + "/screen.log")
+        Trace().set_trace_file(ctx.get_log_dir() + "/trace.json")
+        Metrics().set_metrics_file(ctx.get_option("metrics-file"))
 
         # Now, after global options were resolved and set, we can resolve paths in include lines and read those config files.
         node_reader = RecursiveConfigNodesIterator(config_content, rcfile, ctx)
@@ -849,7 +1032,8 @@ class Application:
         for module in modules:
             module.reset_environment()
             module.set_build_system()
-            failed = not module.install() or failed
+            with module.lock_directories(["install"]):
+                failed = not module.install() or failed
 
             if failed and module.get_option("stop-on-failure"):
                 logger_app.warning("y[Stopping here].")
@@ -884,7 +1068,8 @@ class Application:
         for module in modules:
             module.reset_environment()
             module.set_build_system()
-            failed = not module.uninstall() or failed
+            with module.lock_directories(["uninstall"]):
+                failed = not module.uninstall() or failed
 
             if failed and module.get_option("stop-on-failure"):
                 logger_app.warning("y[Stopping here].")
@@ -1033,6 +1218,12 @@ class Application:
 
                 logger_app.warning(out_str)
 
+        skipped_modules: list[Module] = ctx.list_skipped_modules()
+        if skipped_modules:
+            logger_app.warning("\ny[b[<<<  PROJECTS SKIPPED DUE TO FAILED DEPENDENCY  >>>]")
+            for module in skipped_modules:
+                logger_app.warning(f"y[{module}] - depends on r[{ctx.skipped[module.name]}]")
+
         # See if any modules fail continuously and warn specifically for them.
         recurring_build_fails_modules = [module for module in ctx.modules if (module.get_persistent_option("failure-count") or 0) > 3 and module.phases.has("build")]
 
@@ -5,11 +5,11 @@
 
 from __future__ import annotations
 
+import copy
 import datetime
-import errno
+import fcntl
 import json
 import os
-from pathlib import Path
 import re
 import sys
 import tempfile
@@ -26,6 +26,7 @@ from kde_builder.module.module import Module
 from kde_builder.options_base import PathResolvingOptions
 from kde_builder.phase_list import PhaseList
 from kde_builder.status_view import StatusView
+from kde_builder.util.path_lock import PathLock
 from kde_builder.util.util import Util
 from kde_builder.util.textwrap_mod import dedent
 
@@ -59,7 +60,6 @@ class BuildContext(PathResolvingOptions):
 
     rcfiles = ["./kde-builder.yaml",
                f"{xdg_config_home}/kde-builder.yaml"]
-    LOCKFILE_NAME = ".kde-builder-lock"
     PERSISTENT_FILE_NAME = "kde-builder-persistent-data.json"
 
     def __init__(self):
@@ -99,20 +99,29 @@ class BuildContext(PathResolvingOptions):
 
         # These options are exposed as cmdline options without parameters, and having the negatable form with "--no-".
         self.global_options_with_negatable_form = {
+            "adaptive-num-cores": False,
             "async": True,
             "check-self-updates": True,
             "compile-commands-export": True,
             "compile-commands-linking": True,
+            "configure-ahead": False,
             "generate-clion-project-config": False,
             "generate-vscode-project-config": False,
             "generate-qtcreator-project-config": False,
+            "git-status-cache": False,
             "hold-performance-profile": True,
             "hold-work-branches": True,
             "include-dependencies": True,
             "install-login-session": True,
+            "narrow-fetch": False,
+            "network-update": True,
+            "probe-remotes": False,
             "purge-old-logs": True,
+            "retry-build-on-oom": True,
             "run-tests": False,
+            "skip-dependents-on-failure": False,
             "stop-on-failure": True,
+            "throttle-on-pressure": False,
             "use-clean-install": False,
             "use-idle-io-priority": False,
         }
@@ -130,6 +139,8 @@ class BuildContext(PathResolvingOptions):
             "cxxflags": "-pipe",
             "directory-layout": "flat",
             "dest-dir": "${MODULE}",
+            "git-maintenance-days": "",
+            "git-mirror-dir": "",
             "git-user": "",
             "install-dir": os.getenv("HOME") + "/kde/usr",
             "libname": self.libname,
@@ -138,15 +149,18 @@ class BuildContext(PathResolvingOptions):
             "make-install-prefix": "",  # Some people need sudo
             "make-options": "",
             "meson-options": "",
+            "metrics-file": "",
             "ninja-options": "",
             "num-cores": "",  # Used for build constraints
             "num-cores-low-mem": "2",  # Needs to be a string, not int
             "override-build-system": "",
+            "partial-clone": "none",  # { none, blobless, treeless }
             "persistent-data-file": "",
             "qmake-options": "",
             "qt-install-dir": "",
             "remove-after-install": "none",  # { none, builddir, all }
             "revision": "",
+            "shallow-clone-depth": "",
             "source-dir": os.getenv("HOME") + "/kde/src",
             "source-when-start-program": "/dev/null",
             "tag": "",
@@ -159,6 +173,7 @@ class BuildContext(PathResolvingOptions):
             "reconfigure": "",
             "refresh-build-first": "",
             "metadata-only": "",
+            "prefetch-only": "",
         }
 
         self.modules: list[Module] = []
@@ -180,18 +195,27 @@ class BuildContext(PathResolvingOptions):
         self.errors = {}
         """A map from module *names* to the phase name at which they failed."""
 
+        self.skipped = {}
+        """A map from module *names* to the name of the failed dependency because of which they were not built."""
+
         self.log_paths = {}
         """
         Holds a dict of log path bases as expanded by get_absolute_path() (e.g. [source-dir]/log) to the actual log dir *this run*,
         with the date and unique id added. You must still add the module name to use.
         """
 
+        self.log_dir_locks: list[PathLock] = []
+        """Locks of the log directories of this run, see _create_log_dir()."""
+
         self.rc_files = BuildContext.rcfiles
         self.rc_file = None
 
         self.persistent_options = {}
         """These are kept across multiple script runs."""
 
+        self.loaded_persistent_options = {}
+        """The persistent options as they were read, to find out which ones were changed in this run. See store_persistent_options()."""
+
         self.metadata_module: Module | None = None
         """A Module for repo-metadata."""
 
@@ -222,115 +246,6 @@ class BuildContext(PathResolvingOptions):
             if ret_code != 0:  # 0 return value means success
                 logger_buildcontext.warning(" b[y[*] Unable to lower I/O priority, continuing...")
 
-    def take_lock(self) -> bool:
-        """
-        Try to take the lock for our current base directory.
-
-        The lock currently is what passes for preventing people from accidentally running kde-builder
-        multiple times at once. The lock is based on the base directory instead
-        of being global to allow for motivated and/or brave users to properly
-        configure kde-builder to run simultaneously with different
-        configurations.
-
-        Returns:
-             Boolean success flag.
-        """
-        base_dir = self.base_config_directory()
-        lockfile = f"{base_dir}/{BuildContext.LOCKFILE_NAME}"
-
-        lockfile_fd = None
-        try:
-            lockfile_fd = os.open(lockfile, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
-        except OSError as e:
-            error_code = e.errno  # Save for later testing.
-        else:
-            error_code = 0
-
-        if error_code == errno.EEXIST:
-            # Path already exists, read the PID and see if it belongs to a
-            # running process.
-            try:
-                pid_file = open(lockfile, "r")
-            except OSError:
-                # Lockfile is there but we can't open it?!?  Maybe a race
-                # condition but I have to give up somewhere.
-                logger_buildcontext.warning(f" WARNING: Can't open or create lockfile r[{lockfile}]")
-                return True
-
-            pid = pid_file.read()
-            pid_file.close()
-
-            if pid:
-                # Recent kde-builder; we wrote a PID in there.
-                pid = pid.removesuffix("\n")
-
-                # See if something's running with this PID.
-                # pl2py note: in pl kill returns if successfully sent signal; in py kill returns nothing and raises ProcessLookupError if no process found
-                try:
-                    os.kill(int(pid), 0)
-
-                    # Something *is* running, likely kde-builder.  Don't use error,
-                    # it'll scan for $!
-                    print(Debug().colorize(" r[*y[*r[*] kde-builder appears to be running.  Do you want to:\n"))
-                    print(Debug().colorize("  (b[Q])uit, (b[P])roceed anyways?: "))
-
-                    choice = input() or ""
-                    choice = choice.removesuffix("\n")
-
-                    if choice.lower() != "p":
-                        print(Debug().colorize(" y[*] kde-builder run canceled."))
-                        return False
-
-                    # We still can't grab the lockfile, let's just hope things
-                    # work out.
-                    logger_buildcontext.warning(" y[*] kde-builder run in progress by user request.")
-                    return True
-                except (OSError, ProcessLookupError):
-                    pass
-                    # If we get here, then the program isn't running (or at least not
-                    # as the current user), so allow the flow of execution to fall
-                    # through below and unlink the lockfile.
-
-            # No pid found, optimistically assume the user isn't running
-            # twice.
-            logger_buildcontext.warning(" y[WARNING]: stale kde-builder lockfile found, deleting.")
-            os.unlink(lockfile)
-
-            try:
-                lockfile_fd = os.open(lockfile, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
-            except OSError:
-                logger_buildcontext.error(f" r[*] Still unable to lock {lockfile}, proceeding anyways...")
-                return True
-            # Hope the sysopen worked... fall-through
-        elif error_code == errno.ENOTTY:
-            # Stupid bugs... normally sysopen will return ENOTTY, not sure who's to blame between
-            # glibc and Perl but I know that setting PERLIO=:stdio in the environment "fixes" things.
-            pass
-        elif error_code != 0:  # Some other error occurred.
-            logger_buildcontext.warning(f" r[*]: Error {error_code} while creating lock file (is {base_dir} available?)")
-            logger_buildcontext.warning(" r[*]: Continuing the script for now...")
-
-            # Even if we fail it's generally better to allow the script to proceed
-            # without being a jerk about things, especially as more non-CLI-skilled
-            # users start using kde-builder to build KDE.
-            return True
-
-        os.write(lockfile_fd, str(os.getpid()).encode())
-        os.close(lockfile_fd)
-        return True
-
-    def close_lock(self) -> None:
-        """
-        Releases the lock obtained by take_lock.
-        """
-        base_dir = self.base_config_directory()
-        lock_file = f"{base_dir}/{BuildContext.LOCKFILE_NAME}"
-
-        try:
-            os.unlink(lock_file)
-        except Exception as e:
-            logger_buildcontext.warning(f" y[*] Failed to close lock: {e}")
-
     # @override
     def get_log_dir(self) -> str:
         return self.get_log_dir_for(self)
@@ -349,18 +264,7 @@ class BuildContext(PathResolvingOptions):
         base_log_path = module.get_absolute_path("log-dir")
         if base_log_path not in self.log_paths:
             # No log dir made for this base, do so now.
-            date = datetime.datetime.now().strftime("%F")  # ISO 8601 date (example: "2024-01-31")
-
-            existing_folders = os.listdir(base_log_path) if os.path.exists(base_log_path) else []
-            todays_ids_str = [folder.removeprefix(date)[1:] for folder in existing_folders if folder.startswith(date)]
-
-            max_id = 0
-            for id_str in todays_ids_str:
-                if id_str.isdigit() and int(id_str) > max_id:
-                    max_id = int(id_str)
-
-            log_id = str(max_id + 1).zfill(2)
-            self.log_paths[base_log_path] = f"{base_log_path}/{date}_{log_id}"
+            self.log_paths[base_log_path] = self._create_log_dir(base_log_path)
 
         log_dir = self.log_paths[base_log_path]
         Util.super_mkdir(log_dir)
@@ -371,6 +275,40 @@ class BuildContext(PathResolvingOptions):
 
         return log_dir
 
+    def _create_log_dir(self, base_log_path: str) -> str:
+        """
+        Create the log directory of this run under the base log directory, e.g. "<log-dir>/2024-01-31_03", and return its path.
+
+        Concurrent runs get different directories, as the directory is created atomically. It is locked shared for the
+        rest of the run, so that ``purge-old-logs`` of other runs does not remove it. See LogDir.
+        """
+        date = datetime.datetime.now().strftime("%F")  # ISO 8601 date (example: "2024-01-31")
+
+        existing_folders = os.listdir(base_log_path) if os.path.exists(base_log_path) else []
+        todays_ids_str = [folder.removeprefix(date)[1:] for folder in existing_folders if folder.startswith(date)]
+
+        max_id = 0
+        for id_str in todays_ids_str:
+            if id_str.isdigit() and int(id_str) > max_id:
+                max_id = int(id_str)
+
+        while True:
+            max_id += 1
+            log_dir = f"{base_log_path}/{date}_{str(max_id).zfill(2)}"
+            if Debug().pretending():
+                return log_dir
+
+            Util.super_mkdir(base_log_path)
+            try:
+                os.mkdir(log_dir)
+            except FileExistsError:
+                continue  # Just created by another run
+
+            lock = PathLock(log_dir, f"the log directory {log_dir}")
+            lock.acquire(exclusive=False)
+            self.log_dir_locks.append(lock)
+            return log_dir
+
     # @override
     def get_log_path(self, path: str) -> str:
         return self.get_log_path_for(self, path)
@@ -564,6 +502,19 @@ class BuildContext(PathResolvingOptions):
         modules = [module for module in modules if module.name in self.errors]
         return modules
 
+    def mark_module_skipped(self, module: Module, failed_dependency: str) -> None:
+        """
+        Mark the module as not built because the given (transitive) dependency of it has failed.
+        """
+        self.skipped[module.name] = failed_dependency
+
+    def list_skipped_modules(self) -> list[Module]:
+        """
+        Return a list of modules that were skipped due to a failed dependency, in the order the modules are listed in our current module list.
+        """
+        modules = [module for module in self.modules if module.name in self.skipped]
+        return modules
+
     # @override
     def set_option(self, opt_name: str, opt_val) -> None:
 
@@ -629,12 +580,15 @@ class BuildContext(PathResolvingOptions):
         #    # for each module
         #  }
         self.persistent_options = {}
+        self.loaded_persistent_options = {}
 
         fname = self.persistent_option_file_name()
         if not os.path.exists(fname):
             return
 
-        persistent_data = Path(fname).read_text()
+        with open(fname, "r") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)  # Do not read it while another run writes it
+            persistent_data = f.read()
 
         # persistent_data should be a JSON object which we can store directly as a
         # dict.
@@ -644,12 +598,16 @@ class BuildContext(PathResolvingOptions):
             logger_buildcontext.error(f"Failed to read persistent data: r[b[{e}]")
             return
         self.persistent_options = persistent_options
+        self.loaded_persistent_options = copy.deepcopy(persistent_options)
 
     def store_persistent_options(self) -> None:
         """
         Write out persistent options to the kde-builder-persistent-data.json file.
 
         The directory used is the same directory that contains the rc file in use.
+
+        Other kde-builder runs using the same file may have stored their options since it was read. So only the options
+        changed in this run are written over the current content of the file.
         """
         if Debug().pretending():
             return
@@ -661,12 +619,40 @@ class BuildContext(PathResolvingOptions):
             Util.super_mkdir(dir_name)
 
         try:
-            encoded_json = json.dumps(self.persistent_options, indent=3)
-            Path(file_name).write_text(encoded_json)
+            with open(file_name, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    stored_options = json.loads(f.read() or "{}")
+                except json.JSONDecodeError:
+                    stored_options = None
+                if isinstance(stored_options, dict):
+                    persistent_options = BuildContext._merge_persistent_options(stored_options, self.loaded_persistent_options, self.persistent_options)
+                else:
+                    persistent_options = self.persistent_options
+
+                encoded_json = json.dumps(persistent_options, indent=3)
+                f.truncate(0)
+                f.write(encoded_json)
         except Exception as e:
             logger_buildcontext.error(f"Unable to save persistent data: b[r[{e}]")
             return
 
+    @staticmethod
+    def _merge_persistent_options(stored_options: dict, loaded_options: dict, current_options: dict) -> dict:
+        """
+        Return the stored options, with the changes from the loaded options to the current options applied.
+        """
+        for module_name in {**loaded_options, **current_options}:
+            loaded = loaded_options.get(module_name, {})
+            current = current_options.get(module_name, {})
+            for key in {**loaded, **current}:
+                if key not in current:
+                    stored_options.get(module_name, {}).pop(key, None)
+                elif key not in loaded or loaded[key] != current[key]:
+                    stored_options.setdefault(module_name, {})[key] = current[key]
+        return stored_options
+
     # @override(check_signature=False)
     def get_persistent_option(self, module_name: str, key=None) -> str | int | None:
         """
@@ -8,6 +8,7 @@ from __future__ import annotations
 import logging
 import os.path
 import re
+import signal
 import sys
 import time
 from typing import TYPE_CHECKING
@@ -15,7 +16,10 @@ from typing import TYPE_CHECKING
 from kde_builder.kb_exception import ProgramError
 from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
+from kde_builder.os_support import CoresAndMemorySupport
 from kde_builder.util.logged_subprocess import UtilLoggedSubprocess
+from kde_builder.util.metrics import Metrics
+from kde_builder.util.pressure_governor import PressureGovernor
 from kde_builder.util.util import Util
 
 if TYPE_CHECKING:
@@ -43,6 +47,16 @@ class BuildSystem:
         results = buildsys.build_internal()
     """
 
+    # Messages which compilers and linkers print when they get killed, mostly by the kernel OOM killer.
+    OOM_LOG_PATTERNS = re.compile(
+        r"Killed signal terminated program"
+        r"|internal compiler error: Killed"
+        r"|terminated with signal 9"
+        r"|virtual memory exhausted"
+        r"|out of memory allocating"
+        r"|error: unable to execute command: Killed"
+    )
+
     def __init__(self, module: Module):
         self.module = module
 
@@ -74,25 +88,92 @@ class BuildSystem:
         Return cpu cores limit to apply during the build.
         """
         num_cores: str = self.module.get_option("num-cores")
+        cores: int | None
 
-        # If set to empty, accept user's decision
         if num_cores == "":
-            return None
-
-        if num_cores == "auto":
+            # If set to empty, accept user's decision
+            cores = None
+        elif num_cores == "auto":
             # If the build_system can manage it and the user doesn't care, that's OK too
             if self.supports_auto_parallelism():
-                return None
+                cores = None
             else:
-                cores: int = self.auto_cores_number()
+                cores = self.auto_cores_number()
         else:
             cores = int(num_cores)
             # If user sets cores to something silly, set it to a failsafe.
             if cores <= 0:
                 cores = 4
 
+        if self.module.get_option("adaptive-num-cores"):
+            cores = self._adapt_cores_to_available_memory(cores)
+
         return cores
 
+    # Part of the currently available memory that the compile jobs are allowed to take, to leave room for the linker and the rest of the system.
+    ADAPTIVE_MEMORY_SHARE = 0.9
+    # Number of builds whose peak memory per job is remembered. The largest of them is used.
+    PEAK_RSS_HISTORY_LENGTH = 5
+    # Builds that took less CPU time than this (in seconds) have compiled (almost) nothing, so their peak memory is not representative.
+    PEAK_RSS_MIN_CPU_SECONDS = 10
+
+    def _adapt_cores_to_available_memory(self, cores: int | None) -> int | None:
+        """
+        Limit the number of jobs so that they fit into the currently available memory.
+
+        The peak memory of a single compile job is the largest one of the recent builds of this module (see
+        _record_peak_memory_per_job()). Without such history, or if the available memory cannot be detected, the job count is
+        left unchanged.
+
+        Args:
+            cores: The job count chosen from the "num-cores" option. None means the build system decides on its own.
+
+        Returns:
+            The job count to use, never above the given one.
+        """
+        peak_rss_history = self.module.get_persistent_option("peak-rss-history") or []
+        if not peak_rss_history:
+            logger_buildsystem.debug(f"\tNo memory usage recorded for the previous builds of {self.module}, not adapting its number of jobs")
+            return cores
+        peak_rss_per_job = max(peak_rss_history)  # in KiB
+
+        mem_available = CoresAndMemorySupport.detect_available_memory()
+        if mem_available is None:
+            logger_buildsystem.debug(f"\tUnable to detect available memory, not adapting the number of jobs for {self.module}")
+            return cores
+
+        max_cores = cores or os.cpu_count() or 4
+        memory_cores = max(1, int(mem_available * self.ADAPTIVE_MEMORY_SHARE / peak_rss_per_job))
+        adapted_cores = min(max_cores, memory_cores)
+
+        logger_buildsystem.debug(f"\tUsing {adapted_cores} jobs for {self.module}: peak memory per job of recent builds was {peak_rss_per_job // 1024} MiB, "
+                                 f"{mem_available // 1024} MiB available now, allowing {memory_cores} jobs (limit is {max_cores})")
+
+        if cores is None and adapted_cores == max_cores:
+            return None  # Memory is not the limit, so let the build system decide as before
+        return adapted_cores
+
+    def _record_peak_memory_per_job(self) -> None:
+        """
+        Add the peak memory per job of the build that just ran to the "peak-rss-history" persistent option.
+
+        The max RSS recorded for the build log (see Util.store_resource_usage()) is that of the largest single child of the build tool,
+        i.e. of the largest compile or link job. Builds which have compiled (almost) nothing are skipped, so that a no-op incremental
+        build does not hide the memory needed by a full one.
+        """
+        usage = (self.module.get_persistent_option("resource-usage") or {}).get("build")
+        if not usage:
+            return
+
+        cpu_seconds = usage["user-time"] + usage["system-time"]
+        if cpu_seconds < self.PEAK_RSS_MIN_CPU_SECONDS:
+            logger_buildsystem.debug(f"\tThe build of {self.module} took only {cpu_seconds:.1f} s of CPU time, not recording its peak memory")
+            return
+
+        peak_rss_history = self.module.get_persistent_option("peak-rss-history") or []
+        peak_rss_history = [*peak_rss_history, usage["max-rss"]][-self.PEAK_RSS_HISTORY_LENGTH:]
+        self.module.set_persistent_option("peak-rss-history", peak_rss_history)
+
     def needs_refreshed(self) -> str:
         """
         Determine if a given module needs to have the build system recreated from scratch.
@@ -195,6 +276,15 @@ class BuildSystem:
             # Prepend parallelism arg to allow user settings to override
             build_options = ["-j", str(num_cores)] + build_options
 
+        # A previous build was killed for running out of memory, and succeeded with fewer jobs. See _retry_build_after_oom().
+        # This limit is applied after the user settings, as they are what made the build run out of memory.
+        oom_safe_cores = self._oom_safe_cores()
+        if oom_safe_cores:
+            jobs, other_options = self._split_jobs_from_build_options(build_options)
+            if jobs is None or jobs > oom_safe_cores:
+                logger_buildsystem.debug(f"\tLimiting the number of jobs for {self.module} to {oom_safe_cores}, as its previous build ran out of memory")
+                build_options = ["-j", str(oom_safe_cores)] + other_options
+
         return build_options
 
     def build_internal(self) -> dict:
@@ -208,8 +298,134 @@ class BuildSystem:
             "make-options": build_options,
             "logbase": "build",
         })
+
+        if not ret["was_successful"] and ret.get("oom_killed") and self.module.get_option("retry-build-on-oom"):
+            ret = self._retry_build_after_oom(build_options)
+        elif ret["was_successful"] and not Debug().pretending():
+            self._count_success_with_oom_safe_cores()
+
+        if not Debug().pretending():
+            self._record_peak_memory_per_job()
+        return ret
+
+    @staticmethod
+    def _split_jobs_from_build_options(build_options: list[str]) -> tuple[int | None, list[str]]:
+        """
+        Separate the job count arguments (``-j N``, ``-jN``, ``--jobs=N``, ``--jobs N``) from the other build options.
+
+        Returns:
+            Tuple containing:
+            1 - the effective (last given) job count, or None if there was none.
+            2 - the build options without the job count arguments.
+        """
+        jobs = None
+        remaining = []
+        options = iter(build_options)
+        for option in options:
+            if option in ["-j", "--jobs"]:
+                value = next(options, "")
+                if value.isdigit():
+                    jobs = int(value)
+                    continue
+                remaining.extend([option, value] if value else [option])
+            elif match := re.match(r"^(?:-j|--jobs=)([0-9]+)$", option):
+                jobs = int(match.group(1))
+            else:
+                remaining.append(option)
+        return jobs, remaining
+
+    def _retry_build_after_oom(self, build_options: list[str]) -> dict:
+        """
+        Re-run the build with fewer jobs, after it was killed for running out of memory.
+
+        The job count is halved on every attempt, down to the value of the num-cores-low-mem option. The job count
+        which succeeded is stored in the "oom-safe-num-cores" persistent option, so the next runs start with it.
+
+        Returns:
+            Dict as defined by safe_make, for the last attempt.
+        """
+        module = self.module
+        jobs, other_options = self._split_jobs_from_build_options(build_options)
+        if not jobs:
+            jobs = os.cpu_count() or 4
+
+        try:
+            min_jobs = max(1, int(module.get_option("num-cores-low-mem")))
+        except ValueError:
+            min_jobs = 1
+
+        ret = {"was_successful": 0}
+        while jobs > min_jobs:
+            jobs = max(min_jobs, jobs // 2)
+            logger_buildsystem.warning(f"\ty[b[*] The build of y[{module}] seems to have run out of memory, retrying with b[{jobs}] jobs.")
+
+            ret = self.safe_make({
+                "target": None,
+                "message": f"Compiling with {jobs} jobs...",
+                "make-options": ["-j", str(jobs), *other_options],
+                "logbase": "build",
+            })
+
+            if ret["was_successful"]:
+                module.set_persistent_option("oom-safe-num-cores", {
+                    "jobs": jobs,
+                    "total-memory": self._total_memory(),
+                    "successes": 0,
+                })
+                break
+            if not ret.get("oom_killed"):
+                break
         return ret
 
+    # Number of successful builds with the out-of-memory safe job count, after which twice as many jobs are tried again.
+    OOM_SAFE_REPROBE_AFTER = 5
+
+    @staticmethod
+    def _total_memory() -> int | None:
+        try:
+            return CoresAndMemorySupport._detect_total_memory()
+        except Exception:
+            return None
+
+    def _oom_safe_cores(self) -> int | None:
+        """
+        Return the job count which was found to not run out of memory by _retry_build_after_oom(), or None if there is none.
+
+        The job count is forgotten when the total memory of the system has changed since it was found.
+        """
+        oom_safe = self.module.get_persistent_option("oom-safe-num-cores")
+        if not oom_safe:
+            return None
+
+        total_memory = self._total_memory()
+        if total_memory and oom_safe["total-memory"] and total_memory != oom_safe["total-memory"]:
+            logger_buildsystem.info(f"\tThe total memory has changed since the build of {self.module} ran out of memory, not limiting its number of jobs anymore")
+            self.module.unset_persistent_option("oom-safe-num-cores")
+            return None
+        return oom_safe["jobs"]
+
+    def _count_success_with_oom_safe_cores(self) -> None:
+        """
+        Count a successful build with the out-of-memory safe job count, and raise that job count after OOM_SAFE_REPROBE_AFTER of them.
+
+        The memory usage of the module may have gone down, so the job count is doubled from time to time. If the build runs
+        out of memory again, _retry_build_after_oom() lowers it again. Once it reaches the number of CPUs, it is forgotten.
+        """
+        oom_safe = self.module.get_persistent_option("oom-safe-num-cores")
+        if not oom_safe:
+            return
+
+        oom_safe = {**oom_safe, "successes": oom_safe["successes"] + 1}
+        if oom_safe["successes"] >= self.OOM_SAFE_REPROBE_AFTER:
+            oom_safe["jobs"] *= 2
+            oom_safe["successes"] = 0
+            if oom_safe["jobs"] >= (os.cpu_count() or 4):
+                logger_buildsystem.info(f"\tNot limiting the number of jobs for {self.module} anymore, its last builds did not run out of memory")
+                self.module.unset_persistent_option("oom-safe-num-cores")
+                return
+            logger_buildsystem.info(f"\tRaising the number of jobs for {self.module} to {oom_safe['jobs']}, its last builds did not run out of memory")
+        self.module.set_persistent_option("oom-safe-num-cores", oom_safe)
+
     def configure_internal(self) -> bool:
         # It is possible to make it here if there's no source dir and if we're
         # pretending. If we're not actually pretending then this should be a
@@ -425,6 +641,26 @@ class BuildSystem:
         return self._run_build_command(opts["message"], logname, args)
 
     def _run_build_command(self, message: str, filename: str, args: list[str]) -> dict:
+        """
+        Run make, while throttling it if the system is under pressure and the "throttle-on-pressure" option is enabled.
+
+        See _run_build_command_with_progress() for the arguments and return value.
+        """
+        governor = None
+        if filename == "build" and self.module.get_option("throttle-on-pressure") and not Debug().pretending():
+            governor = PressureGovernor(self.module)
+            governor.start()
+        try:
+            result = self._run_build_command_with_progress(message, filename, args)
+        finally:
+            if governor:
+                governor.stop()
+
+        if filename == "build":
+            Metrics().add("compile_warnings", result.get("warnings", 0), project=self.module.name)
+        return result
+
+    def _run_build_command_with_progress(self, message: str, filename: str, args: list[str]) -> dict:
         """
         Run make and process the build process output in order to provide completion updates.
 
@@ -447,7 +683,11 @@ class BuildSystem:
         if not sys.stderr.isatty() or logger_logged_cmd.isEnabledFor(logging.DEBUG):
             logger_buildsystem.warning(f"\t{message}")
 
-            result["was_successful"] = Util.good_exitcode(Util.run_logged(module, filename, builddir, args))
+            exitcode = Util.run_logged(module, filename, builddir, args)
+            result["was_successful"] = Util.good_exitcode(exitcode)
+            result["warnings"] = self._count_warnings_in_log(filename)
+            if not result["was_successful"]:
+                result["oom_killed"] = self._is_out_of_memory_failure(exitcode, filename)
 
             return result
 
@@ -507,6 +747,8 @@ class BuildSystem:
                 "was_successful": exitcode == 0,
                 "warnings": warnings,
             }
+            if not result["was_successful"]:
+                result["oom_killed"] = self._is_out_of_memory_failure(exitcode, filename)
         except Exception as err:
             logger_buildsystem.error(f" r[b[*] Hit error building {module}: b[{err}]")
             result["was_successful"] = 0
@@ -531,3 +773,37 @@ class BuildSystem:
             self.module.set_persistent_option("last-compile-warnings", warnings)
 
         return result
+
+    def _count_warnings_in_log(self, filename: str) -> int:
+        """
+        Return the number of compiler warnings in the log file of the build command, like counted from its output in _run_build_command_with_progress().
+        """
+        if Debug().pretending():
+            return 0
+        try:
+            with open(self.module.get_log_path(f"{filename}.log"), "r", errors="replace") as f:
+                return sum(1 for line in f if "warning: " in line)
+        except OSError:
+            return 0
+
+    def _is_out_of_memory_failure(self, exitcode: int, filename: str) -> bool:
+        """
+        Guess if the failed build command was killed for running out of memory.
+
+        Args:
+            exitcode: The wait status of the command, as returned by run_logged().
+            filename: The base name of the log file of the command.
+        """
+        if os.WIFSIGNALED(exitcode) and os.WTERMSIG(exitcode) == signal.SIGKILL:
+            return True
+        if os.WIFEXITED(exitcode) and os.WEXITSTATUS(exitcode) == 128 + signal.SIGKILL:
+            return True
+
+        logpath = f"{self.module.get_log_dir()}/{filename}.log"
+        try:
+            with open(logpath, "r", errors="replace") as f:
+                f.seek(max(0, os.path.getsize(logpath) - 65536))  # The reason is near the end, and build logs can be huge.
+                log_tail = f.read()
+        except OSError:
+            return False
+        return bool(self.OOM_LOG_PATTERNS.search(log_tail))
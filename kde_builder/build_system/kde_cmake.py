@@ -14,6 +14,7 @@ from kde_builder.kb_exception import ProgramError
 from kde_builder.debug import KBLogger
 from kde_builder.ide_project_config_generator import IdeProjectConfigGenerator
 from kde_builder.util.logged_subprocess import UtilLoggedSubprocess
+from kde_builder.util.metrics import Metrics
 from kde_builder.util.textwrap_mod import dedent
 from kde_builder.util.util import Util
 
@@ -432,6 +433,7 @@ class BuildSystemKDECMake(BuildSystem):
                 Util.safe_unlink(f"{builddir}/CMakeCache.txt")
 
             module.set_persistent_option("last-cmake-options", Util.get_list_digest(commands))
+            Metrics().add("cmake_runs", 1, project=module.name)
 
             cmd = UtilLoggedSubprocess().module(module).log_to("cmake").chdir_to(builddir).set_command(commands)
 
@@ -489,4 +491,5 @@ class BuildSystemKDECMake(BuildSystem):
                 module.add_post_build_message("Some optional dependencies were not found: " + ", ".join(optional_packages_not_found))
             return result
         # Skip cmake run
+        Metrics().add("cmake_runs", 0, project=module.name)
         return 0
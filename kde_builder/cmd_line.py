@@ -176,8 +176,8 @@ class Cmdline:
             elif line.endswith("=s{,}"):  # one or more option values
                 nargs = "\"+\""
                 line = line.removesuffix("=s{,}")
-            elif line.endswith(":s"):  # optional string argument
-                nargs = "\"?\""
+            elif line.endswith(":s"):  # optional string argument, empty string if the option is given without it
+                nargs = "\"?\", const=\"\""
                 line = line.removesuffix(":s")
             elif line.endswith("=i"):
                 nargs = 1
@@ -327,12 +327,24 @@ class Cmdline:
         if args.no_metadata:
             found_options["no-metadata"] = True
 
+        if args.prefetch_only:
+            found_options["prefetch-only"] = True
+            phases.reset_to(["update"])
+
+        if args.profile is not None:
+            found_options["profile"] = args.profile
+
         if args.rc_file is not None:
             found_options["rc-file"] = args.rc_file[0]
 
         if args.rebuild_failures:
             found_options["rebuild-failures"] = True
 
+        if args.rebuild_dependents:
+            found_options["rebuild-dependents"] = True
+            # The dependents are added explicitly, pulling in dependencies of them would defeat the purpose.
+            found_options["include-dependencies"] = False
+
         if args.reconfigure:
             found_options["reconfigure"] = True
 
@@ -357,6 +369,9 @@ class Cmdline:
         if args.stop_before is not None:
             found_options["stop-before"] = args.stop_before[0]
 
+        if args.watch:
+            found_options["watch"] = True
+
         if args.binpath is not None:
             found_options["binpath"] = args.binpath[0]
 
@@ -387,6 +402,12 @@ class Cmdline:
         if args.dest_dir is not None:
             found_options["dest-dir"] = args.dest_dir[0]
 
+        if args.git_maintenance_days is not None:
+            found_options["git-maintenance-days"] = args.git_maintenance_days[0]
+
+        if args.git_mirror_dir is not None:
+            found_options["git-mirror-dir"] = args.git_mirror_dir[0]
+
         if args.install_login_session_only:
             opts["run_mode"] = "install-login-session-only"
             phases.clear()
@@ -409,6 +430,9 @@ class Cmdline:
         if args.meson_options is not None:
             found_options["meson-options"] = args.meson_options[0]
 
+        if args.metrics_file is not None:
+            found_options["metrics-file"] = args.metrics_file[0]
+
         if args.ninja_options is not None:
             found_options["ninja-options"] = args.ninja_options[0]
 
@@ -421,6 +445,9 @@ class Cmdline:
         if args.override_build_system is not None:
             found_options["override-build-system"] = args.override_build_system[0]
 
+        if args.partial_clone is not None:
+            found_options["partial-clone"] = args.partial_clone[0]
+
         if args.persistent_data_file is not None:
             found_options["persistent-data-file"] = args.persistent_data_file[0]
 
@@ -433,6 +460,9 @@ class Cmdline:
         if args.remove_after_install is not None:
             found_options["remove-after-install"] = args.remove_after_install[0]
 
+        if args.shallow_clone_depth is not None:
+            found_options["shallow-clone-depth"] = args.shallow_clone_depth[0]
+
         if args.source_dir is not None:
             found_options["source-dir"] = args.source_dir[0]
 
@@ -479,8 +509,10 @@ class Cmdline:
 
         # The initial setup options are handled outside the Cmdline (in the starting script).
         initial_options = ["initial-setup", "install-distro-packages", "generate-config"]
+        # So are the daemon options.
+        daemon_options = ["daemon", "use-daemon"]
 
-        for option in [*supported_options, *initial_options, "debug"]:
+        for option in [*supported_options, *initial_options, *daemon_options, "debug"]:
             print(option)
 
         exit()
@@ -511,8 +543,10 @@ class Cmdline:
             "install-login-session-only",
             "list-installed",
             "no-metadata|M",
+            "profile:s",
             "query=s",
             "rc-file=s",
+            "rebuild-dependents",
             "rebuild-failures",
             "resume",
             "resume-after|after|a=s",
@@ -525,6 +559,7 @@ class Cmdline:
             "stop-after|to=s",
             "stop-before|until=s",
             "version|v",
+            "watch",
         ]
 
         context_options_with_extra_specifier = [
@@ -0,0 +1,322 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+from typing import NoReturn
+
+from kde_builder import KB_PACKAGE_DIR
+
+
+class Daemon:
+    """
+    Keeps kde-builder loaded between runs, so that queries and builds do not pay the startup cost every time. See the ``--daemon`` and ``--use-daemon`` options.
+
+    The daemon listens on a Unix socket in the state directory. A client (``kde-builder --use-daemon ...``) sends its
+    command line, working directory and environment, and passes its stdin, stdout and stderr along. For every request,
+    the daemon forks a process which runs kde-builder as usual, but with the modules already imported, and with the data
+    kept in the WarmCache: the KDE projects, the selector expansions, the dependency data and the result of the git
+    config verification. The cached data is invalidated when the files it was read from change. The forked process
+    sends the data it has built back to the daemon when it ends, so the first run after a change warms the cache up.
+
+    The client forwards the signals it gets (e.g. Ctrl+C) to the forked process, and exits with its exit code.
+
+    Requests are declined, and the client then runs kde-builder itself, when kde-builder was updated since the daemon
+    started (the daemon restarts itself once idle), or when the client has another HOME or XDG config/state directory.
+    """
+
+    ENVIRONMENT_CHECKED = ["HOME", "XDG_CONFIG_HOME", "XDG_STATE_HOME"]
+    """Environment variables which must be the same for the client and the daemon, because they are read at import time."""
+
+    FORWARDED_SIGNALS = [signal.SIGINT, signal.SIGTERM, signal.SIGHUP]
+
+    def __init__(self, socket_path: str | None = None):
+        from kde_builder.util.warm_cache import WarmCache  # Not imported at the top, to keep the client light
+
+        self.warm_cache = WarmCache()
+        self.socket_path = socket_path or Daemon.default_socket_path()
+        self.selector = selectors.DefaultSelector()
+        self.listener: socket.socket | None = None
+        self.running: dict[int, dict] = {}
+        """Maps pids of the forked processes to their client connection, result pipe and received data."""
+        self.code_signature = self._code_signature()
+        self.restart_pending = False
+        self.stopping = False
+
+    @staticmethod
+    def default_socket_path() -> str:
+        return os.environ.get("XDG_STATE_HOME", os.environ["HOME"] + "/.local/state") + "/kde-builder-daemon.socket"
+
+    def _code_signature(self) -> tuple:
+        return tuple(entry for entry in self.warm_cache.tree_signature(KB_PACKAGE_DIR) if "/__pycache__/" not in entry[0])
+
+    @staticmethod
+    def run_client(args: list[str], socket_path: str | None = None) -> int | None:
+        """
+        Run kde-builder with the given command line arguments in the daemon.
+
+        Returns:
+            The exit code of the run, or None if the daemon is not running or declined the request, so that the caller
+            should run kde-builder itself.
+        """
+        socket_path = socket_path or Daemon.default_socket_path()
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(socket_path)
+        except OSError as e:
+            print(f"kde-builder daemon is not available ({e.strerror}), running without it.", file=sys.stderr)
+            return None
+
+        request = json.dumps({"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}).encode()
+        pid = None
+
+        def forward_signal(signum, frame):
+            try:
+                os.killpg(pid, signum)
+            except ProcessLookupError:
+                pass
+
+        previous_handlers = {}
+        try:
+            with sock:
+                socket.send_fds(sock, [struct.pack("!I", len(request))], [0, 1, 2])
+                sock.sendall(request)
+
+                for line in sock.makefile("r"):
+                    reply = json.loads(line)
+                    if "declined" in reply:
+                        print(f"kde-builder daemon declined the request ({reply['declined']}), running without it.", file=sys.stderr)
+                        return None
+                    if "pid" in reply:
+                        pid = reply["pid"]
+                        previous_handlers = {signum: signal.signal(signum, forward_signal) for signum in Daemon.FORWARDED_SIGNALS}
+                    if "exit_code" in reply:
+                        return reply["exit_code"]
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        if pid is None:
+            print("kde-builder daemon closed the connection, running without it.", file=sys.stderr)
+            return None
+        print("kde-builder daemon closed the connection before the run finished.", file=sys.stderr)
+        return 1
+
+    def serve(self) -> int:
+        """
+        Listen for requests until terminated with SIGINT or SIGTERM. Running requests are finished before exiting.
+
+        Returns:
+            The exit code for kde-builder.
+        """
+        # Import everything once here, instead of in every run.
+        import kde_builder.application  # noqa: F401
+
+        self.warm_cache.enabled = True
+
+        if os.path.exists(self.socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_path)
+                print(f"kde-builder daemon is already running on {self.socket_path}", file=sys.stderr)
+                return 1
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)  # Left by a daemon which did not exit cleanly
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self.listener.listen()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+        def stop(signum, frame):
+            if self.stopping:
+                sys.exit(1)
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        print(f"kde-builder daemon is listening on {self.socket_path}", flush=True)
+        try:
+            while True:
+                if (self.stopping or self.restart_pending) and self.listener:
+                    self._stop_listening()
+                if not self.listener and not self.running:
+                    break
+                for key, _ in self.selector.select(timeout=1):
+                    if key.fileobj is self.listener:
+                        self._accept()
+                    else:
+                        self._read_result(key.data)
+        finally:
+            self._stop_listening()
+
+        if self.restart_pending and not self.stopping:
+            print("kde-builder was updated, restarting the daemon", flush=True)
+            os.execv(sys.executable, [sys.executable, *sys.argv])
+        return 0
+
+    def _stop_listening(self) -> None:
+        if not self.listener:
+            return
+        self.selector.unregister(self.listener)
+        self.listener.close()
+        self.listener = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _accept(self) -> None:
+        connection, _ = self.listener.accept()
+        connection.settimeout(10)  # Do not let a broken client block the daemon
+        fds = []
+        try:
+            header, fds, _, _ = socket.recv_fds(connection, 4, 3)
+            length = struct.unpack("!I", header)[0]
+            data = b""
+            while len(data) < length:
+                chunk = connection.recv(length - len(data))
+                if not chunk:
+                    raise ConnectionError("Incomplete request")
+                data += chunk
+            request = json.loads(data)
+            if len(fds) != 3:
+                raise ValueError("Expected the stdin, stdout and stderr of the client")
+        except (OSError, struct.error, ValueError) as e:
+            print(f"Invalid request: {e}", flush=True)
+            for fd in fds:
+                os.close(fd)
+            connection.close()
+            return
+
+        decline_reason = self._decline_reason(request)
+        if decline_reason:
+            for fd in fds:
+                os.close(fd)
+            connection.sendall((json.dumps({"declined": decline_reason}) + "\n").encode())
+            connection.close()
+            return
+
+        result_read_fd, result_write_fd = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(result_read_fd)
+            self._run_request(request, fds, result_write_fd)  # noreturn
+
+        os.close(result_write_fd)
+        for fd in fds:
+            os.close(fd)
+        connection.sendall((json.dumps({"pid": pid}) + "\n").encode())
+        os.set_blocking(result_read_fd, False)
+        self.selector.register(result_read_fd, selectors.EVENT_READ, pid)
+        self.running[pid] = {"connection": connection, "result_fd": result_read_fd, "data": bytearray(), "start": time.monotonic()}
+        print(f"Running kde-builder {' '.join(request['args'])} (pid {pid})", flush=True)
+
+    def _decline_reason(self, request: dict) -> str:
+        if self.restart_pending or self._code_signature() != self.code_signature:
+            self.restart_pending = True
+            return "kde-builder was updated, the daemon is restarting"
+        for name in Daemon.ENVIRONMENT_CHECKED:
+            if request["env"].get(name) != os.environ.get(name):
+                return f"{name} differs from the one of the daemon"
+        return ""
+
+    def _read_result(self, pid: int) -> None:
+        """
+        Read the data sent by the forked process. When it is complete, the process has ended, and the client is told its exit code.
+        """
+        run = self.running[pid]
+        try:
+            chunk = os.read(run["result_fd"], 65536)
+        except BlockingIOError:
+            return
+        if chunk:
+            run["data"] += chunk
+            return
+
+        self.selector.unregister(run["result_fd"])
+        os.close(run["result_fd"])
+        del self.running[pid]
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code < 0:
+            exit_code = 128 - exit_code  # Killed by a signal, report it the way shells do
+
+        if run["data"]:
+            try:
+                self.warm_cache.merge(bytes(run["data"]))
+            except Exception as e:
+                print(f"Unable to read the cached data of pid {pid}: {e}", flush=True)
+
+        try:
+            run["connection"].sendall((json.dumps({"exit_code": exit_code}) + "\n").encode())
+        except OSError:
+            pass  # The client is gone
+        run["connection"].close()
+        print(f"Finished pid {pid} with exit code {exit_code} in {time.monotonic() - run['start']:.2f} s", flush=True)
+
+    def _run_request(self, request: dict, fds: list[int], result_fd: int) -> NoReturn:
+        """
+        Run kde-builder for the request in the forked process, as if it was started by the client.
+        """
+        exit_code = 1
+        try:
+            os.setpgrp()  # So the client can forward signals to the whole run, including the build processes
+            signal.signal(signal.SIGINT, signal.default_int_handler)  # As in any Python program
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            self.selector.close()
+            if self.listener:
+                self.listener.close()
+            for run in self.running.values():
+                run["connection"].close()
+                os.close(run["result_fd"])
+
+            for target_fd, fd in enumerate(fds):
+                os.dup2(fd, target_fd)
+                os.close(fd)
+            sys.stdin = open(0, "r", closefd=False)
+            sys.stdout = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+            sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            sys.argv = [sys.argv[0], *request["args"]]
+
+            from kde_builder.main import main
+            try:
+                main()
+                exit_code = 0
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    exit_code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+            atexit._run_exitfuncs()  # Those registered by the run, e.g. by the profiler
+        except BaseException as e:
+            traceback.print_exc()
+            if isinstance(e, KeyboardInterrupt):
+                exit_code = 128 + signal.SIGINT
+        finally:
+            try:
+                updates = memoryview(self.warm_cache.take_updates())
+                while updates:
+                    updates = updates[os.write(result_fd, updates):]
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(exit_code)
@@ -38,6 +38,11 @@ class DependencyResolver:
 
         self.dependency_graph = {}
 
+        self.reverse_dependency_index: dict[str, list[str]] = {}
+        """
+        Maps a module name to the sorted names of the modules that directly depend on it. See build_reverse_dependency_index().
+        """
+
     @staticmethod
     def _shorten_module_name(name: str) -> str:
         """
@@ -149,6 +154,58 @@ class DependencyResolver:
             dependencies["-"] = sorted(dependencies["-"])
             dependencies["+"] = sorted(dependencies["+"])
 
+    def build_reverse_dependency_index(self) -> dict[str, list[str]]:
+        """
+        Build the index of reverse dependency edges from the dependency data read with read_dependency_data().
+
+        The index does not distinguish branches: a module is counted as a dependent of another one if it depends on it
+        on any branch. This errs on the side of rebuilding too much rather than too little.
+
+        Returns:
+            The index, which is also stored in ``self.reverse_dependency_index``.
+        """
+        index: dict[str, set[str]] = {}
+
+        for dependent_key, dependencies in self.dependencies_of.items():
+            dependent_name = dependent_key.split(":", 1)[0]
+            exclusions = dependencies["-"]
+            for dep in dependencies["+"]:
+                if dep in exclusions:
+                    continue
+                dep_name = dep.split(":", 1)[0]
+                if dep_name == dependent_name:
+                    continue
+                index.setdefault(dep_name, set()).add(dependent_name)
+
+        self.reverse_dependency_index = {name: sorted(dependents) for name, dependents in sorted(index.items())}
+        return self.reverse_dependency_index
+
+    def get_transitive_dependents(self, module_name: str) -> list[str]:
+        """
+        Return the names of all modules that directly or transitively depend on the given module.
+
+        Only the reverse dependency index is consulted, so build_reverse_dependency_index() must have been called
+        (or the index restored from persistent data) beforehand.
+
+        Args:
+            module_name: The short name of the module, e.g. "kcoreaddons".
+
+        Returns:
+            Names of the dependents, in breadth-first order. The module itself is not included.
+        """
+        index = self.reverse_dependency_index
+        dependents: list[str] = []
+        seen = {module_name}
+        queue = [module_name]
+
+        while queue:
+            for dependent in index.get(queue.pop(0), []):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    dependents.append(dependent)
+                    queue.append(dependent)
+        return dependents
+
     def _lookup_direct_dependencies(self, module_name: str, branch: str) -> dict:
 
         direct_deps = []
@@ -15,6 +15,7 @@ from typing import TYPE_CHECKING
 from kde_builder.kb_exception import KBRuntimeError
 from kde_builder.kb_exception import ProgramError
 from kde_builder.debug import KBLogger
+from kde_builder.util.metrics import Metrics
 
 if TYPE_CHECKING:
     from kde_builder.module.module import Module
@@ -64,10 +65,16 @@ class IPC:
     MODULE_POSTBUILD_MSG = 12
     """A message to print after all work done (sent when could not stash or unstash changes)."""
 
+    MODULE_UPDATE_METRICS = 13
+    """Duration of the update of a module and number of pulled commits, for the metrics file."""
+
     def __init__(self):
         self.updated: dict[str, str] = {}
         """Holds update status ("skipped", "success", "failed") for the modules."""
 
+        self.update_messages: dict[str, str] = {}
+        """Holds the message of the update status (e.g. number of pulled commits) for the modules."""
+
         self.logged_module: str = "global"
 
         self.messages: dict[str, list[str]] = {}
@@ -108,6 +115,14 @@ class IPC:
         """
         self.send_ipc_message(IPC.MODULE_SUCCESS, f"{module},{msg}")
 
+    def notify_update_metrics(self, module: str, duration: float, commits: int | None, git_commands: int = 0) -> None:
+        """
+        Send the duration of the update, the number of pulled commits (None if the update failed) and the number of git processes it ran to be recorded in the metrics.
+
+        This function could be run by both: main kde-builder process (kde-builder-build), and updater process (kde-builder-updater).
+        """
+        self.send_ipc_message(IPC.MODULE_UPDATE_METRICS, f"{module},{duration:.3f},{'' if commits is None else commits},{git_commands}")
+
     def set_logged_module(self, module_name: str) -> None:
         """
         Sets which module messages stored by send_log_message() are supposed to be associated with.
@@ -168,18 +183,27 @@ class IPC:
             ipc_module_name, msg = buffer.split(",")
             message = msg
             updated[ipc_module_name] = "success"
+            self.update_messages[ipc_module_name] = message
         elif ipc_type == IPC.MODULE_FAILURE:
             message = "update failed"
             updated[buffer] = "failed"
+            self.update_messages[buffer] = message
         elif ipc_type == IPC.MODULE_UPTODATE:
             message = "no commits pulled"
             ipc_module_name = buffer
             updated[ipc_module_name] = "skipped"
+            self.update_messages[ipc_module_name] = message
         elif ipc_type == IPC.MODULE_PERSIST_OPT:
             ipc_module_name, opt_name, value = buffer.split(",")
             if self.opt_update_handler:
                 # Call into callback to update persistent options
                 self.opt_update_handler(ipc_module_name, opt_name, value)
+        elif ipc_type == IPC.MODULE_UPDATE_METRICS:
+            ipc_module_name, duration, commits, git_commands = buffer.split(",")
+            Metrics().add("phase_duration_seconds", float(duration), project=ipc_module_name, phase="update")
+            Metrics().add("update_git_commands", int(git_commands), project=ipc_module_name)
+            if commits:
+                Metrics().set("commits_pulled", int(commits), project=ipc_module_name)
         elif ipc_type == IPC.MODULE_LOGMSG:
             ipc_module_name, log_message = buffer.split(",", maxsplit=1)
 
@@ -263,13 +287,17 @@ class IPC:
                         self._print_logged_message(msg)
                     del messages[item]
 
+        # Messages received before waiting for this module, e.g. by receive_pending_messages()
+        for msg in messages.pop(module_name, []):
+            self._print_logged_message(msg)
+
         # We won't print post-build messages now but we need to save them for when
         # they can be printed.
         if module_name in self.postbuild_msg:
             for msg in self.postbuild_msg[module_name]:
                 module.add_post_build_message(msg)
             del self.postbuild_msg[module_name]
-        return updated[module_name], message
+        return updated[module_name], self.update_messages.get(module_name, message)
 
     def output_pending_logged_messages(self) -> None:
         """
@@ -302,6 +330,7 @@ class IPC:
         """
         modulename = module.name
         del self.updated[modulename]
+        self.update_messages.pop(modulename, None)
 
     def unacknowledged_modules(self) -> dict[str, str]:
         """
@@ -311,6 +340,41 @@ class IPC:
         """
         return self.updated
 
+    def has_pending_message(self) -> bool:
+        """
+        Return True if a message has already arrived, so that receiving it will not block.
+
+        Implementations which cannot tell return False.
+        """
+        return False
+
+    def receive_pending_messages(self) -> None:
+        """
+        Process all messages which have already arrived, without waiting for more.
+
+        Update statuses are recorded (see is_module_updated()), and log messages are kept to be printed later by wait_for_module().
+
+        This function is running only in main kde-builder process (kde-builder-build).
+        """
+        if not getattr(IPC, "waited", 0):
+            return  # The stream has not started yet, see wait_for_stream_start()
+
+        while not self.updates_done and self.has_pending_message():
+            ipc_type, buffer = self.receive_ipc_message()
+            if not ipc_type:
+                break
+            self._update_seen_modules_from_message(MsgType(ipc_type), buffer)
+
+    def is_module_updated(self, module: Module) -> bool:
+        """
+        Return True if the source update of the module is known to have completed successfully, without waiting for it.
+
+        This function is running only in main kde-builder process (kde-builder-build).
+        """
+        if not module.phases.has("update"):
+            return True
+        return self.updated.get(module.name) in ["success", "skipped"]
+
     def wait_for_stream_start(self) -> None:
         """
         Wait on the IPC connection until one of the ALL_* IPC codes is returned.
@@ -443,3 +507,4 @@ class MsgType(IntEnum):
     MODULE_PERSIST_OPT = IPC.MODULE_PERSIST_OPT
     ALL_DONE = IPC.ALL_DONE
     MODULE_POSTBUILD_MSG = IPC.MODULE_POSTBUILD_MSG
+    MODULE_UPDATE_METRICS = IPC.MODULE_UPDATE_METRICS
@@ -26,3 +26,7 @@ class IPCNull(IPC):
         if not len(self.msgList) > 0:
             return b""
         return self.msgList.pop(0)
+
+    # @override
+    def has_pending_message(self) -> bool:
+        return len(self.msgList) > 0
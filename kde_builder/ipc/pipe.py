@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import os
+import select
 import struct
 
 from kde_builder.ipc.ipc import IPC
@@ -75,6 +76,11 @@ class IPCPipe(IPC):
 
         return self._read_number_of_bytes(msg_length)
 
+    # @override
+    def has_pending_message(self) -> bool:
+        readable, _, _ = select.select([self.fh], [], [], 0)
+        return bool(readable)
+
     # @override
     def close(self):
         self.fh.close()
@@ -9,6 +9,7 @@ from kde_builder.build_context import BuildContext
 from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
 from kde_builder.kb_exception import KBRuntimeError
+from kde_builder.util.path_lock import PathLock
 from kde_builder.util.util import Util
 
 logger_app = KBLogger.getLogger("application")
@@ -31,7 +32,7 @@ class LogDir:
         if not os.path.exists(f"{logdir}/latest"):  # Could happen for error on first run...
             return
 
-        found_dirs = [f for f in os.listdir(logdir) if re.search(r"(\d{4}-\d{2}-\d{2}[-_]\d+)", f)]
+        found_dirs = [f for f in os.listdir(logdir) if re.search(r"(\d{4}-\d{2}-\d{2}[-_]\d+)", f) and not f.endswith(PathLock.SUFFIX)]
 
         keep_dirs = []
         for tracked_log_dir in [f"{logdir}/latest", f"{logdir}/latest-by-phase"]:
@@ -44,7 +45,14 @@ class LogDir:
 
         for dir_id in found_dirs:
             if dir_id not in keep_dirs:
+                # Log directories of running kde-builder runs are locked, see BuildContext._create_log_dir().
+                lock = PathLock(logdir + "/" + dir_id, f"the log directory {dir_id}")
+                if not lock.acquire(exclusive=True, wait=False):
+                    continue
                 Util.safe_rmtree(logdir + "/" + dir_id)
+                if not Debug().pretending() and os.path.exists(lock.lock_file):
+                    os.unlink(lock.lock_file)
+                lock.release()
 
     @staticmethod
     def cleanup_latest_log_dir(ctx) -> None:
@@ -83,6 +91,9 @@ class LogDir:
         if os.path.islink(logdir_latest + "/" + "screen.log"):
             os.unlink(logdir_latest + "/" + "screen.log")
 
+        if os.path.islink(logdir_latest + "/" + "trace.json"):
+            os.unlink(logdir_latest + "/" + "trace.json")
+
     @staticmethod
     def _symlinked_log_dirs(logdir: str) -> list[str]:
         """
@@ -53,6 +53,20 @@ def ensure_runtime_pymodules_installed():
         sys.exit(1)
 
 def main():
+    # Handled before anything else is imported, so that the client stays thin. The daemon runs main() again for every request.
+    if "--use-daemon" in sys.argv[1:]:
+        from kde_builder.daemon import Daemon
+
+        sys.argv.remove("--use-daemon")
+        exit_code = Daemon.run_client(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+    elif "--daemon" in sys.argv[1:]:
+        ensure_runtime_pymodules_installed()
+        from kde_builder.daemon import Daemon
+
+        sys.exit(Daemon().serve())
+
     ensure_runtime_pymodules_installed()
 
     import setproctitle  # noqa: E402
@@ -135,7 +149,8 @@ def main():
         level = logger_config.get("level", logging.NOTSET)  # get level from the config
         handlers = logging.getLogger(logger_name).handlers  # get the object handlers that were set for standard logger (their formatters are already set)
 
-        kblogger = KBLogger.getLogger(logger_name, level)  # instantiating our kblogger, and its level becomes set
+        kblogger = KBLogger.getLogger(logger_name)  # instantiating our kblogger
+        kblogger.setLevel(level)  # also if it was already instantiated, e.g. in the daemon, which imports everything in advance
         for handler in handlers:
             kblogger.addHandler(handler)
 
@@ -15,6 +15,7 @@ from kde_builder.kb_exception import KBRuntimeError
 from kde_builder.kb_exception import NoKDEProjectsFound
 from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
+from kde_builder.util.warm_cache import WarmCache
 
 logger_moduleset = KBLogger.getLogger("module-set")
 
@@ -34,18 +35,25 @@ class KDEProjectsReader:
         self.repositories: dict[str, dict[str, str | bool]] = {}
         """Maps short names to repo info blocks."""
 
-        self._read_project_data(repo_metadata_fullpath)
-
-    def _read_project_data(self, repo_metadata_fullpath: str) -> None:
-        # The "main" method for this class. Reads in *all* KDE projects and notes
-        # their details for later queries.
-        # Be careful, can throw exceptions.
+        self.selector_expansions: dict[tuple[str, tuple[str, ...]], tuple[list[str], bool]] = {}
+        """Maps selectors and ignore lists to the results of get_identifiers_for_selector(), and whether only inactive projects matched."""
 
         if Debug().is_testing():
             srcdir = KB_REPO_DIR + "/tests/fixtures/repo-metadata"
         else:
             srcdir = repo_metadata_fullpath
 
+        # In the daemon, the projects are read only when repo-metadata has changed, and the selector expansions are kept with them.
+        self._warm_cache_key = f"kde-projects {srcdir}"
+        self.repositories, self.selector_expansions = WarmCache().get(self._warm_cache_key,
+                                                                      lambda: WarmCache.tree_signature(f"{srcdir}/projects"),
+                                                                      lambda: (self._read_project_data(srcdir), self.selector_expansions))
+
+    def _read_project_data(self, srcdir: str) -> dict[str, dict[str, str | bool]]:
+        # The "main" method for this class. Reads in *all* KDE projects and notes
+        # their details for later queries.
+        # Be careful, can throw exceptions.
+
         if not os.path.isdir(srcdir):
             raise KBRuntimeError(f"No such source directory {srcdir}!")
 
@@ -57,6 +65,8 @@ class KDEProjectsReader:
         if not len(repo_meta_files) > 0:
             raise KBRuntimeError(f"Failed to find KDE project entries from {srcdir}!")
 
+        return self.repositories
+
     def _read_yaml(self, filename: str) -> None:
         with open(filename, "r") as file:
             proj_data = yaml.safe_load(file)
@@ -86,6 +96,21 @@ class KDEProjectsReader:
                 E.g. "utilities/kcalc" would be converted to "kcalc".
             ignore_list: A list of selectors to ignore.
         """
+        expansion_key = (selector, tuple(ignore_list))
+        if expansion_key not in self.selector_expansions:
+            self.selector_expansions[expansion_key] = self._expand_selector(selector, ignore_list)
+            WarmCache().mark_updated(self._warm_cache_key)
+        result_names, only_inactive = self.selector_expansions[expansion_key]
+
+        if only_inactive:
+            logger_moduleset.warning(f" y[b[*] Selector y[{selector}] is expanded only to inactive projects!")
+
+        return list(result_names)
+
+    def _expand_selector(self, selector: str, ignore_list: list[str]) -> tuple[list[str], bool]:
+        """
+        Return the identifiers for get_identifiers_for_selector(), and whether the selector matched only inactive projects.
+        """
         repositories = self.repositories
         sorted_keys = sorted(repositories.keys())
 
@@ -101,9 +126,6 @@ class KDEProjectsReader:
 
         active_matched_metadata: list[dict[str, str | bool]] = [metadata for metadata in all_matched_metadata if metadata.get("active")]
 
-        if not active_matched_metadata:
-            logger_moduleset.warning(f" y[b[*] Selector y[{selector}] is expanded only to inactive projects!")
-
         filtered_metadata = []
 
         for active_metadata in active_matched_metadata:
@@ -116,7 +138,7 @@ class KDEProjectsReader:
                 filtered_metadata.append(active_metadata)
 
         result_names = [metadata["name"] for metadata in filtered_metadata]
-        return result_names
+        return result_names, not active_matched_metadata
 
     @staticmethod
     def _repopath_matches_selector(repopath: str, selector: str) -> bool:
@@ -6,12 +6,14 @@
 
 from __future__ import annotations
 
+from contextlib import ExitStack
 import copy
 import glob
 import os
 import re
 import shutil
 import sys
+import time
 import traceback
 from typing import TYPE_CHECKING
 
@@ -30,8 +32,11 @@ from kde_builder.debug import KBLogger
 from kde_builder.ipc.ipc import IPC
 from kde_builder.options_base import PathResolvingOptions
 from kde_builder.updater.updater import Updater
+from kde_builder.util.metrics import Metrics
+from kde_builder.util.path_lock import PathLock
 from kde_builder.util.util import Util
 from kde_builder.util.textwrap_mod import dedent
+from kde_builder.util.trace import Trace
 
 if TYPE_CHECKING:
     from kde_builder.build_context import BuildContext
@@ -194,7 +199,9 @@ class Module(PathResolvingOptions):
             return True
 
         self.current_phase = "build"
-        build_results = build_system.build_internal()
+        with Trace().span(f"build {self.name}", "phase", module=self.name) as span, Metrics().phase(self.name, "build"):
+            build_results = build_system.build_internal()
+            span["success"] = build_results["was_successful"]
         self.current_phase = None
         if not build_results["was_successful"]:
             return False
@@ -202,7 +209,8 @@ class Module(PathResolvingOptions):
         self.set_persistent_option("last-build-rev", self.current_scm_revision())
 
         if self.get_option("run-tests"):
-            self.build_system.run_testsuite()
+            with Trace().span(f"test {self.name}", "phase", module=self.name) as span, Metrics().phase(self.name, "test"):
+                span["success"] = self.build_system.run_testsuite()
 
         return True
 
@@ -263,7 +271,9 @@ class Module(PathResolvingOptions):
         # builddir is automatically set to the right value for qt
         Util.p_chdir(builddir)
 
-        if not build_system.configure_internal():
+        with Trace().span(f"configure {self.name}", "phase", module=self.name) as span, Metrics().phase(self.name, "configure"):
+            span["success"] = build_system.configure_internal()
+        if not span["success"]:
             logger_module.error(f"\tUnable to configure r[{self.name}] with " + self.build_system.name())
 
             # Add undocumented ".refresh-me" file to build directory to flag
@@ -306,7 +316,9 @@ class Module(PathResolvingOptions):
             else:
                 self.unset_persistent_option("last-install-rev")
 
-        if not self.build_system.install_internal(make_install_opts):
+        with Trace().span(f"install {self.name}", "phase", module=self.name) as span, Metrics().phase(self.name, "install"):
+            span["success"] = self.build_system.install_internal(make_install_opts)
+        if not span["success"]:
             logger_module.error(f"\tUnable to install r[{self.name}]!")
             self.context.mark_module_phase_failed("install", self)
             return False
@@ -503,9 +515,11 @@ class Module(PathResolvingOptions):
                     """))
 
         self.current_phase = "update"
+        update_start = time.monotonic()
 
         try:
-            count = self.scm.update_internal(ipc)
+            with self.lock_directories(["update"]):
+                count = self.scm.update_internal(ipc)
         except Exception as e:
             if not isinstance(e, KBException):
                 # Do not print traceback for our KBException type exceptions, as we want just a short error message in the output.
@@ -524,9 +538,11 @@ class Module(PathResolvingOptions):
                 logfile = self.get_option("#error-log-file")
                 logger_module.error(f"\tError log: r[" + logfile)
 
+            ipc.notify_update_metrics(module_name, time.monotonic() - update_start, None, self.scm.git_commands)
             ipc.send_ipc_message(IPC.MODULE_FAILURE, module_name)
             return_value = False
         else:  # executed if there were no exceptions in try block
+            ipc.notify_update_metrics(module_name, time.monotonic() - update_start, count or 0, self.scm.git_commands)
             message = ""
             if count:
                 if count == 1:
@@ -770,6 +786,48 @@ class Module(PathResolvingOptions):
 
         return path
 
+    def lock_directories(self, phases: list[str], wait: bool = True) -> ExitStack | None:
+        """
+        Take the locks of the directories the given phases work on, so that concurrent kde-builder runs do not work on them at the same time.
+
+        The source directory is locked exclusively for the update (and for the removal after install), and shared for the
+        build. The build directory is locked exclusively. The install directory is locked shared, so that several runs
+        can install into it at the same time. See PathLock.
+
+        Args:
+            phases: Names of the phases, e.g. ["build", "install"].
+            wait: Whether to wait for other runs to release the locks.
+
+        Returns:
+            An ExitStack releasing the locks when closed (it can be used in a ``with`` statement), or None if wait is
+            False and another run holds one of the locks.
+        """
+        remove_sources = "install" in phases and self.get_option("remove-after-install") == "all"
+        exclusive_of: dict[str, bool] = {}
+        descriptions: dict[str, str] = {}
+
+        def need(path: str, exclusive: bool, description: str) -> None:
+            path = os.path.normpath(path)
+            exclusive_of[path] = exclusive_of.get(path, False) or exclusive
+            descriptions.setdefault(path, description)
+
+        # The paths are locked in this order in every run, which keeps runs from waiting for each other in a cycle.
+        if "update" in phases or "build" in phases or remove_sources:
+            need(self.fullpath("source"), "update" in phases or remove_sources, f"the source directory of {self}")
+        if "build" in phases or "install" in phases or "uninstall" in phases:
+            need(self.fullpath("build"), True, f"the build directory of {self}")
+        if "install" in phases or "uninstall" in phases:
+            need(self.installation_path(), False, f"the install directory {self.installation_path()}")
+
+        stack = ExitStack()
+        for path, exclusive in exclusive_of.items():
+            lock = PathLock(path, descriptions[path])
+            if not lock.acquire(exclusive, wait):
+                stack.close()
+                return None
+            stack.callback(lock.release)
+        return stack
+
     def get_post_build_messages(self) -> list[str]:
         """
         Return a list of any "post-build" messages that have been set for the module to show after the build has ended.
@@ -150,6 +150,44 @@ class CoresAndMemorySupport:
 
         return mem_total
 
+    @staticmethod
+    def detect_available_memory() -> int | None:
+        """
+        Return the amount of memory currently available for new processes, in kilobytes.
+
+        This is the "MemAvailable" value of /proc/meminfo, so it is only known on Linux. Returns None if it cannot be detected.
+        """
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if match := re.search(r"^MemAvailable:\s*([0-9]+)", line):
+                        return int(match.group(1))  # Value in KiB
+        except OSError:
+            pass
+        return None
+
+    @staticmethod
+    def read_pressure_average(resource: str) -> float | None:
+        """
+        Return the share of time (in percent) that some tasks were stalled waiting for the given resource, averaged over the last 10 seconds.
+
+        This is the "some avg10" value of /proc/pressure/<resource> (Linux pressure stall information).
+
+        Args:
+            resource: "cpu", "memory" or "io".
+
+        Returns:
+            The average, or None if the pressure stall information is not available.
+        """
+        try:
+            with open(f"/proc/pressure/{resource}", "r") as f:
+                for line in f:
+                    if match := re.search(r"^some avg10=([0-9.]+)", line):
+                        return float(match.group(1))
+        except OSError:
+            pass
+        return None
+
     @staticmethod
     def _suggested_num_cores_for_low_memory() -> int:
         """
@@ -7,10 +7,10 @@ from __future__ import annotations
 import os
 import re
 from typing import TYPE_CHECKING
-import yaml
 
 from kde_builder.kb_exception import ConfigError
 from kde_builder.debug import KBLogger
+from kde_builder.util.warm_cache import WarmCache
 
 if TYPE_CHECKING:
     from kde_builder.build_context import BuildContext
@@ -89,11 +89,10 @@ class RecursiveConfigNodesIterator:
                     try:
                         if not os.path.exists(filename):  # so we throw exception manually
                             raise FileNotFoundError
-                        with open(filename, "r") as f:
-                            new_config_content = yaml.safe_load(f)
-                            # Support the case when yaml file does not contain any config entries, but just comments.
-                            if new_config_content is None:
-                                new_config_content = {}
+                        new_config_content = WarmCache().load_yaml(filename)
+                        # Support the case when yaml file does not contain any config entries, but just comments.
+                        if new_config_content is None:
+                            new_config_content = {}
                     except IOError:
                         raise ConfigError(f"Unable to open file \"{filename}\" which was included from {self.current_filename}")
 
@@ -47,6 +47,10 @@ class StatusView:
         """
         Number of modules built successfully.
         """
+        self.mod_skipped = 0
+        """
+        Number of modules not built because their dependency failed.
+        """
         self.mod_current = -1
         """
         The number of module that is currently built.
@@ -75,13 +79,15 @@ class StatusView:
         """
         current_project_full_progress = self.current_project_full_progress
 
-        mod_total, mod_success, mod_failed = self.mod_total, self.mod_success, self.mod_failed
+        mod_total, mod_success, mod_failed, mod_skipped = self.mod_total, self.mod_success, self.mod_failed, self.mod_skipped
 
         status_line = self.status
 
         if mod_total > 1:
             # Build up message in reverse order
             tail_msg = f"{mod_total} projects"
+            if mod_skipped:
+                tail_msg = Debug().colorize(f"y[b[{mod_skipped}] skipped, ") + tail_msg
             if mod_failed:
                 tail_msg = Debug().colorize(f"r[b[{mod_failed}] failed, ") + tail_msg
             if mod_success:
@@ -6,7 +6,9 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing
 import os.path
+import queue
 import selectors
 import signal
 import sys
@@ -14,15 +16,23 @@ from typing import TYPE_CHECKING
 
 import setproctitle
 
+from kde_builder.build_system.kde_cmake import BuildSystemKDECMake
+from kde_builder.kb_exception import ConfigError
 from kde_builder.kb_exception import KBRuntimeError
 from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
 from kde_builder.ipc.ipc import IPC
 from kde_builder.ipc.null import IPCNull
 from kde_builder.ipc.pipe import IPCPipe
+from kde_builder.updater.git_maintenance import GitMaintenance
+from kde_builder.updater.prefetcher import Prefetcher
+from kde_builder.updater.remote_probe import RemoteProbe
+from kde_builder.util.metrics import Metrics
+from kde_builder.util.trace import Trace
 from kde_builder.util.util import Util
 
 if TYPE_CHECKING:
+    from multiprocessing.synchronize import Event
     from kde_builder.build_context import BuildContext
     from kde_builder.application import Application
     from kde_builder.module.module import Module
@@ -58,6 +68,9 @@ class TaskManager:
         self.ksb_app = app
         self.DO_STOP = 0
 
+        self.configure_ahead: dict | None = None
+        """The module which is configured ahead of its build, with its process and result queue. See _start_configure_ahead()."""
+
     def run_all_tasks(self) -> int:
         """
         Return shell-style result code.
@@ -107,6 +120,7 @@ class TaskManager:
 
             logger_taskmanager.warning(" b[<<<  Build Process  >>>]\n")
             result: int = self._handle_build(ipc, ctx) or result
+            # No git maintenance: it would only delay the exit, see GitMaintenance.
 
         ctx.status_view.progress_bar_disable()
         return result
@@ -154,6 +168,25 @@ class TaskManager:
         # which means we can tell the build thread to start.
         ipc.send_ipc_message(IPC.ALL_UPDATING, "starting-updates")
 
+        if any(module.get_option("probe-remotes") for module in update_list) and ctx.get_option("network-update") and not Debug().pretending():
+            with Trace().span("probe remotes", "phase"):
+                unchanged_modules = RemoteProbe.find_unchanged_modules(update_list)
+            for module in unchanged_modules:
+                module.set_option("#remote-unchanged", True)
+            if unchanged_modules:
+                logger_taskmanager.info(f"\t{len(unchanged_modules)} of {len(update_list)} projects have no remote changes, they will not be fetched")
+
+        if ctx.get_option("prefetch-only"):
+            return self._handle_prefetch(ipc, ctx, update_list)
+
+        if ctx.get_option("network-update") and not Debug().pretending():
+            with Trace().span("verify refs", "phase"):
+                missing_refs = RemoteProbe.verify_refs_of_new_clones(update_list)
+            if missing_refs:
+                logger_taskmanager.error(f"\tr[b[{len(missing_refs)}] projects cannot be cloned, their repositories do not have the wanted branch or tag:")
+                for message in missing_refs.values():
+                    logger_taskmanager.error(message)
+
         had_error = 0
         cur_module = 1
         num_modules = len(update_list)
@@ -171,7 +204,9 @@ class TaskManager:
 
             # Note that this must be in this order to avoid accidentally not
             # running update() from short-circuiting if an error is noted.
-            had_error = not module.update(ipc, ctx) or had_error
+            with Trace().span(f"update {module}", "phase", module=module.name) as span:
+                span["success"] = module.update(ipc, ctx)
+            had_error = not span["success"] or had_error
 
             # Cache module directories, e.g. to be consumed in kde-builder --run
             # This is needed for --no-async mode where the buildSingleModule won't run
@@ -183,6 +218,43 @@ class TaskManager:
         ipc.send_ipc_message(IPC.ALL_DONE, f"had_errors: {had_error}")
         return had_error
 
+    @staticmethod
+    def _handle_prefetch(ipc: IPC, ctx: BuildContext, update_list: list[Module]) -> int:
+        """
+        Fetch the remote changes of the modules without updating them, for --prefetch-only. See Prefetcher.
+
+        Returns:
+             0 on success, non-zero on error.
+        """
+        logger_taskmanager.warning(f"Fetching remote changes to {len(update_list)} projects")
+        with Trace().span("prefetch", "phase"):
+            errors = Prefetcher.prefetch_modules(update_list)
+
+        had_error = 0
+        for module, error in errors.items():
+            if error:
+                logger_taskmanager.error(error)
+                ctx.mark_module_phase_failed("update", module)
+                ipc.send_ipc_message(IPC.MODULE_FAILURE, module.name)
+                had_error = 1
+            else:
+                ipc.send_ipc_message(IPC.MODULE_UPTODATE, module.name)
+
+        ipc.send_ipc_message(IPC.ALL_DONE, f"had_errors: {had_error}")
+        return had_error
+
+    def _handle_git_maintenance(self, ctx: BuildContext, builds_done: Event) -> None:
+        """
+        Run git maintenance in the clones of the modules to update which are due for it, while the projects are built. See GitMaintenance.
+
+        This runs after all updates were reported, so it is not waited for by the builds. No maintenance is started once
+        builds_done is set, so that the run waits at most for the one in progress. Failures are only reported.
+        """
+        try:
+            GitMaintenance.run_due(ctx.modules_in_phase("update"), lambda: bool(self.DO_STOP) or builds_done.is_set())
+        except ConfigError as e:
+            logger_taskmanager.error(e.message)
+
     @staticmethod
     def _build_single_module(ipc: IPC, module: Module) -> str:
         """
@@ -203,7 +275,9 @@ class TaskManager:
         fail_count: int = module.get_persistent_option("failure-count") or 0
         result_status_of_update: str
         message: str
-        result_status_of_update, message = ipc.wait_for_module(module)
+        with Trace().span(f"wait for update of {module}", "ipc", module=module.name) as span:
+            result_status_of_update, message = ipc.wait_for_module(module)
+            span["status"] = result_status_of_update
         ipc.forget_module(module)
 
         module.set_build_system()  # After we downloaded source code, we can determine build system
@@ -233,23 +307,25 @@ class TaskManager:
         # value to write. If the build succeeds we'll reset to 0 then.
         module.set_persistent_option("failure-count", fail_count + 1)
 
-        if not module.build():
-            return "build"  # phase failed at
+        # Other kde-builder runs may work on the same projects, see Module.lock_directories().
+        with module.lock_directories(["build", "install"] if module.phases.has("install") else ["build"]):
+            if not module.build():
+                return "build"  # phase failed at
 
-        if not module.phases.has("install"):
-            logger_taskmanager.info("\tSkipping install due to disabled install phase.")
-            module.set_persistent_option("failure-count", 0)
-            return ""
+            if not module.phases.has("install"):
+                logger_taskmanager.info("\tSkipping install due to disabled install phase.")
+                module.set_persistent_option("failure-count", 0)
+                return ""
 
-        # Clear the progress values after build process, so they do not influence on initial progress of install process.
-        # This is needed because the install() is invoked after build().
-        module.context.status_view.reset_progress()
+            # Clear the progress values after build process, so they do not influence on initial progress of install process.
+            # This is needed because the install() is invoked after build().
+            module.context.status_view.reset_progress()
 
-        if not module.install():
-            return "install"  # phase failed at
+            if not module.install():
+                return "install"  # phase failed at
 
-        module.set_persistent_option("failure-count", 0)
-        return ""
+            module.set_persistent_option("failure-count", 0)
+            return ""
 
     def _handle_build(self, ipc: IPC, ctx: BuildContext) -> int:
         """
@@ -297,27 +373,38 @@ class TaskManager:
         screen_log_timestamped = f"{logdir_timestamped}/screen.log"
         screen_log_latest = f"{logdir_latest}/screen.log"
 
+        trace_timestamped = f"{logdir_timestamped}/trace.json"
+        trace_latest = f"{logdir_latest}/trace.json"
+
         successfully_built_log_timestamped = f"{logdir_timestamped}/successfully-built.log"
         successfully_built_log_latest = f"{logdir_latest}/successfully-built.log"
         failed_to_build_log_timestamped = f"{logdir_timestamped}/failed-to-build.log"
         failed_to_build_log_latest = f"{logdir_latest}/failed-to-build.log"
         failed_to_update_log_timestamped = f"{logdir_timestamped}/failed-to-update.log"
         failed_to_update_log_latest = f"{logdir_latest}/failed-to-update.log"
+        skipped_dependents_log_timestamped = f"{logdir_timestamped}/skipped-dependents.log"
+        skipped_dependents_log_latest = f"{logdir_latest}/skipped-dependents.log"
 
         if Debug().pretending():
             status_list_log_timestamped = "/dev/null"
             failed_to_build_log_timestamped = "/dev/null"
             failed_to_update_log_timestamped = "/dev/null"
             successfully_built_log_timestamped = "/dev/null"
+            skipped_dependents_log_timestamped = "/dev/null"
 
         status_list_fh = open(status_list_log_timestamped, "w")
         failed_to_build_fh = open(failed_to_build_log_timestamped, "w")
         failed_to_update_fh = open(failed_to_update_log_timestamped, "w")
         successfully_build_fh = open(successfully_built_log_timestamped, "w")
+        skipped_dependents_fh = open(skipped_dependents_log_timestamped, "w")
 
         build_done: list[str] = []
         result = 0
 
+        # Modules that failed or were skipped because of a failed dependency, used for skip-dependents-on-failure.
+        dependency_graph: dict = self.ksb_app.dependency_resolver.dependency_graph
+        not_built: list[Module] = []
+
         cur_module = 1
         num_modules = len(modules)
 
@@ -337,6 +424,37 @@ class TaskManager:
             status_viewer.reset_progress()  # Resetting previous project's progress
             status_viewer.progress_bar_update()
 
+            failed_dependency = None
+            if module.get_option("skip-dependents-on-failure"):
+                failed_dependency = TaskManager._find_failed_dependency(dependency_graph, module_name, not_built)
+
+            if failed_dependency:
+                # Still wait for the update of the module, so that its update messages are not lost.
+                result_status_of_update, _ = ipc.wait_for_module(module)
+                ipc.forget_module(module)
+
+                if result_status_of_update == "failed":
+                    logger_taskmanager.error(f"\tUnable to update r[{module}].")
+                    ctx.mark_module_phase_failed("update", module)
+                    module.set_persistent_option("failure-count", (module.get_persistent_option("failure-count") or 0) + 1)
+                    print(module.name, file=failed_to_update_fh)
+
+                logger_taskmanager.warning(f"\tSkipping y[{module}] because its dependency r[{failed_dependency}] has failed.")
+                ctx.mark_module_skipped(module, failed_dependency)
+                print(f"{module.name}: Skipped: dependency {failed_dependency} failed.", file=status_list_fh)
+                print(module.name, file=skipped_dependents_fh)
+                Metrics().record_project_result(module.name, "skipped", module.get_log_dir())
+
+                not_built.append(module)
+                ctx.set_persistent_option("global", "resume-list", ", ".join([f"{elem}" for elem in not_built + modules]))
+                status_viewer.mod_skipped += 1
+                cur_module += 1
+                logger_taskmanager.warning("")  # Space between "Building project/name (n/n)" blocks
+                continue
+
+            self._finish_configure_ahead(ctx, module)
+            self._start_configure_ahead(ipc, ctx, modules, dependency_graph, build_done)
+
             failed_phase: str = TaskManager._build_single_module(ipc, module)
 
             if failed_phase:
@@ -347,15 +465,18 @@ class TaskManager:
                     print(module.name, file=failed_to_build_fh)
                 if failed_phase == "update":
                     print(module.name, file=failed_to_update_fh)
+                Metrics().record_project_result(module.name, "failed", module.get_log_dir(), failed_phase)
 
                 if result == 0:
                     # No failures yet, mark this as resume point
                     module_list = ", ".join([f"{elem}" for elem in [module] + modules])
                     ctx.set_persistent_option("global", "resume-list", module_list)
                 result = 1
+                not_built.append(module)
 
                 if module.get_option("stop-on-failure"):
                     logger_taskmanager.warning(f"\n{module} didn't build, stopping here.")
+                    self._finish_configure_ahead(ctx)
                     return 1  # Error
 
                 logfile = module.get_option("#error-log-file")
@@ -376,14 +497,22 @@ class TaskManager:
                 print(f"{module.name}: Succeeded.", file=status_list_fh)
                 print(f"{module.name}", file=successfully_build_fh)
                 build_done.append(module_name)  # Make it show up as a success
+                Metrics().record_project_result(module.name, "success", module.get_log_dir())
                 status_viewer.mod_success += 1
+
+                if not_built and module.get_option("skip-dependents-on-failure"):
+                    # Only projects that were not built are left to resume with, independent projects that succeeded are dropped.
+                    ctx.set_persistent_option("global", "resume-list", ", ".join([f"{elem}" for elem in not_built + modules]))
             cur_module += 1
             logger_taskmanager.warning("")  # Space between "Building project/name (n/n)" blocks
 
+        self._finish_configure_ahead(ctx)
+
         status_list_fh.close()
         failed_to_build_fh.close()
         failed_to_update_fh.close()
         successfully_build_fh.close()
+        skipped_dependents_fh.close()
 
         if not Debug().pretending():
             if os.path.exists(status_list_log_latest):
@@ -394,6 +523,10 @@ class TaskManager:
                 os.remove(screen_log_latest)
             os.symlink(screen_log_timestamped, screen_log_latest)
 
+            if os.path.exists(trace_latest):
+                os.remove(trace_latest)
+            os.symlink(trace_timestamped, trace_latest)
+
             if os.path.exists(failed_to_build_log_latest):
                 os.remove(failed_to_build_log_latest)
             os.symlink(failed_to_build_log_timestamped, failed_to_build_log_latest)
@@ -406,12 +539,143 @@ class TaskManager:
                 os.remove(successfully_built_log_latest)
             os.symlink(successfully_built_log_timestamped, successfully_built_log_latest)
 
+            if os.path.exists(skipped_dependents_log_latest):
+                os.remove(skipped_dependents_log_latest)
+            os.symlink(skipped_dependents_log_timestamped, skipped_dependents_log_latest)
+
         if len(build_done) > 0:
             logger_taskmanager.info("g[<<<  PROJECTS SUCCESSFULLY BUILT  >>>]")
             logger_taskmanager.info("g[" + "]\ng[".join(build_done) + "]")
 
         return result
 
+    @staticmethod
+    def _find_configure_ahead_candidate(ipc: IPC, remaining_modules: list[Module], dependency_graph: dict, build_names: list[str], build_done: list[str]) -> Module | None:
+        """
+        Return the next module in build order which can be configured ahead of its build, or None if there is none.
+
+        A module can be configured ahead if its source update has completed, and all of its dependencies which are
+        built in this run have already been built and installed. Modules which need to be reconfigured from scratch
+        on their own turn are left out.
+
+        Args:
+            ipc: IPC object to check the update status with.
+            remaining_modules: The modules still waiting for their build, in build order.
+            dependency_graph: The dependency graph of the modules.
+            build_names: The names of all modules built in this run.
+            build_done: The names of the modules which were built successfully so far.
+        """
+        for module in remaining_modules:
+            if not module.get_option("configure-ahead") or module.get_option("refresh-build") or module.get_option("reconfigure"):
+                continue
+            if not ipc.is_module_updated(module):
+                continue
+            deps = dependency_graph.get(module.name, {}).get("all_deps", {}).get("items")
+            if deps is None:
+                continue  # Nothing known about the dependencies
+            if any(dep in build_names and dep not in build_done for dep in deps):
+                continue
+            return module
+        return None
+
+    def _start_configure_ahead(self, ipc: IPC, ctx: BuildContext, remaining_modules: list[Module], dependency_graph: dict, build_done: list[str]) -> None:
+        """
+        Start configuring (running cmake for) an upcoming module in a separate process, while the current module is being built.
+
+        The configured build directory is then reused when the module's turn comes, as the cmake options are unchanged. If they
+        changed in between, cmake is run again as usual. See BuildSystemKDECMake._safe_run_cmake().
+        """
+        if self.configure_ahead or Debug().pretending() or not any(module.get_option("configure-ahead") for module in remaining_modules):
+            return
+
+        ipc.receive_pending_messages()
+        build_names = [module.name for module in ctx.modules_in_phase("build")]
+        module = TaskManager._find_configure_ahead_candidate(ipc, remaining_modules, dependency_graph, build_names, build_done)
+        if not module:
+            return
+
+        module.set_build_system()
+        if not isinstance(module.build_system, BuildSystemKDECMake):
+            return
+
+        locks = module.lock_directories(["build"], wait=False)
+        if not locks:
+            return  # Another kde-builder run works on the project, it is configured when its turn comes
+
+        logger_taskmanager.info(f"\tConfiguring b[{module}] ahead of its build")
+        mp_context = multiprocessing.get_context("fork")
+        result_queue = mp_context.Queue()
+        process = mp_context.Process(target=TaskManager._configure_ahead, args=(module, result_queue), name="kde-builder-configure-ahead")
+        process.start()
+        self.configure_ahead = {"module": module, "process": process, "queue": result_queue, "locks": locks}
+
+    @staticmethod
+    def _configure_ahead(module: Module, result_queue: multiprocessing.Queue) -> None:
+        """
+        Set up the build system of the module. Runs in a separate process.
+
+        The persistent options and post-build messages of the module are sent back to the build process, so they are not lost.
+        """
+        setproctitle.setproctitle("kde-builder-configure-ahead")
+        Trace().set_lane("configure-ahead")
+        logging.disable(logging.WARNING)  # Do not mix into the output of the build running at the same time. Errors are still shown.
+        Metrics().samples.clear()  # Only send back the metrics recorded in this process
+
+        module.reset_environment()
+        module.setup_environment()
+        success = module.setup_build_system()
+        result_queue.put({
+            "success": success,
+            "persistent-options": module.context.persistent_options.get(module.name, {}),
+            "post-build-messages": module.post_build_msgs,
+            "metrics": Metrics().project_samples(module.name),
+        })
+
+    def _finish_configure_ahead(self, ctx: BuildContext, module: Module | None = None) -> None:
+        """
+        Wait for the module which is configured ahead, and take over its results.
+
+        Args:
+            ctx: The build context.
+            module: Only wait if this module is the one being configured ahead. If None, always wait.
+        """
+        if not self.configure_ahead or (module and self.configure_ahead["module"] is not module):
+            return
+
+        configured_module = self.configure_ahead["module"]
+        process = self.configure_ahead["process"]
+        result = None
+        while True:
+            try:
+                result = self.configure_ahead["queue"].get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    try:
+                        result = self.configure_ahead["queue"].get_nowait()  # Sent right before exiting
+                    except queue.Empty:
+                        pass  # Died without sending the result
+                    break
+        process.join()
+        self.configure_ahead["locks"].close()
+        self.configure_ahead = None
+
+        if not result:
+            logger_taskmanager.warning(f"\tConfiguring y[{configured_module}] ahead of its build has failed, it will be configured again")
+            return
+
+        for key, value in result["persistent-options"].items():
+            ctx.set_persistent_option(configured_module.name, key, value)
+        for msg in result["post-build-messages"]:
+            if msg not in configured_module.post_build_msgs:
+                configured_module.add_post_build_message(msg)
+        Metrics().merge(result["metrics"])
+
+        if result["success"]:
+            logger_taskmanager.info(f"\tb[{configured_module}] was configured ahead of its build")
+        else:
+            logger_taskmanager.warning(f"\tConfiguring y[{configured_module}] ahead of its build has failed, it will be configured again")
+
     def _handle_async_build(self, monitor_to_build_ipc: IPCPipe, ctx: BuildContext) -> int:
         """
         Special-cases the handling of the update and build phases, by performing them concurrently (where possible), using forked processes.
@@ -447,6 +711,9 @@ class TaskManager:
         for module in ctx.modules:
             module.get_log_dir()
 
+        # Set by the build process when the builds are done, which stops the git maintenance in the updater process.
+        builds_done = multiprocessing.get_context("fork").Event()
+
         result = 0
         monitor_pid = os.fork()
         updater_pid = None
@@ -478,10 +745,14 @@ class TaskManager:
                 signal.signal(signal.SIGHUP, sighup_handler)
 
                 setproctitle.setproctitle("kde-builder-updater")
+                Trace().set_lane("update")
                 updater_to_monitor_ipc.set_sender()
                 Debug().set_ipc(updater_to_monitor_ipc)
 
                 exitcode = self._handle_updates(updater_to_monitor_ipc, ctx)
+                # The build process reads no more messages after the updates are done, so log to the terminal directly.
+                Debug().ipc = None
+                self._handle_git_maintenance(ctx, builds_done)  # The builds do not wait for this, see GitMaintenance
                 # print("Updater process exiting with code", exitcode)
                 sys.exit(exitcode)
             else:
@@ -541,6 +812,7 @@ class TaskManager:
             setproctitle.setproctitle("kde-builder-build")
             monitor_to_build_ipc.set_receiver()
             result: int = self._handle_build(monitor_to_build_ipc, ctx)
+            builds_done.set()
 
             if result and ctx.get_option("stop-on-failure"):
                 # It's possible if build fails on some near-first module, and returned because of stop-on-failure option, the git update process may still be running.
@@ -649,6 +921,25 @@ class TaskManager:
                 return 1
         return 0
 
+    @staticmethod
+    def _find_failed_dependency(dependency_graph: dict, module_name: str, not_built: list[Module]) -> str | None:
+        """
+        Return the name of a direct or transitive dependency of the given module that failed or was skipped in this run.
+
+        Args:
+            dependency_graph: The graph built by :class:`DependencyResolver`.
+            module_name: The name of the module which is about to be built.
+            not_built: Modules that have failed or were skipped so far.
+
+        Returns:
+            The dependency name, or None if all dependencies of the module are fine (or unknown).
+        """
+        all_deps: dict = dependency_graph.get(module_name, {}).get("all_deps", {}).get("items", {})
+        for failed_module in not_built:
+            if failed_module.name in all_deps:
+                return failed_module.name
+        return None
+
     @staticmethod
     def _form_block_substring(module: Module) -> str:
         if module.is_kde_project():
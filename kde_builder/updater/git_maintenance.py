@@ -0,0 +1,177 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+import subprocess
+import time
+from typing import Callable
+from typing import TYPE_CHECKING
+
+from kde_builder.debug import Debug
+from kde_builder.debug import KBLogger
+from kde_builder.kb_exception import ConfigError
+from kde_builder.util.trace import Trace
+
+if TYPE_CHECKING:
+    from kde_builder.module.module import Module
+
+logger_updater = KBLogger.getLogger("updater")
+
+
+class GitMaintenance:
+    """
+    Runs ``git maintenance`` in the clones which were not maintained for the number of days of the git-maintenance-days option.
+
+    The maintenance packs the loose objects and the many small packs left by daily fetches, and writes the commit-graph,
+    which keeps ``git status``, ``git fetch`` and ``git log`` fast in long-lived clones. It is run after the updates, at the
+    lowest CPU and I/O priority, in the updater process while the projects are built. No maintenance is started once the
+    builds are done, so the run only waits for the one in progress, and the remaining due clones are maintained in the
+    next runs. Without async, there is no time when nobody waits for the maintenance, so it is not run.
+
+    The time of every maintenance and its duration are kept in a history file in the ``.git`` directory of the clone, so
+    that it is shared by all configs using that clone. The duration is also recorded in the trace of the run.
+
+    Example:
+    ::
+
+        GitMaintenance.run_due(ctx.modules_in_phase("update"), builds_done.is_set)
+    """
+
+    TASKS = ["commit-graph", "loose-objects", "incremental-repack"]
+    """The maintenance tasks which are always run. The "prefetch" task is added when the remotes may be fetched."""
+
+    HISTORY_FILE = "kde-builder-maintenance"
+    """File in the .git directory of the clone, with a line "<start time> <duration> <exit code>" per maintenance."""
+
+    HISTORY_LENGTH = 10
+    """Number of maintenances kept in the history file."""
+
+    @staticmethod
+    def interval_days(module: Module) -> int:
+        """
+        Return the git-maintenance-days option of the module, 0 if maintenance is disabled.
+        """
+        days = str(module.get_option("git-maintenance-days") or "0")
+        if not days.isdigit():
+            raise ConfigError(f"\tInvalid value for git-maintenance-days option of {module}: {days} (should be a number of days)")
+        return int(days)
+
+    @staticmethod
+    def history(module: Module) -> list[tuple[float, float, int]]:
+        """
+        Return the start times, durations and exit codes of the last maintenances of the clone of the module, oldest first.
+        """
+        try:
+            with open(f"{module.fullpath('source')}/.git/{GitMaintenance.HISTORY_FILE}") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+
+        entries = []
+        for line in lines:
+            try:
+                start, duration, exitcode = line.split()
+                entries.append((float(start), float(duration), int(exitcode)))
+            except ValueError:
+                pass  # Ignore a damaged line instead of running the maintenance every time
+        return entries
+
+    @staticmethod
+    def due_modules(modules: list[Module], now: float | None = None) -> list[Module]:
+        """
+        Return the modules with a clone which was not maintained for more than their git-maintenance-days.
+        """
+        now = time.time() if now is None else now
+        due = []
+        for module in modules:
+            days = GitMaintenance.interval_days(module)
+            if not days or not os.path.isdir(f"{module.fullpath('source')}/.git"):
+                continue
+            history = GitMaintenance.history(module)
+            if not history or now - history[-1][0] >= days * 24 * 60 * 60:
+                due.append(module)
+        return due
+
+    @staticmethod
+    def run_due(modules: list[Module], should_stop: Callable[[], bool] = lambda: False) -> None:
+        """
+        Run the maintenance of the due modules (see due_modules()), one after another, until should_stop() returns true.
+        """
+        due = GitMaintenance.due_modules(modules)
+        if not due or should_stop():
+            return
+        logger_updater.info(f"\tRunning git maintenance in {len(due)} projects")
+        for index, module in enumerate(due):
+            if should_stop():
+                logger_updater.info(f"\tStopped git maintenance, {len(due) - index} projects are left for the next runs")
+                break
+            GitMaintenance.run(module)
+
+    @staticmethod
+    def run(module: Module) -> bool:
+        """
+        Run the maintenance tasks in the clone of the module at the lowest priority, and add it to the history of the clone.
+
+        A failed maintenance is only reported, it does not fail the module. It is recorded in the history too, so that it
+        is not retried before the next interval.
+
+        Returns:
+            True if the maintenance succeeded.
+        """
+        srcdir = module.fullpath("source")
+        args = ["git", "maintenance", "run", "--quiet", *(f"--task={task}" for task in GitMaintenance.tasks(module))]
+
+        if Debug().pretending():
+            logger_updater.info(f"\tWould have run git maintenance in g[{module}]")
+            return True
+
+        log_path = module.get_log_path("git-maintenance.log")
+        command = ["nice", "-n", "19", *(["ionice", "-c", "3"] if shutil.which("ionice") else []), *args]
+        start = time.time()
+        # The source directory is not locked (see Module.lock_directories()): that would hold back the build of the module,
+        # and git maintenance takes its own lock, and is safe to run while other git commands use the repository.
+        with open(log_path, "w") as log, Trace().span(f"git maintenance {module}", "maintenance", module=module.name) as span:
+            log.write(f"# {' '.join(command)}\n")
+            log.flush()
+            env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}  # Nobody is waiting for a prompt in the background
+            exitcode = subprocess.run(command, cwd=srcdir, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT).returncode
+            duration = time.time() - start
+            log.write(f"# exit code was: {exitcode}, time: {duration:.3f} s\n")
+            span["success"] = exitcode == 0
+
+        history = [*GitMaintenance.history(module), (start, duration, exitcode)][-GitMaintenance.HISTORY_LENGTH:]
+        try:
+            with open(f"{srcdir}/.git/{GitMaintenance.HISTORY_FILE}", "w") as f:
+                f.writelines(f"{int(entry_start)} {entry_duration:.3f} {entry_exitcode}\n" for entry_start, entry_duration, entry_exitcode in history)
+        except OSError as e:
+            logger_updater.warning(f"\tUnable to record the git maintenance of y[{module}]: {e}")
+
+        if exitcode != 0:
+            logger_updater.warning(f"\ty[*] git maintenance failed in y[{module}], see {log_path}")
+            return False
+        logger_updater.debug(f"\tRan git maintenance in g[{module}] ({duration:.1f} s)")
+        return True
+
+    @staticmethod
+    def tasks(module: Module) -> list[str]:
+        """
+        Return the maintenance tasks to run in the clone of the module.
+
+        The "incremental-repack" task is skipped in clones without packs. The "prefetch" task fetches all branches of the
+        remotes in the background (into refs/prefetch/, without touching the remote-tracking branches), which makes the
+        next fetch quicker. It is skipped when the network must not be used, and with narrow-fetch, which only wants the
+        one branch.
+        """
+        tasks = list(GitMaintenance.TASKS)
+        if not glob.glob(f"{module.fullpath('source')}/.git/objects/pack/*.pack"):
+            # The multi-pack-index cannot be written if there is no pack yet, and git does not see the pack which the
+            # loose-objects task creates. This happens in local clones, which copy the loose objects.
+            tasks.remove("incremental-repack")
+        if module.get_option("network-update") and not module.get_option("narrow-fetch"):
+            tasks.append("prefetch")
+        return tasks
@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from kde_builder.debug import Debug
+from kde_builder.debug import KBLogger
+from kde_builder.updater.remote_probe import RemoteProbe
+from kde_builder.util.path_lock import PathLock
+
+if TYPE_CHECKING:
+    from kde_builder.module.module import Module
+
+logger_updater = KBLogger.getLogger("updater")
+
+
+class Prefetcher:
+    """
+    Fetches the remote changes of existing clones into their remote-tracking branches and tags, several clones at the same time. Used for ``--prefetch-only``.
+
+    Only the refs of the remote are updated, the working trees, local branches and stashes are not touched, so this can
+    run while the projects are worked on. A later run with ``--no-network-update`` then updates the projects to what
+    was fetched, without waiting for the network.
+
+    The fetches are those of the usual update (see Updater.update_existing_clone()), including the fetch of the mirror
+    of the git-mirror-dir option, if there is one. Projects which are not cloned yet are left for the next usual update.
+
+    Example:
+    ::
+
+        errors = Prefetcher.prefetch_modules(ctx.modules_in_phase("update"))
+    """
+
+    JOBS = 8
+    """Number of clones fetched at the same time."""
+
+    @staticmethod
+    def prefetch_modules(modules: list[Module]) -> dict[Module, str]:
+        """
+        Fetch the remote changes of the modules.
+
+        Returns:
+            Maps the modules to an error message, or to an empty string if their changes were fetched or they were skipped.
+        """
+        log_paths = {module: module.get_log_path("git-prefetch.log") for module in modules}  # Creates the log directories, not in the threads
+        with ThreadPoolExecutor(max_workers=Prefetcher.JOBS) as executor:
+            errors = list(executor.map(lambda module: Prefetcher._prefetch(module, log_paths[module]), modules))
+        return dict(zip(modules, errors))
+
+    @staticmethod
+    def _prefetch(module: Module, log_path: str) -> str:
+        srcdir = module.fullpath("source")
+        if not os.path.exists(f"{srcdir}/.git"):
+            logger_updater.warning(f"\ty[{module}] is not cloned yet, it will be cloned by the next update")
+            return ""
+        if module.get_option("#remote-unchanged"):  # Set by RemoteProbe
+            logger_updater.info(f"\tNo remote changes for g[{module}], not fetching")
+            return ""
+
+        repo = module.get_option("#resolved-repository")
+        remote_name = RemoteProbe.remote_with_url(srcdir, repo)
+        if not remote_name:
+            return f"\t{module} has no remote with the URL {repo}, update it once without --prefetch-only"
+
+        mirror = module.scm.mirror_path()
+        if mirror and os.path.exists(f"{mirror}/HEAD"):
+            mirror_fetch = ["git", "--git-dir", mirror, "fetch", "-f", "--tags", "origin"]
+            fetch = ["git", "fetch", "-f", "--tags", mirror, f"+refs/heads/*:refs/remotes/{remote_name}/*"]
+        else:
+            mirror_fetch = []
+            fetch = ["git", "fetch", "-f", "--tags", remote_name]
+        if os.path.exists(f"{srcdir}/.git/shallow"):  # See Updater.update_existing_clone()
+            fetch.remove("--tags")
+
+        if Debug().pretending():
+            logger_updater.info(f"\tWould have fetched remote changes to g[{module}]")
+            return ""
+
+        with module.lock_directories(["update"]), open(log_path, "w") as log:
+            if mirror_fetch:
+                mirror_lock = PathLock(mirror, f"the git mirror of {module}")
+                mirror_lock.acquire()
+                try:
+                    exitcode = Prefetcher._run(mirror_fetch, srcdir, log)
+                finally:
+                    mirror_lock.release()
+                if exitcode != 0:
+                    return f"\tUnable to fetch the mirror of {module}, see {log_path}"
+            if Prefetcher._run(fetch, srcdir, log) != 0:
+                return f"\tUnable to fetch {module}, see {log_path}"
+
+        logger_updater.info(f"\tFetched remote changes to g[{module}]")
+        return ""
+
+    @staticmethod
+    def _run(args: list[str], srcdir: str, log) -> int:
+        log.write(f"# {' '.join(args)}\n")
+        log.flush()
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}  # Fail instead of asking for credentials from several threads
+        exitcode = subprocess.run(args, cwd=srcdir, env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT).returncode
+        log.write(f"# exit code was: {exitcode}\n")
+        return exitcode
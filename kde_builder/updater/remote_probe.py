@@ -0,0 +1,173 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from kde_builder.debug import KBLogger
+
+if TYPE_CHECKING:
+    from kde_builder.module.module import Module
+
+logger_updater = KBLogger.getLogger("updater")
+
+
+class RemoteProbe:
+    """
+    Finds the existing clones whose remote has nothing new to fetch, before they are updated. See the ``probe-remotes`` option.
+
+    The heads and tags of the remotes are listed with ``git ls-remote`` (several remotes in parallel), and compared with
+    the remote-tracking refs and tags of the clones. A clone is unchanged when its remote has the wanted branch at the
+    commit of the remote-tracking branch, which is also checked out, and has no tags that the clone does not have already
+    (the update fetches the tags too, except in shallow clones and with narrow-fetch). For a wanted tag, the commit of the tag must be checked
+    out already.
+
+    Everything else is left to the usual fetch: clones which want a specific commit or the default branch of the remote,
+    clones whose remote has another URL than the configured repository, and clones whose remote could not be listed.
+
+    Similarly, the remotes of the projects which are not cloned yet are checked for the wanted refs all at once, before
+    the first clone, instead of before each clone (see Updater._verify_ref_present()).
+
+    Example:
+    ::
+
+        unchanged_modules = RemoteProbe.find_unchanged_modules(ctx.modules_in_phase("update"))
+        missing_refs = RemoteProbe.verify_refs_of_new_clones(ctx.modules_in_phase("update"))
+    """
+
+    JOBS = 8
+    """Number of remotes listed at the same time."""
+
+    TIMEOUT_SECONDS = 30
+
+    @staticmethod
+    def find_unchanged_modules(modules: list[Module]) -> list[Module]:
+        """
+        Return the modules with the probe-remotes option which are cloned already, and whose remote has not changed since the last fetch.
+        """
+        candidates: list[tuple[Module, str]] = []
+        for module in modules:
+            if not module.get_option("probe-remotes") or not os.path.exists(f"{module.fullpath('source')}/.git"):
+                continue
+            ref_value, ref_type = module.scm.determine_preferred_checkout_source()
+            if ref_type == "branch":
+                candidates.append((module, f"refs/heads/{ref_value}"))
+            elif ref_value.startswith("refs/tags/"):
+                candidates.append((module, ref_value))
+
+        if not candidates:
+            return []
+
+        with ThreadPoolExecutor(max_workers=RemoteProbe.JOBS) as executor:
+            results = list(executor.map(lambda candidate: RemoteProbe._is_unchanged(*candidate), candidates))
+        return [module for (module, _), unchanged in zip(candidates, results) if unchanged]
+
+    @staticmethod
+    def verify_refs_of_new_clones(modules: list[Module]) -> dict[Module, str]:
+        """
+        Check that the remotes of the modules which are not cloned yet have the refs to clone.
+
+        The results are kept in the modules for Updater._verify_ref_present(): ``#ref-present`` is set if the ref was
+        found, and ``#ref-missing`` to the error message if it is missing. Modules whose remote could not be listed are
+        checked again when they are cloned.
+
+        Returns:
+            Maps the modules whose ref is missing to the error message.
+        """
+        candidates: list[tuple[Module, str, str]] = []
+        for module in modules:
+            repo = module.get_option("#resolved-repository")
+            if not repo or os.path.exists(f"{module.fullpath('source')}/.git"):
+                continue
+            ref_value, ref_type = module.scm.determine_preferred_checkout_source()
+            candidates.append((module, repo, "HEAD" if ref_type == "none" else ref_value))
+
+        if not candidates:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=RemoteProbe.JOBS) as executor:
+            results = list(executor.map(lambda candidate: RemoteProbe._ls_remote_exit_code(*candidate[1:]), candidates))
+
+        missing_refs = {}
+        for (module, repo, ref), result in zip(candidates, results):
+            if result == 0:
+                module.set_option("#ref-present", True)
+            elif result == 2:  # Connection successful, but ref not found
+                missing_refs[module] = f"\t{module.name} repository at {repo} has no ref y[{ref}]"
+                module.set_option("#ref-missing", missing_refs[module])
+        return missing_refs
+
+    @staticmethod
+    def _ls_remote_exit_code(repo: str, ref: str) -> int:
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        try:
+            return subprocess.run(["git", "ls-remote", "--exit-code", repo, ref], env=env, stdin=subprocess.DEVNULL, capture_output=True,
+                                  timeout=RemoteProbe.TIMEOUT_SECONDS).returncode
+        except (subprocess.SubprocessError, OSError):
+            return -1
+
+    @staticmethod
+    def _is_unchanged(module: Module, wanted_ref: str) -> bool:
+        srcdir = module.fullpath("source")
+        try:
+            remote_name = RemoteProbe.remote_with_url(srcdir, module.get_option("#resolved-repository"))
+            if not remote_name:
+                return False
+            head_commit, head_ref = RemoteProbe._git(srcdir, "rev-parse", "HEAD", "--symbolic-full-name", "HEAD").split()
+            local_refs = RemoteProbe._parse_refs(RemoteProbe._git(srcdir, "for-each-ref", "--format=%(objectname) %(refname)", f"refs/remotes/{remote_name}/", "refs/tags/"))
+            remote_refs = RemoteProbe._parse_refs(RemoteProbe._git(srcdir, "ls-remote", "--heads", "--tags", remote_name))
+        except (subprocess.SubprocessError, OSError, ValueError) as e:
+            logger_updater.debug(f"\tUnable to compare the refs of {module} with its remote, fetching it: {e}")
+            return False
+
+        if wanted_ref not in remote_refs:
+            return False  # Let the update report it
+
+        if wanted_ref.startswith("refs/heads/"):
+            tracking_ref = f"refs/remotes/{remote_name}/{wanted_ref.removeprefix('refs/heads/')}"
+            if local_refs.get(tracking_ref) != remote_refs[wanted_ref] or head_commit != remote_refs[wanted_ref] or not head_ref.startswith("refs/heads/"):
+                return False
+        elif head_commit != remote_refs.get(f"{wanted_ref}^{{}}", remote_refs[wanted_ref]):  # The commit of an annotated tag is listed as its peeled ref
+            return False
+
+        if not os.path.exists(f"{srcdir}/.git/shallow") and not module.get_option("narrow-fetch"):  # Otherwise not all tags are fetched, see Updater._fetch()
+            for ref, commit in remote_refs.items():
+                if ref.startswith("refs/tags/") and not ref.endswith("^{}") and local_refs.get(ref) != commit:
+                    return False
+
+        logger_updater.debug(f"\tThe remote of {module} has not changed since the last fetch")
+        return True
+
+    @staticmethod
+    def remote_with_url(srcdir: str, url: str) -> str:
+        """
+        Return the name of the remote of the clone which has the given URL, or an empty string.
+        """
+        try:
+            lines = RemoteProbe._git(srcdir, "config", "--get-regexp", r"^remote\..*\.url$").splitlines()
+        except subprocess.CalledProcessError:  # No remotes
+            return ""
+        for line in lines:
+            key, _, remote_url = line.partition(" ")
+            if remote_url == url:
+                return key.removeprefix("remote.").removesuffix(".url")
+        return ""
+
+    @staticmethod
+    def _parse_refs(output: str) -> dict[str, str]:
+        refs = {}
+        for line in output.splitlines():
+            commit, _, ref = line.partition("\t" if "\t" in line else " ")  # ls-remote separates with a tab, for-each-ref as formatted
+            refs[ref] = commit
+        return refs
+
+    @staticmethod
+    def _git(srcdir: str, *args: str) -> str:
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}  # Fail instead of asking for credentials from several threads
+        return subprocess.run(["git", *args], cwd=srcdir, env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                              check=True, timeout=RemoteProbe.TIMEOUT_SECONDS).stdout
@@ -11,6 +11,7 @@ import os.path
 import re
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
@@ -20,6 +21,7 @@ from kde_builder.kb_exception import ProgramError
 from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
 from kde_builder.ipc.null import IPCNull
+from kde_builder.util.path_lock import PathLock
 from kde_builder.util.util import Util
 from kde_builder.util.textwrap_mod import dedent
 
@@ -40,9 +42,27 @@ class Updater:
 
     DEFAULT_GIT_REMOTE = "origin"
 
+    PARTIAL_CLONE_FILTERS = {"none": "", "blobless": "blob:none", "treeless": "tree:0"}
+    """Maps the values of the partial-clone option to git clone --filter values."""
+
+    _updated_mirrors: set[str] = set()
+    """Paths of the mirrors (see the git-mirror-dir option) which were already fetched by this run."""
+
+    _fsmonitor_supported: bool | None = None
+    """Whether git has the builtin file system monitor, see _enable_status_caches(). Checked once per run."""
+
     def __init__(self, module: Module):
         self.module = module
         self.ipc: IPC | None = None
+        self.git_commands = 0
+        """Number of git processes run by the last update, reported in the metrics."""
+
+        # State of the repository read during an update, so that it is queried only once.
+        self._config: dict[str, list[str]] | None = None
+        self._branches: dict[str, tuple[str, str]] | None = None
+        self._current_branch = ""
+        self._head = ""
+        self._resolved_refs: dict[str, str] = {}
 
     def update_internal(self, ipc=IPCNull()) -> int:
         """
@@ -56,8 +76,15 @@ class Updater:
              Number of commits pulled.
         """
         self.ipc = ipc
-        num_commits = self.update_checkout()
-        self.ipc = None
+        self.git_commands = 0
+        self._config = None
+        self._resolved_refs.clear()
+        self._forget_head()
+        try:
+            num_commits = self.update_checkout()
+        finally:
+            self.ipc = None
+            logger_updater.debug(f"\t{self.git_commands} git commands were run to update {self.module}")
         return num_commits
 
     @staticmethod
@@ -107,8 +134,10 @@ class Updater:
     def _verify_ref_present(self, repo: str) -> None:
         ref_value, ref_type = self.determine_preferred_checkout_source()
 
-        if Debug().pretending():
+        if Debug().pretending() or self.module.get_option("#ref-present"):  # Verified by RemoteProbe.verify_refs_of_new_clones()
             return
+        if message := self.module.get_option("#ref-missing"):
+            raise KBRuntimeError(message)
 
         if ref_type == "none":
             ref_value = "HEAD"
@@ -151,23 +180,48 @@ class Updater:
         ipc = self.ipc
 
         ref_value, ref_type = self.determine_preferred_checkout_source()
+        checkout_after_clone = ""
+
+        mirror = self.mirror_path()
+        depth = 0
+        if mirror and self._update_mirror(mirror):
+            # The objects are borrowed from the mirror (alternates), so nothing but the refs comes from the remote.
+            args = ["--reference-if-able", mirror] + args
+        else:
+            clone_filter = self._partial_clone_filter()
+            if clone_filter:
+                args = [f"--filter={clone_filter}"] + args
+
+            depth = self._shallow_clone_depth()
+            if depth:
+                # All branches, so that the wanted branch can be changed later, but no tags, as each would bring its own history.
+                args = ["--depth", str(depth), "--no-single-branch", "--no-tags"] + args
 
         if ref_type != "none":
-            ref_value = ref_value.removeprefix("refs/tags/")  # git-clone -b doesn't like refs/tags/
-            args = ["-b", ref_value] + args  # Checkout branch right away
+            if depth and ref_type == "tag":
+                checkout_after_clone = ref_value  # Not a branch, so it is fetched separately, see _fetch_missing_commit()
+            else:
+                args = ["-b", ref_value.removeprefix("refs/tags/")] + args  # Checkout branch right away. git-clone -b doesn't like refs/tags/
 
-        logger_updater.warning(f"\tCloning g[{module}] pointing to {ref_type} b[{ref_value}]")
+        logger_updater.warning(f"\tCloning g[{module}] pointing to {ref_type} b[{ref_value.removeprefix('refs/tags/')}]")
 
         Util.p_chdir(module.get_source_dir())
 
 
-        exitcode = Util.run_logged(module, "git-clone", module.get_source_dir(), ["git", "clone", "--recursive", *args])
+        # The submodules are cloned afterwards, in parallel, see _update_submodules().
+        exitcode = self._run_logged_git("git-clone", module.get_source_dir(), ["git", "clone", *args])
 
         if not exitcode == 0:
             raise KBRuntimeError("\tFailed to make initial clone of project")
 
         Util.p_chdir(srcdir)
 
+        if checkout_after_clone and not self._update_to_detached_head(checkout_after_clone):
+            raise KBRuntimeError(f"\tUnable to check out {checkout_after_clone} in the new clone of {module}")
+
+        if os.path.exists(".gitmodules"):
+            self._update_submodules(self._submodule_paths())
+
         # Setup user configuration
         if name := module.get_option("git-user"):
             username, email = None, None
@@ -184,6 +238,8 @@ class Updater:
             result = Util.safe_system(["git", "config", "--local", "user.email", email]) or result
             if result:
                 logger_updater.warning(f"\tUnable to set user.name and/or user.email git config for y[b[{module}]!")
+
+        self._enable_status_caches()
         return 1  # success
 
     @staticmethod
@@ -230,12 +286,16 @@ class Updater:
         else:
             self._verify_safe_to_clone_into_source_dir(module, srcdir)
 
+            if not module.get_option("network-update"):
+                raise KBRuntimeError(f"\t{module} is not cloned yet, it cannot be cloned with the network-update option disabled")
+
             self._verify_ref_present(git_repo)
 
             self._clone(git_repo)  # can handle pretending mode
             if Debug().pretending():
                 return 1  # pretend like there was 1 commit pulled
             else:
+                self.git_commands += 1
                 ret = int(subprocess.check_output(["git", "--git-dir", f"{srcdir}/.git", "rev-list", "HEAD", "--count"]).decode().strip())
                 return ret
 
@@ -264,26 +324,27 @@ class Updater:
         """
         module = self.module
         repo = module.get_option("#resolved-repository")
-        has_old_remote = self.has_remote(remote)
+        config = self._git_config()
+        has_old_remote = any(key.startswith(f"remote.{remote}.") for key in config)
 
         if has_old_remote:
-            logger_updater.debug(f"\tUpdating the URL for git remote {remote} of {module} ({repo})")
-
-            old_repo = subprocess.run(f"git config --get remote.{remote}.url", shell=True, capture_output=True, text=True).stdout.strip()
-
-            if old_repo and (repo != old_repo):
-                logger_updater.warning(dedent(f"""
-                    \ty[b[*] Repository url for y[{module}] has changed
-                    \ty[b[*]   from y[{old_repo}]
-                    \ty[b[*]   to   b[{repo}]
-                    \ty[b[*] The url for git remote named b[{remote}] has been updated.
-                    """))
-            exitcode = Util.run_logged(module, "git-remote-set-url", None, ["git", "remote", "set-url", remote, repo])
-            if not exitcode == 0:
-                raise KBRuntimeError(f"\tUnable to update the URL for git remote {remote} of {module} ({repo})")
+            old_repo = config.get(f"remote.{remote}.url", [""])[-1]
+
+            if repo != old_repo:
+                logger_updater.debug(f"\tUpdating the URL for git remote {remote} of {module} ({repo})")
+                if old_repo:
+                    logger_updater.warning(dedent(f"""
+                        \ty[b[*] Repository url for y[{module}] has changed
+                        \ty[b[*]   from y[{old_repo}]
+                        \ty[b[*]   to   b[{repo}]
+                        \ty[b[*] The url for git remote named b[{remote}] has been updated.
+                        """))
+                exitcode = self._run_logged_git("git-remote-set-url", None, ["git", "remote", "set-url", remote, repo])
+                if not exitcode == 0:
+                    raise KBRuntimeError(f"\tUnable to update the URL for git remote {remote} of {module} ({repo})")
         else:
             logger_updater.debug(f"\tAdding new git remote {remote} of {module} ({repo})")
-            exitcode = Util.run_logged(module, "git-remote-add", None, ["git", "remote", "add", remote, repo])
+            exitcode = self._run_logged_git("git-remote-add", None, ["git", "remote", "add", remote, repo])
             if not exitcode == 0:
                 raise KBRuntimeError(f"\tUnable to add new git remote {remote} of {module} ({repo})")
 
@@ -299,16 +360,17 @@ class Updater:
         # same as updating the push URL directly because of the remote set-url
         # executed previously by this function for the fetch URL.
 
-        existing_push_url = subprocess.run(f"git config --get remote.{remote}.pushurl", shell=True, capture_output=True, text=True).stdout.strip()
+        existing_push_url = config.get(f"remote.{remote}.pushurl", [""])[-1]
 
         if not existing_push_url:
             return
 
         logger_updater.info(f"\tRemoving preconfigured push URL for git remote {remote} of {module}: {existing_push_url}")
 
-        exitcode = Util.run_logged(module, "git-remote-unset-pushurl", None, ["git", "config", "--unset", f"remote.{remote}.pushurl"])
+        exitcode = self._run_logged_git("git-remote-unset-pushurl", None, ["git", "config", "--unset", f"remote.{remote}.pushurl"])
         if not exitcode == 0:
             raise KBRuntimeError(f"\tUnable to remove preconfigured push URL for {module}!")
+        self._config = None
         return
 
     def _decide_if_refuse_to_stash(self, remote_name: str, remote_branch_name: str) -> bool:
@@ -321,23 +383,16 @@ class Updater:
         First, highly likely there will be merge conflict.
         Second, even if no conflict, user does not want changes to be unexpectedly applied to some another branch. See kdesrc-build issue #67.
 
+        Only called when there are uncommitted changes.
+
         Return:
              True - if decided to refuse to stash, False - if decided to try stashing normally.
         """
         module = self.module
 
-        # Let us check if we have uncommitted changes
-        status_lines = Util.get_program_output("git", "status", "--porcelain", "--untracked-files=no")
-        have_uncommitted_changes = bool(status_lines)
-
-        if not have_uncommitted_changes:
-            return False
-
         # Let us check if we are staying on the same branch, or will switch to another one.
-
-        current_branch = next(iter(Util.get_program_output("git", "branch", "--show-current")), None)
-        if current_branch is not None:
-            current_branch = current_branch.removesuffix("\n")
+        self._local_branches()
+        current_branch = self._current_branch
 
         local_branch_name = self._detect_existing_local_branch_tracking_remote_branch(remote_name, remote_branch_name)
 
@@ -386,20 +441,25 @@ class Updater:
 
         if not local_branch:
             new_local_branch = remote_branch
-            status = subprocess.call(["git", "show-ref", "--quiet", "--verify", "--", f"refs/heads/{new_local_branch}"])
-            if status != 1:
+            if new_local_branch in self._local_branches():
                 raise KBRuntimeError(f"\tLocal branch y[{new_local_branch}] already exists, but it is not tracking remote branch!")
 
-            result = Util.run_logged(module, "git-checkout-branch", chdir_to, ["git", "checkout", "-b", new_local_branch, f"{remote_name}/{remote_branch}"])
+            self._forget_head()
+            result = self._run_logged_git("git-checkout-branch", chdir_to, ["git", "checkout", "-b", new_local_branch, f"{remote_name}/{remote_branch}"])
             croak_reason = f"\tUnable to perform a git checkout of {remote_name}/{remote_branch}"
+        elif self._is_checked_out("branch", remote_name, remote_branch):
+            # The working tree is clean at this point (local changes are stashed), so there is nothing to check out.
+            logger_updater.debug(f"\tBranch {local_branch} of {module} is already at {remote_name}/{remote_branch}")
+            result = 0
         else:
-            result = Util.run_logged(module, "git-checkout-update", chdir_to, ["git", "checkout", local_branch])
+            self._forget_head()
+            result = self._run_logged_git("git-checkout-update", chdir_to, ["git", "checkout", local_branch])
             croak_reason = f"\tUnable to perform a git checkout to existing branch {local_branch}"
 
             if result == 0:
                 # Given that we're starting with a "clean" checkout, it's now simply a fast-forward to the remote HEAD
                 # (previously we pulled, incurring additional network I/O).
-                result = Util.run_logged(module, "git-rebase", None, ["git", "reset", "--hard", f"{remote_name}/{remote_branch}"])
+                result = self._run_logged_git("git-rebase", None, ["git", "reset", "--hard", f"{remote_name}/{remote_branch}"])
                 croak_reason = f"\t{module}: Unable to reset to remote development branch {remote_branch}"
 
         if not result == 0:
@@ -430,9 +490,15 @@ class Updater:
         module = self.module
         srcdir = module.fullpath("source")
 
+        self._fetch_missing_commit(commit)
+        if self._is_checked_out("commit", "", commit):
+            logger_updater.debug(f"\tHead of {module} is already at {commit}")
+            return True
+
         logger_updater.info(f"\tDetaching head to b[{commit}]")
 
-        result = Util.run_logged(module, "git-checkout-commit", srcdir, ["git", "checkout", commit])
+        self._forget_head()
+        result = self._run_logged_git("git-checkout-commit", srcdir, ["git", "checkout", commit])
         result = result == 0  # need to adapt to boolean success flag
         return result
 
@@ -447,12 +513,12 @@ class Updater:
             Exception: On an error.
         """
         module = self.module
-        cur_repo = module.get_option("#resolved-repository")
 
         Util.p_chdir((module.fullpath("source")))
 
         if module.get_option("hold-work-branches"):
-            current_branch = subprocess.run(f"git branch --show-current", shell=True, capture_output=True, text=True).stdout.strip()
+            self._local_branches()
+            current_branch = self._current_branch
             if current_branch.startswith("work/") or current_branch.startswith("mr/"):
                 logger_updater.warning(f"\tHolding g[{module}] at branch b[{current_branch}]")
                 return 0
@@ -461,16 +527,22 @@ class Updater:
         if os.path.exists(".git/MERGE_HEAD") or os.path.exists(".git/rebase-merge") or os.path.exists(".git/rebase-apply"):
             raise KBRuntimeError(f"\tAborting git update for {module}, you appear to have a rebase or merge in progress!")
 
+        self._enable_status_caches()
+
+        if module.get_option("#remote-unchanged"):  # Set by RemoteProbe
+            logger_updater.info(f"\tNo remote changes for g[{module}], not fetching")
+            return 0
+
         remote_name = self._determine_remote_name()
         self._set_remote_url(remote_name)
-        logger_updater.info(f"\tFetching remote changes to g[{module}]")
-        exitcode = Util.run_logged(module, "git-fetch", None, ["git", "fetch", "-f", "--tags", remote_name])
-
-        # Download updated objects. This also updates remote heads so do this
-        # before we start comparing branches and such.
 
-        if not exitcode == 0:
-            raise KBRuntimeError(f"\tUnable to perform git fetch for {remote_name} ({cur_repo})")
+        if not module.get_option("network-update"):
+            # E.g. after --prefetch-only, the remote-tracking branches are as recent as wanted.
+            logger_updater.info(f"\tNot fetching g[{module}], updating it to the remote changes fetched before")
+        else:
+            # Download updated objects. This also updates remote heads so do this
+            # before we start comparing branches and such.
+            self._fetch(remote_name)
 
         # Now we need to figure out if we should update a branch, or simply
         # checkout a specific tag/SHA1/etc.
@@ -480,10 +552,14 @@ class Updater:
             ref_value = self._detect_default_remote_head(remote_name)
 
         logger_updater.warning(f"\tMerging g[{module}] changes from {ref_type} b[{ref_value}]")
-        start_commit = self.commit_id("HEAD")
+        start_commit = self._head_commit()
 
         self.stash_and_update(ref_type, remote_name, ref_value)
-        ret = int(subprocess.check_output(["git", "rev-list", f"{start_commit}..HEAD", "--count"]).decode().strip())
+        if self._head:  # Nothing was checked out
+            return 0
+        if os.path.exists(".gitmodules"):
+            self._update_submodules(self._submodule_paths(start_commit))
+        ret = int(self._git_query("rev-list", f"{start_commit}..HEAD", "--count").strip())
         return ret
 
     @staticmethod
@@ -575,6 +651,67 @@ class Updater:
 
         return ref_string, matched_checkout_source.git_type
 
+    def _submodule_paths(self, since_commit: str = "") -> list[str]:
+        """
+        Return the paths of the submodules of the repository in the current directory.
+
+        Args:
+            since_commit: If given, only the submodules which were added since this commit, or whose recorded commit has
+                changed since.
+        """
+        if since_commit:
+            # Lines like ":160000 160000 <old commit> <new commit> M\t<path>"
+            changes = self._git_query("diff-tree", "-r", "--no-renames", since_commit, "HEAD").splitlines()
+            return [line.partition("\t")[2] for line in changes if line.split()[1] == "160000"]
+        # Lines like "160000 <commit> 0\t<path>"
+        entries = self._git_query("ls-files", "--stage").splitlines()
+        return [line.partition("\t")[2] for line in entries if line.startswith("160000 ")]
+
+    def _update_submodules(self, paths: list[str]) -> None:
+        """
+        Check out the recorded commits of the submodules at the given paths, and of their own submodules, fetching what is missing.
+
+        The submodules are initialized together first, as that changes the configuration of the repository. Then
+        every submodule is updated by its own "git submodule update", as many at the same time as there are cores. The
+        time each submodule took is written to the git-submodule-update log of the module.
+        """
+        if not paths:
+            return
+        module = self.module
+        jobs = min(len(paths), os.cpu_count() or 1)
+        logger_updater.info(f"\tUpdating {len(paths)} submodules of g[{module}], {jobs} at the same time")
+
+        if self._run_logged_git("git-submodule-init", None, ["git", "submodule", "init", "--quiet", "--", *paths]) != 0:
+            raise KBRuntimeError(f"\tUnable to initialize the submodules of {module}")
+        if Debug().pretending():
+            return
+
+        srcdir = os.getcwd()
+
+        def update(path: str) -> tuple[subprocess.CompletedProcess, float]:
+            start = time.monotonic()
+            # Nested submodules are fetched in parallel by git.
+            result = subprocess.run(["git", "-c", f"submodule.fetchJobs={jobs}", "submodule", "update", "--recursive", "--", path],
+                                    cwd=srcdir, stdin=subprocess.DEVNULL, capture_output=True, text=True)
+            return result, time.monotonic() - start
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(update, paths))
+        self.git_commands += len(paths)
+
+        failed_paths = []
+        with open(module.get_log_path("git-submodule-update.log"), "w") as log:
+            for path, (result, duration) in zip(paths, results):
+                log.write(f"# git submodule update --recursive -- {path}\n{result.stdout}{result.stderr}")
+                log.write(f"# exit code was: {result.returncode}, time: {duration:.2f} s\n\n")
+                logger_updater.debug(f"\tSubmodule {path} of {module} updated in {duration:.2f} s")
+                if result.returncode != 0:
+                    failed_paths.append(path)
+
+        if failed_paths:
+            module.set_error_logfile("git-submodule-update.log")
+            raise KBRuntimeError(f"\tUnable to update the submodules {', '.join(failed_paths)} of {module}")
+
     @staticmethod
     def _has_submodules() -> bool:
         """
@@ -600,7 +737,8 @@ class Updater:
         module = self.module
 
         if os.path.exists(".git/refs/stash"):
-            p = subprocess.run("git rev-list --walk-reflogs --count refs/stash", shell=True, text=True, capture_output=True)
+            self.git_commands += 1
+            p = subprocess.run(["git", "rev-list", "--walk-reflogs", "--count", "refs/stash"], text=True, capture_output=True)
             print(p.stderr, end="")  # pl2py: in case git warns about something, for example about deprecated grafts. Unfortunately, subprocess washes the colors, but not a big deal.
             count = p.stdout
             if count:
@@ -640,38 +778,44 @@ class Updater:
         date = time.strftime("%F-%R", time.gmtime())  # ISO Date, hh:mm time
         stash_name = f"kde-builder auto-stash at {date}"
 
-        # first, log the git status prior to kde-builder taking over the reins in the repo
-        result = Util.run_logged(module, "git-status-before-update", None, ["git", "status"])
+        if self._is_checked_out(commit_type, remote_name, commit_id):
+            # Nothing will be checked out, so local changes do not matter, and the working tree does not need to be scanned.
+            have_uncommitted_changes = False
+        else:
+            # Untracked files are not stashed, and are left alone by the update anyway.
+            have_uncommitted_changes = bool(self._git_query("status", "--porcelain", "--untracked-files=no"))
+        old_stash_count = new_stash_count = 0
 
-        old_stash_count = self.count_stash()
+        if Debug().pretending() or not have_uncommitted_changes:  # probably best not to do anything if pretending
+            logger_updater.debug("\tNo local changes to stash")
+        else:
+            # first, log the git status prior to kde-builder taking over the reins in the repo
+            self._run_logged_git("git-status-before-update", None, ["git", "status"])
 
-        logger_updater.debug("\tStashing local changes if any...")
+            old_stash_count = self.count_stash()
+
+            logger_updater.debug("\tStashing local changes...")
 
-        if Debug().pretending():  # probably best not to do anything if pretending
-            result = 0
-        else:
             will_refuse_stashing = self._decide_if_refuse_to_stash(remote_name, commit_id)
             if will_refuse_stashing:
                 raise KBRuntimeError(f"\tRefusing to stash changes from other branch.")
-            result = Util.run_logged(module, "git-stash-push", None, ["git", "stash", "push", "--quiet", "--message", stash_name])
+            result = self._run_logged_git("git-stash-push", None, ["git", "stash", "push", "--quiet", "--message", stash_name])
 
-        if result == 0:
-            pass
-        else:
-            # Might happen if the repo is already in merge conflict state.
-            # We could mark everything as resolved using git add . before stashing,
-            # but that might not always be appreciated by people having to figure
-            # out what the original merge conflicts were afterwards.
-            self._notify_post_build_message(f"b[{module}] may have local changes that we couldn't handle, so the project was left alone.")
+            if result != 0:
+                # Might happen if the repo is already in merge conflict state.
+                # We could mark everything as resolved using git add . before stashing,
+                # but that might not always be appreciated by people having to figure
+                # out what the original merge conflicts were afterwards.
+                self._notify_post_build_message(f"b[{module}] may have local changes that we couldn't handle, so the project was left alone.")
 
-            result = Util.run_logged(module, "git-status-after-error", None, ["git", "status"])
-            raise KBRuntimeError(f"\tUnable to stash local changes (if any) for {module}, aborting update.")
+                self._run_logged_git("git-status-after-error", None, ["git", "status"])
+                raise KBRuntimeError(f"\tUnable to stash local changes (if any) for {module}, aborting update.")
 
-        # next: check if the stash was truly necessary.
-        # compare counts (not just testing if there is *any* stash) because there
-        # might have been a genuine user's stash already prior to kde-builder
-        # taking over the reins in the repo.
-        new_stash_count = self.count_stash()
+            # next: check if the stash was truly necessary.
+            # compare counts (not just testing if there is *any* stash) because there
+            # might have been a genuine user's stash already prior to kde-builder
+            # taking over the reins in the repo.
+            new_stash_count = self.count_stash()
 
         # finally, update to remote head
         if commit_type == "branch":
@@ -682,7 +826,7 @@ class Updater:
         if result:
             result = 1
         else:
-            result = Util.run_logged(module, "git-status-after-error", None, ["git", "status"])
+            result = self._run_logged_git("git-status-after-error", None, ["git", "status"])
             raise KBRuntimeError(f"\tUnable to update source code for {module}")
 
         # we ignore git-status exit code deliberately, it's a debugging aid
@@ -692,7 +836,7 @@ class Updater:
         else:
             # If the stash had been needed then try to re-apply it before we build, so
             # that KDE developers working on changes do not have to manually re-apply.
-            exitcode = Util.run_logged(module, "git-stash-pop", None, ["git", "stash", "pop"])
+            exitcode = self._run_logged_git("git-stash-pop", None, ["git", "stash", "pop"])
             if exitcode != 0:
                 message = f"r[b[*] Unable to restore local changes for b[{module}]! You should manually inspect the new stash: b[{stash_name}]"
                 logger_updater.warning(f"\t{message}")
@@ -704,8 +848,25 @@ class Updater:
 
         return result
 
-    @staticmethod
-    def _detect_existing_local_branch_tracking_remote_branch(remote_name: str, remote_branch: str) -> str:
+    def _is_checked_out(self, commit_type: str, remote_name: str, commit_id: str) -> bool:
+        """
+        Return whether the update to the given branch or commit has nothing to check out, see stash_and_update().
+
+        For a branch, its local branch must be checked out, and at the commit of the remote-tracking branch.
+        """
+        head = self._head_commit()
+        if commit_type == "branch":
+            local_branch = self._detect_existing_local_branch_tracking_remote_branch(remote_name, commit_id)
+            if not local_branch or local_branch != self._current_branch:
+                return False
+            ref = f"refs/remotes/{remote_name}/{commit_id}"
+        else:
+            ref = f"{commit_id}^{{commit}}"
+        if ref not in self._resolved_refs:
+            self._resolved_refs[ref] = self._git_query("rev-parse", "--verify", "--quiet", ref).strip()
+        return head == self._resolved_refs[ref]
+
+    def _detect_existing_local_branch_tracking_remote_branch(self, remote_name: str, remote_branch: str) -> str:
         """
         Determine if there is existing local branch that tracks specified remote branch of the specified remote.
 
@@ -720,12 +881,8 @@ class Updater:
         Returns:
             Empty string if no match is found, or the name of the local remote-tracking branch if one exists.
         """
-        lines = Util.get_program_output("git", "for-each-ref", "refs/heads", "--format", "%(refname) %(upstream)")
-        for line in lines:
-            line = line.removesuffix("\n")
-            refname, upstream = line.split(" ")
+        for local_branch, (_, upstream) in self._local_branches().items():
             if upstream == f"refs/remotes/{remote_name}/{remote_branch}":
-                local_branch = refname.removeprefix("refs/heads/")
                 return local_branch
         return ""
 
@@ -750,12 +907,9 @@ class Updater:
         module = self.module
         resolved_repository = module.get_option("#resolved-repository")
 
-        lines = Util.get_program_output("git", "config", "--get-regexp", r"remote\..*\.url", ".")
-
-        for line in lines:
-            line = line.removesuffix("\n")
-            remote_name, remote_url = line.split(" ")
+        remote_urls = [(key, url) for key, urls in self._git_config().items() if re.fullmatch(r"remote\..*\.url", key) for url in urls]
 
+        for remote_name, remote_url in remote_urls:
             remote_name = remote_name.removeprefix("remote.").removesuffix(".url")  # remove the cruft
 
             if remote_url == resolved_repository:
@@ -771,20 +925,269 @@ class Updater:
                 continue
         return Updater.DEFAULT_GIT_REMOTE
 
+    def _fetch(self, remote_name: str) -> None:
+        """
+        Fetch the remote changes into the remote-tracking branches and tags, from the mirror of the module if there is one.
+
+        With the narrow-fetch option, only the wanted branch, tag or commit is fetched, see _narrow_refspecs(). If that
+        fails (e.g. the remote does not allow fetching a commit by its id), everything is fetched instead.
+        """
+        module = self.module
+        refspecs = self._narrow_refspecs(remote_name) if module.get_option("narrow-fetch") else None
+        if refspecs == []:
+            logger_updater.info(f"\tg[{module}] has the wanted commit already, not fetching")
+            return
+
+        mirror = self.mirror_path()
+        if mirror and self._update_mirror(mirror):
+            logger_updater.info(f"\tFetching remote changes to g[{module}] from its mirror")
+            # The branches of the mirror are those of the remote, so they become the remote-tracking branches.
+            source, all_refs = mirror, [f"+refs/heads/*:refs/remotes/{remote_name}/*"]
+        else:
+            logger_updater.info(f"\tFetching remote changes to g[{module}]")
+            source, all_refs = remote_name, []
+
+        # The submodules whose recorded commit changes are fetched by _update_submodules(), in parallel.
+        recurse_submodules = ["--recurse-submodules=no"] if os.path.exists(".gitmodules") else []
+
+        # In a shallow clone, --tags would fetch the complete history of every tag. Like in a narrow fetch, the tags
+        # pointing to the fetched commits are still fetched, and a wanted tag is fetched by _fetch_missing_commit().
+        tags = [] if self._is_shallow() else ["--tags"]
+
+        if refspecs:
+            logger_updater.debug(f"\tFetching only {' '.join(refspecs)}")
+            if self._run_logged_git("git-fetch", None, ["git", "fetch", "-f", *recurse_submodules, source, *refspecs]) == 0:
+                return
+            logger_updater.warning(f"\ty[*] Unable to fetch only {' '.join(refspecs)} for {module}, fetching everything")
+
+        exitcode = self._run_logged_git("git-fetch", None, ["git", "fetch", "-f", *tags, *recurse_submodules, source, *all_refs])
+        if not exitcode == 0:
+            raise KBRuntimeError(f"\tUnable to perform git fetch for {remote_name} ({module.get_option('#resolved-repository')})")
+
+    def _narrow_refspecs(self, remote_name: str) -> list[str] | None:
+        """
+        Return the refspecs for fetching only what the module needs, for the narrow-fetch option.
+
+        That is the wanted branch (into its remote-tracking branch), the wanted tag, or the wanted commit if the clone
+        does not have it yet. git also fetches the tags pointing into the fetched history, so the tags of the branch are
+        there as with a full fetch.
+
+        Returns:
+            The refspecs, an empty list if nothing needs to be fetched, or None if everything has to be fetched: for the
+            default branch of the remote, and for a revision which is not a complete commit id.
+        """
+        ref_value, ref_type = self.determine_preferred_checkout_source()
+        if ref_type == "branch":
+            return [f"+refs/heads/{ref_value}:refs/remotes/{remote_name}/{ref_value}"]
+        if ref_value.startswith("refs/tags/"):
+            return [f"+{ref_value}:{ref_value}"]
+        if re.fullmatch(r"[0-9a-f]{40}", ref_value):
+            if self._git_query("rev-parse", "--verify", "--quiet", f"{ref_value}^{{commit}}").strip():
+                return []
+            return [ref_value]
+        return None
+
+    def _partial_clone_filter(self) -> str:
+        """
+        Return the git clone --filter for the partial-clone option of the module, or an empty string for a full clone.
+        """
+        partial_clone = self.module.get_option("partial-clone") or "none"
+        if partial_clone not in Updater.PARTIAL_CLONE_FILTERS:
+            raise ConfigError(f"\tInvalid value for partial-clone option of {self.module}: {partial_clone} (should be one of {', '.join(Updater.PARTIAL_CLONE_FILTERS)})")
+        return Updater.PARTIAL_CLONE_FILTERS[partial_clone]
+
+    def _shallow_clone_depth(self) -> int:
+        """
+        Return the number of commits to clone for the shallow-clone-depth option of the module, 0 for the complete history.
+        """
+        depth = str(self.module.get_option("shallow-clone-depth") or "0")
+        if not depth.isdigit():
+            raise ConfigError(f"\tInvalid value for shallow-clone-depth option of {self.module}: {depth} (should be a number of commits)")
+        return int(depth)
+
     @staticmethod
-    def has_remote(remote: str) -> bool:
+    def _is_shallow() -> bool:
+        """
+        Return whether the repository in the current directory is a shallow clone, i.e. has only part of the history.
+        """
+        return os.path.exists(".git/shallow")
+
+    def _fetch_missing_commit(self, commit: str) -> None:
+        """
+        Fetch the wanted commit or tag if it is older than the history of a shallow clone, e.g. when the tag option was changed.
+
+        Only that commit is fetched, with as much history as the shallow-clone-depth option asks for. If the remote does not
+        allow fetching a commit by its id, the complete history is fetched instead.
+        """
+        if not self._is_shallow() or not self.module.get_option("network-update"):
+            return
+        if self._git_query("rev-parse", "--verify", "--quiet", f"{commit}^{{commit}}").strip():
+            return
+
+        module = self.module
+        remote_name = self._determine_remote_name()
+        depth = self._shallow_clone_depth() or 1
+        refspec = f"+{commit}:{commit}" if commit.startswith("refs/") else commit
+        logger_updater.info(f"\tFetching b[{commit.removeprefix('refs/tags/')}], which is older than the shallow history of g[{module}]")
+
+        exitcode = self._run_logged_git("git-fetch-deepen", None, ["git", "fetch", "--depth", str(depth), remote_name, refspec])
+        if exitcode != 0:
+            logger_updater.warning(f"\ty[*] Unable to fetch {commit} alone, fetching the complete history of {module}")
+            exitcode = self._run_logged_git("git-fetch-unshallow", None, ["git", "fetch", "--unshallow", "--tags", remote_name])
+            if exitcode != 0:
+                raise KBRuntimeError(f"\tUnable to fetch {commit} for {module}")
+        self._resolved_refs.clear()
+
+    def mirror_path(self) -> str:
+        """
+        Return the path of the mirror of the module's repository in the git-mirror-dir, or an empty string if no mirrors are used.
+
+        The path is made from the repository URL without its scheme and user name, so that all configs using the same
+        repository share its mirror, e.g. https://invent.kde.org/multimedia/juk.git is mirrored in
+        <git-mirror-dir>/invent.kde.org/multimedia/juk.git.
+        """
+        mirror_dir = self.module.get_option("git-mirror-dir")
+        if not mirror_dir:
+            return ""
+        mirror_dir = re.sub(r"^~", os.getenv("HOME"), mirror_dir)
+
+        name = re.sub(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", "", self.module.get_option("#resolved-repository"))  # Scheme
+        name = re.sub(r"^[^/@]*@", "", name)  # User name
+        parts = [part for part in name.replace(":", "/").split("/") if part not in ("", ".", "..")]
+        return os.path.join(mirror_dir, *parts).removesuffix(".git") + ".git"
+
+    def _update_mirror(self, mirror: str) -> bool:
+        """
+        Create the mirror of the module's repository, or fetch the remote changes to it, unless this run did already.
+
+        The mirror is a bare repository with the branches and tags of the remote. Clones borrow its objects, so it is
+        configured to never prune objects, and its branches are never deleted.
+
+        Returns:
+            Whether the mirror is up to date. If not, the module is updated from its remote directly.
+        """
+        if mirror in Updater._updated_mirrors:
+            return True
+
+        module = self.module
+        lock = PathLock(mirror, f"the git mirror of {module}")
+        lock.acquire()
+        try:
+            if os.path.exists(f"{mirror}/HEAD"):
+                logger_updater.info(f"\tFetching remote changes to the mirror of g[{module}]")
+                exitcode = self._run_logged_git("git-mirror-fetch", None, ["git", "--git-dir", mirror, "fetch", "-f", "--tags", "origin"])
+            else:
+                logger_updater.info(f"\tCreating the mirror of g[{module}] in y[{mirror}]")
+                if not Debug().pretending():
+                    os.makedirs(os.path.dirname(mirror), exist_ok=True)
+                repo = module.get_option("#resolved-repository")
+                exitcode = self._run_logged_git("git-mirror-clone", None, ["git", "clone", "--bare", "--config", "gc.pruneExpire=never", "--", repo, mirror])
+                if exitcode == 0:
+                    # A bare clone has no refspec, without one later fetches would only update FETCH_HEAD.
+                    exitcode = self._run_logged_git("git-mirror-config", None, ["git", "--git-dir", mirror, "config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"])
+        finally:
+            lock.release()
+
+        if exitcode != 0:
+            logger_updater.warning(f"\ty[*] Unable to update the mirror of {module} in {mirror}, using its remote directly")
+            return False
+        Updater._updated_mirrors.add(mirror)
+        return True
+
+    def _enable_status_caches(self) -> None:
         """
-        Return true if the git module in the current directory has a remote of the name given by the first parameter.
+        Enable the untracked cache and the builtin file system monitor of git in the repository in the current directory, for the git-status-cache option.
+
+        Both keep git status (and the other commands comparing the working tree with the index) from scanning the whole
+        working tree: the untracked cache remembers the untracked files of the directories which did not change, and the
+        file system monitor (a daemon started by git) reports the files changed since the last command. The monitor is
+        only enabled if git has it, which depends on the platform and the version of git.
         """
-        has_remote = False
+        if not self.module.get_option("git-status-cache") or Debug().pretending():
+            return
 
-        existing_remotes = Util.get_program_output("git", "remote")
-        existing_remotes = [el.removesuffix("\n") for el in existing_remotes]
+        if Updater._fsmonitor_supported is None:
+            build_options = subprocess.run(["git", "version", "--build-options"], capture_output=True, text=True).stdout
+            Updater._fsmonitor_supported = "feature: fsmonitor--daemon" in build_options
+        wanted = {"core.untrackedcache": "true"}
+        if Updater._fsmonitor_supported:
+            wanted["core.fsmonitor"] = "true"
 
-        for existing_remote in existing_remotes:
-            if not has_remote:
-                has_remote = existing_remote == remote
-        return has_remote
+        config = self._git_config()
+        for key, value in wanted.items():
+            if config.get(key, [""])[-1] == value:
+                continue
+            logger_updater.debug(f"\tSetting {key} to {value} in {self.module}")
+            if self._run_logged_git("git-config-status-cache", None, ["git", "config", "--local", key, value]) != 0:
+                logger_updater.warning(f"\ty[*] Unable to set {key} in y[{self.module}]")
+            self._config = None
+
+    def _git_query(self, *args: str) -> str:
+        """
+        Run a git command which only reads from the repository in the current directory, and return its output.
+        """
+        logger_updater.debug(f"\tQuerying git {' '.join(args)}")
+        self.git_commands += 1
+        return subprocess.run(["git", *args], capture_output=True, text=True).stdout
+
+    def _run_logged_git(self, filename: str, directory: str | None, args: list[str]) -> int:
+        """
+        Run a git command with Util.run_logged(), counting it.
+        """
+        if not Debug().pretending():
+            self.git_commands += 1
+        return Util.run_logged(self.module, filename, directory, args)
+
+    def _git_config(self) -> dict[str, list[str]]:
+        """
+        Return the git configuration of the repository in the current directory, mapping the keys to their values.
+
+        The configuration (remotes, branches, ...) is read with a single git call, and kept until it is changed by the update.
+        """
+        if self._config is None:
+            self._config = {}
+            for entry in self._git_query("config", "--list", "-z").split("\0"):
+                if entry:
+                    key, _, value = entry.partition("\n")
+                    self._config.setdefault(key, []).append(value)
+        return self._config
+
+    def _local_branches(self) -> dict[str, tuple[str, str]]:
+        """
+        Return the local branches of the repository in the current directory, mapping their names to their commits and upstream refs.
+
+        The branches are read with a single git call, which also finds the checked out branch (see _current_branch), and
+        are kept until something is checked out.
+        """
+        if self._branches is None:
+            self._branches = {}
+            self._current_branch = ""
+            for line in self._git_query("for-each-ref", "--format=%(HEAD) %(objectname) %(upstream) %(refname:lstrip=2)", "refs/heads").splitlines():
+                head, commit, upstream, branch = line.split(" ", 3)
+                self._branches[branch] = (commit, upstream)
+                if head == "*":
+                    self._current_branch = branch
+        return self._branches
+
+    def _head_commit(self) -> str:
+        """
+        Return the commit checked out in the repository in the current directory.
+        """
+        if not self._head:
+            branches = self._local_branches()
+            if self._current_branch:
+                self._head = branches[self._current_branch][0]
+            else:  # Detached HEAD
+                self._head = self._git_query("rev-parse", "HEAD").strip()
+        return self._head
+
+    def _forget_head(self) -> None:
+        """
+        Forget the checked out branch and commit, before something else is checked out.
+        """
+        self._branches = None
+        self._current_branch = ""
+        self._head = ""
 
     @staticmethod
     def verify_git_config(context_options: BuildContext) -> bool:
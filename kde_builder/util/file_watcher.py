@@ -0,0 +1,220 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import ctypes
+import errno
+import fnmatch
+import os
+import select
+import struct
+import time
+
+from kde_builder.debug import KBLogger
+
+logger_app = KBLogger.getLogger("application")
+
+
+class FileWatcher:
+    """
+    Watches directory trees for changes of the files in them. Used for ``--watch``.
+
+    Every tree is added with a tag (the project name), and wait_for_changes() returns the tags of the trees in which
+    files have changed. Bursts of changes (e.g. saving several files, or a git checkout) are collected until there were
+    no more changes for a short while, so they lead to a single rebuild.
+
+    On Linux, the changes are reported by inotify, with a watch for every directory of the trees. Where inotify is not
+    available, or when the limit of inotify watches (fs.inotify.max_user_watches) is reached, the modification times of
+    the files are compared periodically instead.
+
+    Example:
+    ::
+
+        watcher = FileWatcher()
+        watcher.add_tree("juk", "/home/user/kde/src/juk", excluded=["/home/user/kde/src/juk/build"])
+        changed_projects = watcher.wait_for_changes()
+    """
+
+    DEBOUNCE_SECONDS = 1.5
+    """Time without changes after which a burst of changes is considered complete."""
+
+    IGNORED_NAMES = [
+        ".git",  # Changed by every git command, the working tree changes are seen anyway
+        ".cache",  # clangd index
+        "compile_commands.json",  # Linked into the source directory by the build
+        ".#*", "*~", "*.swp", "*.swx", "4913",  # Temporary and backup files of editors
+    ]
+
+    # From <sys/inotify.h>
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+    def __init__(self, use_inotify: bool = True):
+        self.trees: dict[str, tuple[str, list[str]]] = {}
+        """Maps tags to the root directory and excluded directories of the tree."""
+        self._libc = None
+        self._inotify_fd = -1
+        self._watches: dict[int, tuple[str, str]] = {}
+        """Maps inotify watch descriptors to the watched directory and the tag of its tree."""
+        self._poll_signatures: dict[str, tuple] = {}
+
+        if use_inotify:
+            try:
+                self._libc = ctypes.CDLL(None, use_errno=True)
+                self._inotify_fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            except (OSError, AttributeError):  # Not Linux
+                self._inotify_fd = -1
+            if self._inotify_fd < 0:
+                logger_app.debug(" -- inotify is not available, looking for changes periodically")
+
+    def uses_inotify(self) -> bool:
+        return self._inotify_fd >= 0
+
+    def add_tree(self, tag: str, root: str, excluded: list[str] | None = None) -> None:
+        """
+        Watch the files under the root directory, except those under the excluded directories (e.g. the build directory).
+        """
+        self.trees[tag] = (root, [os.path.normpath(path) for path in excluded or []])
+        if self.uses_inotify():
+            self._add_watches(tag, root)
+        if not self.uses_inotify():  # Also when the inotify limit was just reached
+            self._poll_signatures[tag] = self._tree_signature(tag)
+
+    def wait_for_changes(self, debounce: float = DEBOUNCE_SECONDS, timeout: float | None = None) -> set[str]:
+        """
+        Wait until files change, and then until there were no more changes for the debounce time.
+
+        Args:
+            debounce: Seconds without changes after which the changes are reported.
+            timeout: Seconds after which an empty set is returned if nothing has changed. Waits forever by default.
+
+        Returns:
+            The tags of the trees in which files have changed.
+        """
+        changed: set[str] = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if changed:
+                wait_time = debounce
+            elif deadline is not None:
+                wait_time = max(0.0, deadline - time.monotonic())
+            else:
+                wait_time = None
+
+            new_changes = self._read_inotify_events(wait_time) if self.uses_inotify() else self._poll(wait_time, debounce)
+            if new_changes:
+                changed.update(new_changes)
+            elif changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        if self.uses_inotify():
+            os.close(self._inotify_fd)
+            self._inotify_fd = -1
+        self._watches.clear()
+
+    def _is_ignored(self, tag: str, path: str) -> bool:
+        if any(fnmatch.fnmatch(os.path.basename(path), pattern) for pattern in FileWatcher.IGNORED_NAMES):
+            return True
+        return os.path.normpath(path) in self.trees[tag][1]
+
+    def _add_watches(self, tag: str, directory: str) -> None:
+        """
+        Add inotify watches for the directory and all directories under it. Switches to polling if the limit of watches is reached.
+        """
+        for dir_path, dir_names, _ in os.walk(directory):
+            dir_names[:] = sorted(name for name in dir_names if not self._is_ignored(tag, os.path.join(dir_path, name)))
+
+            wd = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(dir_path), FileWatcher.WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = (dir_path, tag)
+                continue
+
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                logger_app.warning(" y[*] The limit of inotify watches (fs.inotify.max_user_watches) is reached, looking for changes periodically instead.")
+                self._switch_to_polling()
+                return
+            if error not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):  # Removed meanwhile, or not readable
+                raise OSError(error, os.strerror(error), dir_path)
+
+    def _switch_to_polling(self) -> None:
+        self.close()
+        for tag in self.trees:
+            self._poll_signatures[tag] = self._tree_signature(tag)
+
+    def _read_inotify_events(self, wait_time: float | None) -> set[str]:
+        ready, _, _ = select.select([self._inotify_fd], [], [], wait_time)
+        if not ready:
+            return set()
+
+        changed: set[str] = set()
+        while self.uses_inotify():
+            try:
+                data = os.read(self._inotify_fd, 65536)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_length = struct.unpack_from("iIII", data, offset)
+                name = os.fsdecode(data[offset + 16:offset + 16 + name_length].rstrip(b"\0"))
+                offset += 16 + name_length
+
+                if mask & FileWatcher.IN_Q_OVERFLOW:  # Events were lost, assume everything has changed
+                    changed.update(self.trees)
+                    continue
+                if wd not in self._watches:
+                    continue
+                if mask & FileWatcher.IN_IGNORED:  # The directory was removed
+                    del self._watches[wd]
+                    continue
+
+                dir_path, tag = self._watches[wd]
+                path = os.path.join(dir_path, name)
+                if self._is_ignored(tag, path):
+                    continue
+                changed.add(tag)
+                if mask & FileWatcher.IN_ISDIR and mask & (FileWatcher.IN_CREATE | FileWatcher.IN_MOVED_TO) and self.uses_inotify():
+                    self._add_watches(tag, path)
+        return changed
+
+    def _poll(self, wait_time: float | None, interval: float) -> set[str]:
+        time.sleep(interval if wait_time is None else min(wait_time, interval))
+        changed: set[str] = set()
+        for tag in self.trees:
+            signature = self._tree_signature(tag)
+            if signature != self._poll_signatures.get(tag):
+                self._poll_signatures[tag] = signature
+                changed.add(tag)
+        return changed
+
+    def _tree_signature(self, tag: str) -> tuple:
+        """
+        Return the modification times and sizes of the files in the tree, except the ignored ones.
+        """
+        signature = []
+        for dir_path, dir_names, file_names in os.walk(self.trees[tag][0]):
+            dir_names[:] = sorted(name for name in dir_names if not self._is_ignored(tag, os.path.join(dir_path, name)))
+            signature.append(dir_path)  # Also notice removed and added empty directories
+            for file_name in sorted(file_names):
+                path = os.path.join(dir_path, file_name)
+                if self._is_ignored(tag, path):
+                    continue
+                try:
+                    file_stat = os.stat(path)
+                except OSError:
+                    continue
+                signature.append((path, file_stat.st_mtime_ns, file_stat.st_size))
+        return tuple(signature)
@@ -158,14 +158,20 @@ class UtilLoggedSubprocess:
 
             multiprocessing.set_start_method("fork", True)  # We use it currently, because we need to Pickle a function.
             retval = multiprocessing.Value("i", -1)
-            subproc = multiprocessing.Process(target=target, args=(retval,))
+            usage_values = multiprocessing.Array("d", len(Util.RESOURCE_USAGE_FIELDS))
+            subproc = multiprocessing.Process(target=target, args=(retval, usage_values))
             subproc.start()
             await asyncio.get_running_loop().run_in_executor(None, subproc.join)
 
             exitcode = retval.value
+
+            # The child has stored the resource usage in its own copy of persistent options, store it in ours as well.
+            if exitcode != -1:
+                usage = {field: value if field.endswith("-time") else int(value) for field, value in zip(Util.RESOURCE_USAGE_FIELDS, usage_values[:])}
+                Util.store_resource_usage(module, filename, usage)
             lines_queue.put(None) # end of data token
 
-        def _begin(retval):
+        def _begin(retval, usage_values):
             # in a child process
             if dir_to_run_from:
                 Util.p_chdir(dir_to_run_from)
@@ -185,6 +191,10 @@ class UtilLoggedSubprocess:
                 callback = clbk
 
             result = Util.run_logged(module, filename, None, command, callback)
+
+            usage = (module.get_persistent_option("resource-usage") or {}).get(filename, {})
+            for index, field in enumerate(Util.RESOURCE_USAGE_FIELDS):
+                usage_values[index] = usage.get(field, 0)
             retval.value = result
 
         async def subprocess_progress_handler():
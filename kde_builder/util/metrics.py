@@ -0,0 +1,188 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import os
+import re
+import time
+from typing import Iterator
+
+from kde_builder.debug import Debug
+from kde_builder.debug import KBLogger
+
+logger_app = KBLogger.getLogger("application")
+
+
+class Metrics:
+    """
+    Collects figures of the kde-builder run, and writes them to a file in the OpenMetrics text format. See the ``metrics-file`` option.
+
+    The file is suitable for the textfile collector of the Prometheus node_exporter: it is rewritten atomically after every
+    project, so the progress of a running build can be followed, and once more at the end of the run.
+
+    The values are only collected in the main (build) process. Figures of the update, which may run in the updater process,
+    are sent over IPC (see IPC.notify_update_metrics()).
+
+    Example:
+    ::
+
+        Metrics().add("compile_warnings", 3, project="juk")
+        with Metrics().phase("juk", "build"):
+            ...
+    """
+
+    PREFIX = "kde_builder_"
+
+    FAMILIES = {
+        "phase_duration_seconds": "Time spent in the phase of the project.",
+        "project_success": "Whether the project was updated, built and installed successfully (1) or not (0).",
+        "project_failed_phase": "The phase the project failed in.",
+        "commits_pulled": "Number of commits pulled by the update of the project.",
+        "update_git_commands": "Number of git processes run by the update of the project.",
+        "compile_warnings": "Number of compiler warnings in the build of the project.",
+        "cmake_runs": "Number of times cmake was run for the project, 0 if the build directory was already configured.",
+        "logged_bytes": "Size of the log files of the project.",
+        "projects": "Number of projects which succeeded, failed or were skipped because a dependency failed.",
+        "run_in_progress": "Whether the run is still in progress (1) or finished (0).",
+        "run_start_timestamp_seconds": "Time the run started, in seconds since the epoch.",
+        "run_duration_seconds": "Duration of the run so far.",
+    }
+    """The metric families (all gauges) with their help texts, in the order they are written. Names are without the prefix."""
+
+    __instance = None
+    __initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:  # This ensures that we have only one instance of Metrics class (Singleton)
+            cls.__instance = super().__new__(cls)
+        return cls.__instance
+
+    def __init__(self):
+        if not self.__initialized:
+            self.__initialized = True
+            self.start_time = time.time()
+            self.metrics_file = ""
+            self.samples: dict[str, dict[tuple[tuple[str, str], ...], float]] = {}
+            """Values of every metric, keyed by their (sorted) labels."""
+
+    def set_metrics_file(self, file_name: str) -> None:
+        """
+        Write the metrics to the given file. Empty string disables writing.
+        """
+        self.metrics_file = re.sub(r"^~", os.getenv("HOME"), file_name) if file_name else ""
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """
+        Set the value of the metric with the given labels.
+        """
+        self.samples.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def add(self, name: str, value: float, **labels) -> None:
+        """
+        Add to the value of the metric with the given labels, e.g. when a phase is run again.
+        """
+        key = tuple(sorted(labels.items()))
+        values = self.samples.setdefault(name, {})
+        values[key] = values.get(key, 0) + value
+
+    @contextmanager
+    def phase(self, module_name: str, phase: str) -> Iterator[None]:
+        """
+        Add the duration of the with block to the duration of the phase of the project.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add("phase_duration_seconds", time.monotonic() - start, project=module_name, phase=phase)
+
+    def project_samples(self, module_name: str) -> dict[str, dict[tuple[tuple[str, str], ...], float]]:
+        """
+        Return the values of the metrics of the project, e.g. to be sent from a forked process and passed to merge().
+        """
+        return {name: {labels: value for labels, value in values.items() if ("project", module_name) in labels}
+                for name, values in self.samples.items()}
+
+    def merge(self, samples: dict[str, dict[tuple[tuple[str, str], ...], float]]) -> None:
+        """
+        Add the values collected by another process.
+        """
+        for name, values in samples.items():
+            for labels, value in values.items():
+                self.add(name, value, **dict(labels))
+
+    def record_project_result(self, module_name: str, result: str, log_dir: str, failed_phase: str = "") -> None:
+        """
+        Record the result of the project and the size of its log files, and update the metrics file.
+
+        Args:
+            module_name: The name of the project.
+            result: "success", "failed" or "skipped" (because a dependency failed).
+            log_dir: The log directory of the project in this run.
+            failed_phase: The phase the project failed in.
+        """
+        self.set("project_success", 1 if result == "success" else 0, project=module_name)
+        if failed_phase:
+            self.set("project_failed_phase", 1, project=module_name, phase=failed_phase)
+        self.add("projects", 1, result=result)
+
+        logged_bytes = 0
+        if os.path.isdir(log_dir):
+            for dir_path, _, file_names in os.walk(log_dir):
+                logged_bytes += sum(os.path.getsize(os.path.join(dir_path, file_name)) for file_name in file_names
+                                    if not os.path.islink(os.path.join(dir_path, file_name)))
+        self.set("logged_bytes", logged_bytes, project=module_name)
+        self.write()
+
+    def write(self, finished: bool = False) -> None:
+        """
+        Write all metrics to the metrics file, replacing it atomically.
+        """
+        if not self.metrics_file or Debug().pretending():
+            return
+
+        self.set("run_in_progress", 0 if finished else 1)
+        self.set("run_start_timestamp_seconds", round(self.start_time, 3))
+        self.set("run_duration_seconds", round(time.time() - self.start_time, 3))
+
+        temp_file = f"{self.metrics_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.metrics_file)), exist_ok=True)
+            with open(temp_file, "w") as f:
+                f.write(self.format())
+            os.replace(temp_file, self.metrics_file)  # Never let a collector read a half-written file
+        except OSError as e:
+            logger_app.error(f"Unable to write metrics file {self.metrics_file}: {e}")
+
+    def format(self) -> str:
+        """
+        Return the metrics in the OpenMetrics text format.
+        """
+        lines = []
+        for name, help_text in Metrics.FAMILIES.items():
+            values = self.samples.get(name)
+            if not values:
+                continue
+            full_name = Metrics.PREFIX + name
+            lines.append(f"# TYPE {full_name} gauge")
+            if name.endswith("_seconds"):
+                lines.append(f"# UNIT {full_name} seconds")
+            lines.append(f"# HELP {full_name} {help_text}")
+            for labels, value in values.items():
+                label_str = ",".join(f"{key}=\"{Metrics._escape(str(label))}\"" for key, label in labels)
+                lines.append(f"{full_name}{{{label_str}}} {Metrics._format_value(value)}" if label_str else f"{full_name} {Metrics._format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _escape(label_value: str) -> str:
+        return label_value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if isinstance(value, float) and not value.is_integer():
+            return f"{value:.3f}".rstrip("0")
+        return str(int(value))
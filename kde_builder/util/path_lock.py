@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import fcntl
+import os
+
+from kde_builder.debug import Debug
+from kde_builder.debug import KBLogger
+from kde_builder.util.trace import Trace
+
+logger_app = KBLogger.getLogger("application")
+
+
+class PathLock:
+    """
+    Advisory lock (flock) of a directory that concurrent kde-builder runs may work on, e.g. the source directory of a project.
+
+    Runs that only read from the directory take it shared, runs that change it take it exclusive. When the lock is held
+    by another run, the lock waits for it to be released, printing what it is waiting for.
+
+    The lock is taken on a hidden file next to the directory (``.<name>.kde-builder-lock`` in its parent directory), so it
+    stays the same when the directory itself is removed and created again (e.g. for refresh-build), and it is shared by
+    all runs using the directory, whatever their configuration.
+
+    Example:
+    ::
+
+        lock = PathLock("/home/user/kde/build/juk", "the build directory of juk")
+        lock.acquire()
+        ...
+        lock.release()
+    """
+
+    SUFFIX = ".kde-builder-lock"
+
+    def __init__(self, path: str, description: str):
+        self.path = os.path.normpath(path)
+        self.description = description
+        self.lock_file = PathLock.lock_file_path(self.path)
+        self.fd = -1
+
+    @staticmethod
+    def lock_file_path(path: str) -> str:
+        path = os.path.normpath(path)
+        return f"{os.path.dirname(path)}/.{os.path.basename(path)}{PathLock.SUFFIX}"
+
+    def acquire(self, exclusive: bool = True, wait: bool = True) -> bool:
+        """
+        Take the lock. Nothing is locked in pretend mode.
+
+        Args:
+            exclusive: Whether other runs may hold the lock shared at the same time.
+            wait: Whether to wait for other runs to release the lock.
+
+        Returns:
+            False if wait is False and another run holds the lock, True otherwise. If the lock file cannot be created,
+            a warning is printed and True is returned, not locking is preferred over refusing to run.
+        """
+        if Debug().pretending():
+            return True
+
+        try:
+            os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+            self.fd = os.open(self.lock_file, os.O_RDONLY | os.O_CREAT, 0o666)
+        except OSError as e:
+            logger_app.warning(f" y[*] Unable to lock {self.description}: {e}")
+            return True
+
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(self.fd, operation | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if not wait:
+                self._close()
+                return False
+
+        logger_app.warning(f"\ty[*] Waiting for another kde-builder run to finish with {self.description}")
+        with Trace().span(f"wait for {self.description}", "lock", path=self.path):
+            fcntl.flock(self.fd, operation)
+        return True
+
+    def release(self) -> None:
+        if self.fd < 0:
+            return
+        fcntl.flock(self.fd, fcntl.LOCK_UN)  # Also for copies of the file descriptor inherited by forked processes
+        self._close()
+
+    def _close(self) -> None:
+        os.close(self.fd)
+        self.fd = -1
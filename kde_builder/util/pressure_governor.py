@@ -0,0 +1,233 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import os
+import signal
+import sys
+import threading
+from typing import TYPE_CHECKING
+
+from kde_builder.debug import KBLogger
+from kde_builder.os_support import CoresAndMemorySupport
+
+if TYPE_CHECKING:
+    from kde_builder.module.module import Module
+
+logger_buildsystem = KBLogger.getLogger("build-system")
+
+
+class PressureGovernor:
+    """
+    Lower the parallelism of a running build while the system is under pressure, and restore it afterwards.
+
+    The governor periodically checks the CPU and memory pressure stall information and the load average. When
+    they are above their limits, it pauses (with ``SIGSTOP``) the newest half of the running compile jobs, which
+    are the leaf processes started by the build tool. The build tool cannot start new jobs while the paused ones
+    occupy their slots, so the effective parallelism is halved. When the pressure goes well below the limits,
+    the paused jobs are continued (with ``SIGCONT``) step by step.
+
+    Only the processes started by the build command count as jobs. They are recognized by an environment variable
+    which is set while the governor runs, so that e.g. the git processes of the updater (which is forked from the
+    build process too) are never paused.
+
+    A paused job keeps its memory, so pausing relieves memory pressure more slowly than it relieves CPU pressure: it
+    stops the paused jobs from growing, lets the kernel reclaim their pages first, and keeps new jobs from being
+    started until the running ones have finished and freed theirs.
+
+    Example:
+    ::
+
+        governor = PressureGovernor(module)
+        governor.start()
+        try:
+            ...  # run the build command
+        finally:
+            governor.stop()
+    """
+
+    # Share of time (in percent) that some tasks may be stalled waiting for the resource.
+    PRESSURE_LIMITS = {"cpu": 60.0, "memory": 10.0}
+    # Load average (over 1 minute) per CPU.
+    LOAD_LIMIT = 2.0
+    # The paused jobs are continued when all values are below this part of their limits.
+    RESTORE_FACTOR = 0.5
+    CHECK_INTERVAL_SECONDS = 5
+    # Environment variable marking the processes of the build command, see find_running_jobs().
+    JOB_MARKER = "KDE_BUILDER_THROTTLED_BUILD"
+
+    def __init__(self, module: Module):
+        self.module = module
+        self.allowed_jobs: int | None = None
+        """The number of jobs which may run, or None if the build is not throttled."""
+        self.paused_pids: list[int] = []
+        """Jobs paused by the governor, oldest first."""
+        self.throttle_count = 0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._own_exe = os.path.realpath(sys.executable)
+        self._marker_value = f"{os.getpid()}.{id(self)}"
+
+    def start(self) -> None:
+        """
+        Start checking the pressure in a background thread. Must be called right before the build command is started.
+        """
+        # Inherited by the build command and its jobs, but not by the processes which were forked before.
+        os.environ[self.JOB_MARKER] = self._marker_value
+        if not os.path.isdir("/proc"):
+            logger_buildsystem.debug(f"\tNo /proc filesystem, not throttling the build of {self.module}")
+            return
+        self._thread = threading.Thread(target=self._run, name="pressure-governor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop checking the pressure, and continue all paused jobs.
+        """
+        os.environ.pop(self.JOB_MARKER, None)
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self._continue_jobs(len(self.paused_pids))
+        if self.throttle_count:
+            logger_buildsystem.warning(f"\tThe build of {self.module} was throttled {self.throttle_count} time(s) because of system pressure")
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.CHECK_INTERVAL_SECONDS):
+            self.check(self.read_pressure())
+
+    @staticmethod
+    def read_pressure() -> dict[str, float]:
+        """
+        Return the current pressure values. Values which cannot be detected are left out.
+        """
+        pressure = {}
+        for resource in PressureGovernor.PRESSURE_LIMITS:
+            value = CoresAndMemorySupport.read_pressure_average(resource)
+            if value is not None:
+                pressure[resource] = value
+        try:
+            pressure["load"] = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            pass
+        return pressure
+
+    def _excessive_pressure(self, pressure: dict[str, float], factor: float = 1.0) -> list[str]:
+        """
+        Return the descriptions of all pressure values that are above their limits multiplied by factor.
+        """
+        limits = {**self.PRESSURE_LIMITS, "load": self.LOAD_LIMIT}
+        reasons = []
+        for name, limit in limits.items():
+            if pressure.get(name, 0) > limit * factor:
+                if name == "load":
+                    reasons.append(f"load per CPU {pressure[name]:.1f} > {limit * factor:.1f}")
+                else:
+                    reasons.append(f"{name} pressure {pressure[name]:.0f}% > {limit * factor:.0f}%")
+        return reasons
+
+    def check(self, pressure: dict[str, float]) -> None:
+        """
+        Throttle or restore the build according to the given pressure values. Every decision is logged.
+        """
+        self.paused_pids = [pid for pid in self.paused_pids if os.path.exists(f"/proc/{pid}")]
+        running_jobs = self.find_running_jobs()
+
+        if reasons := self._excessive_pressure(pressure):
+            if len(running_jobs) <= 1:
+                logger_buildsystem.debug(f"\tSystem is under pressure ({', '.join(reasons)}), but the build of {self.module} runs at most one job")
+                return
+            self.allowed_jobs = max(1, len(running_jobs) // 2)
+            self.throttle_count += 1
+            logger_buildsystem.warning(f"\ty[Throttling] the build of {self.module} to {self.allowed_jobs} running jobs: {', '.join(reasons)}")
+            self._pause_jobs(running_jobs[self.allowed_jobs:])
+            return
+
+        if self.allowed_jobs is None:
+            return
+
+        if self._excessive_pressure(pressure, self.RESTORE_FACTOR):
+            # Not under pressure anymore, but not low enough to restore. Keep jobs started since the last check in the limit.
+            self._pause_jobs(running_jobs[self.allowed_jobs:])
+            return
+
+        self.allowed_jobs *= 2
+        self._continue_jobs(max(0, self.allowed_jobs - len(running_jobs)))
+        if self.paused_pids:
+            logger_buildsystem.warning(f"\tSystem pressure went down, allowing {self.allowed_jobs} running jobs for the build of {self.module}")
+        else:
+            self.allowed_jobs = None
+            logger_buildsystem.warning(f"\tSystem pressure went down, restored full parallelism for the build of {self.module}")
+
+    def _pause_jobs(self, pids: list[int]) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGSTOP)
+            except ProcessLookupError:
+                continue
+            self.paused_pids.append(pid)
+            logger_buildsystem.debug(f"\tPaused job {pid} of {self.module}")
+
+    def _continue_jobs(self, count: int) -> None:
+        for pid in self.paused_pids[:count]:
+            try:
+                os.kill(pid, signal.SIGCONT)
+            except ProcessLookupError:
+                pass
+            logger_buildsystem.debug(f"\tContinued job {pid} of {self.module}")
+        self.paused_pids = self.paused_pids[count:]
+
+    def find_running_jobs(self) -> list[int]:
+        """
+        Return the pids of the running (not paused) compile jobs of the build, oldest first.
+
+        The jobs are the leaf processes below kde-builder, which were not started directly by a kde-builder
+        process, and were started by the build command (see JOB_MARKER). This leaves out the build tool (make,
+        ninja) itself, when it has no jobs running, and the processes of the updater.
+        """
+        processes = {}  # pid: (ppid, state, start time)
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()  # The command name in parentheses may contain spaces
+            except (OSError, IndexError):
+                continue
+            processes[int(entry)] = (int(fields[1]), fields[0], int(fields[19]))
+
+        children = {}
+        for pid, (ppid, _, _) in processes.items():
+            children.setdefault(ppid, []).append(pid)
+
+        own_pids = {os.getpid()}
+        descendants = []
+        pending = list(children.get(os.getpid(), []))
+        while pending:
+            pid = pending.pop()
+            descendants.append(pid)
+            pending.extend(children.get(pid, []))
+            if processes[pid][0] not in own_pids:
+                continue
+            try:
+                if os.path.realpath(f"/proc/{pid}/exe") == self._own_exe:
+                    own_pids.add(pid)  # Forked kde-builder process, e.g. of UtilLoggedSubprocess
+            except OSError:
+                pass
+
+        jobs = [pid for pid in descendants
+                if pid not in children and pid not in own_pids and pid not in self.paused_pids
+                and processes[pid][0] not in own_pids and processes[pid][1] not in ("T", "Z") and self._is_build_process(pid)]
+        return sorted(jobs, key=lambda pid: processes[pid][2])
+
+    def _is_build_process(self, pid: int) -> bool:
+        """
+        Return whether the process was started by the build command, i.e. has the marker of this governor in its environment.
+        """
+        try:
+            with open(f"/proc/{pid}/environ", "rb") as f:
+                return f"{self.JOB_MARKER}={self._marker_value}".encode() in f.read().split(b"\0")
+        except OSError:
+            return False
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import atexit
+import cProfile
+import os
+import pstats
+import time
+
+
+class Profiler:
+    """
+    Profiles the Python code of kde-builder itself, separately for each phase of the run. See the ``--profile`` option.
+
+    The phases follow each other, starting a phase ends the previous one. When the process exits (also on early exits,
+    like for ``--query`` or ``--dependency-tree``), the profile of every phase is written to its own pstats file, and a
+    short summary is printed.
+
+    Example:
+    ::
+
+        profiler = Profiler("kde-builder-profile.pstats")
+        profiler.start_phase("config")
+        ...  # read the config
+        profiler.start_phase("modules")
+        ...
+        profiler.stop()
+    """
+
+    DEFAULT_FILE = "kde-builder-profile.pstats"
+    SUMMARY_LENGTH = 15
+    """Number of functions listed in the summary."""
+
+    def __init__(self, output_file: str | None):
+        """
+        Prepare profiling of kde-builder itself.
+
+        Args:
+            output_file: The base name of the pstats files, or None to not profile. Empty string selects the default name.
+        """
+        self.enabled = output_file is not None
+        self.output_file = output_file or Profiler.DEFAULT_FILE
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.durations: dict[str, float] = {}
+        """Wall clock time of each phase, in seconds."""
+        self.current_phase: str | None = None
+        self._phase_start = 0.0
+        self._pid = os.getpid()
+
+        if self.enabled:
+            atexit.register(self._write_results)
+
+    def phase_file(self, phase: str) -> str:
+        """
+        Return the name of the pstats file for the given phase, e.g. "kde-builder-profile-config.pstats".
+        """
+        base, ext = os.path.splitext(self.output_file)
+        return f"{base}-{phase}{ext or '.pstats'}"
+
+    def start_phase(self, phase: str) -> None:
+        """
+        End the current phase, if any, and start profiling the given one.
+        """
+        if not self.enabled:
+            return
+        self.stop()
+        self.current_phase = phase
+        self._phase_start = time.perf_counter()
+        self.profiles.setdefault(phase, cProfile.Profile()).enable()
+
+    def stop(self) -> None:
+        """
+        End the current phase.
+        """
+        if not self.current_phase:
+            return
+        self.profiles[self.current_phase].disable()
+        self.durations[self.current_phase] = self.durations.get(self.current_phase, 0.0) + time.perf_counter() - self._phase_start
+        self.current_phase = None
+
+    def _write_results(self) -> None:
+        if os.getpid() != self._pid:
+            return  # Forked kde-builder process (e.g. the updater) exiting, the profile is written by the main process
+        self.stop()
+        if not self.profiles:
+            return
+
+        print("\nProfile of kde-builder (wall time of each phase, and the functions with the most own time in all phases):")
+        all_stats = None
+        for phase, profile in self.profiles.items():
+            profile.dump_stats(self.phase_file(phase))
+            print(f"  {phase:<14} {self.durations.get(phase, 0.0):8.2f} s   {self.phase_file(phase)}")
+            if all_stats is None:
+                all_stats = pstats.Stats(profile)
+            else:
+                all_stats.add(profile)
+
+        print()
+        for line in Profiler.summary_lines(all_stats, Profiler.SUMMARY_LENGTH):
+            print(f"  {line}")
+
+    @staticmethod
+    def summary_lines(stats: pstats.Stats, count: int) -> list[str]:
+        """
+        Return lines describing the functions with the most own time, in the "own time, cumulative time, calls, function" format.
+        """
+        # The values are (primitive calls, total calls, own time, cumulative time, callers)
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:count]
+        lines = []
+        for (file_name, line_number, function_name), (_, calls, own_time, cumulative_time, _) in entries:
+            location = f"{os.path.basename(file_name)}:{line_number}({function_name})" if line_number else function_name
+            lines.append(f"{own_time:8.3f} s {cumulative_time:8.3f} s {calls:9} calls  {location}")
+        return lines
@@ -0,0 +1,144 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import json
+import os
+import time
+from typing import Iterator
+
+from kde_builder.debug import Debug
+from kde_builder.debug import KBLogger
+
+logger_app = KBLogger.getLogger("application")
+
+
+class Trace:
+    """
+    Records a timeline of the kde-builder run in the trace event format, which can be loaded in Perfetto or chrome://tracing.
+
+    Every span is written to the trace file as a complete ("X") event as soon as it ends. The file uses the JSON array format
+    of the trace events, so spans can be appended from all kde-builder processes (the updater, the forked processes of
+    logged commands) at once, and the file can be loaded even if the run was interrupted before it was closed.
+
+    Spans are grouped in lanes (shown as threads), so that the updates running in the updater process are displayed next to
+    the builds. Spans recorded before the trace file is known (e.g. the metadata update) are kept until it is set.
+
+    Example:
+    ::
+
+        with Trace().span(f"build {module}", "phase", module=module.name):
+            ...
+    """
+
+    LANES = {"build": 1, "update": 2, "configure-ahead": 3}
+    """Lanes of the trace, with their thread ids. The main process records to the "build" lane."""
+
+    __instance = None
+    __initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:  # This ensures that we have only one instance of Trace class (Singleton)
+            cls.__instance = super().__new__(cls)
+        return cls.__instance
+
+    def __init__(self):
+        if not self.__initialized:
+            self.__initialized = True
+            self.start_time = Trace.now()
+            self.pid = os.getpid()
+            """Process id used for all events, so the whole run is shown as one process."""
+            self.lane = "build"
+            self.trace_fd: int | None = None
+            self.pending_events: list[dict] = []
+            """Events recorded before the trace file was set."""
+
+    @staticmethod
+    def now() -> int:
+        """
+        Return the current time in microseconds, the unit of the trace event timestamps.
+        """
+        return time.time_ns() // 1000
+
+    def set_trace_file(self, file_name: str) -> None:
+        """
+        Start writing the trace to the given file. Spans recorded so far are written first.
+        """
+        if Debug().pretending():
+            return
+        if self.trace_fd is not None:
+            os.close(self.trace_fd)
+            self.trace_fd = None
+        try:
+            self.trace_fd = os.open(file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+        except OSError as e:
+            logger_app.error(f"Unable to open trace file {file_name}: {e}")
+            return
+
+        os.write(self.trace_fd, b"[\n")
+        self._write_event({"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "kde-builder"}})
+        for lane, tid in Trace.LANES.items():
+            self._write_event({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": lane}})
+        for event in self.pending_events:
+            self._write_event(event)
+        self.pending_events.clear()
+
+    def set_lane(self, lane: str) -> None:
+        """
+        Record the spans of this process (and the processes forked from it) to the given lane.
+        """
+        self.lane = lane
+
+    def add_span(self, name: str, category: str, start: int, end: int, **args) -> None:
+        """
+        Record a span which started and ended at the given times (see now()).
+
+        Args:
+            name: Name shown for the span.
+            category: Category of the span, e.g. "phase" or "command".
+            start: Start time in microseconds.
+            end: End time in microseconds.
+            args: Additional values shown for the span, e.g. the module name.
+        """
+        if Debug().pretending():
+            return
+        event = {"name": name, "cat": category, "ph": "X", "ts": start, "dur": end - start, "pid": self.pid, "tid": Trace.LANES[self.lane], "args": args}
+        if self.trace_fd is None:
+            self.pending_events.append(event)
+        else:
+            self._write_event(event)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[dict]:
+        """
+        Record a span for the duration of the with block.
+
+        The yielded dict may be used to add values to the span args while it runs, e.g. its result.
+        """
+        start = Trace.now()
+        try:
+            yield args
+        finally:
+            self.add_span(name, category, start, Trace.now(), **args)
+
+    def _write_event(self, event: dict, last: bool = False) -> None:
+        # Each event is written with a single write() to the file opened in append mode, so events from several processes do not mix.
+        try:
+            os.write(self.trace_fd, (json.dumps(event) + ("\n]\n" if last else ",\n")).encode())
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """
+        Record the span of the whole run and finish the trace file. Called at the end of the run.
+        """
+        if self.trace_fd is None:
+            return
+        event = {"name": "kde-builder", "cat": "run", "ph": "X", "ts": self.start_time, "dur": Trace.now() - self.start_time,
+                 "pid": self.pid, "tid": Trace.LANES["build"], "args": {}}
+        self._write_event(event, last=True)
+        os.close(self.trace_fd)
+        self.trace_fd = None
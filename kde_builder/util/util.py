@@ -28,6 +28,7 @@ from kde_builder.debug import Debug
 from kde_builder.debug import KBLogger
 from kde_builder.kb_exception import ProgramError
 from kde_builder.util.textwrap_mod import dedent
+from kde_builder.util.trace import Trace
 
 if TYPE_CHECKING:
     from kde_builder.module.module import Module
@@ -285,15 +286,21 @@ class Util:
                         callback_func(line)  # Note that line may contain several lines (a string containing "\n")
                         f_logpath.write(line)  # pl2py: actually write to file, which was done by tee in child in perl
 
-            _, return_code = os.waitpid(pid, 0)
+            _, return_code, rusage = os.wait4(pid, 0)
             try:
                 os.close(pipe_read)
             except OSError as e:
                 raise ProgramError(f"syscall failed waiting on run_logged() to finish: {e}")
 
-            # Append the line with exit code to the log file that child process created
+            usage = Util.resource_usage_from_rusage(rusage)
+
+            # Append the lines with exit code and resource usage to the log file that child process created
             with open(logpath, "a") as f:
                 f.write(f"\n# exit code was: {return_code}\n")
+                f.write(f"# resource usage: user time {usage['user-time']} s, system time {usage['system-time']} s, max RSS {usage['max-rss']} KiB,"
+                        f" block input {usage['block-input']}, block output {usage['block-output']}\n")
+
+            Util.store_resource_usage(module, os.path.basename(logpath).removesuffix(".log"), usage)
 
             # kernel stuff went OK but the child gave a failing exit code
             if return_code != 0:
@@ -368,6 +375,37 @@ class Util:
                 # Don't use return, this is the child still!
                 sys.exit(1)
 
+    RESOURCE_USAGE_FIELDS = ["user-time", "system-time", "max-rss", "block-input", "block-output"]
+    """Keys of the dict returned by resource_usage_from_rusage()."""
+
+    @staticmethod
+    def resource_usage_from_rusage(rusage) -> dict:
+        """
+        Convert the resource usage returned by os.wait4() to the dict stored in the "resource-usage" persistent option.
+
+        The times are in seconds, the max RSS is in kilobytes (of the largest process in the waited process tree),
+        and the block I/O are the numbers of filesystem input and output operations.
+        """
+        return {
+            "user-time": round(rusage.ru_utime, 2),
+            "system-time": round(rusage.ru_stime, 2),
+            "max-rss": rusage.ru_maxrss,
+            "block-input": rusage.ru_inblock,
+            "block-output": rusage.ru_oublock,
+        }
+
+    @staticmethod
+    def store_resource_usage(module: Module, log_name: str, usage: dict) -> None:
+        """
+        Remember the resource usage of a logged command in the "resource-usage" persistent option of the module.
+
+        The option holds a dict, keyed by the log file base name (e.g. "cmake", "build" or "install"), so every
+        phase of the module keeps the figures of its last run.
+        """
+        all_usage = module.get_persistent_option("resource-usage") or {}
+        all_usage[log_name] = usage
+        module.set_persistent_option("resource-usage", all_usage)
+
     @staticmethod
     def good_exitcode(exitcode: int) -> bool:
         """
@@ -418,7 +456,9 @@ class Util:
             logger_logged_cmd.debug("\tGoing to the specified working directory before running _run_logged_internal().")
             Util.p_chdir(directory)
 
-        exitcode = Util._run_logged_internal(module, logpath, args, callback_func)
+        with Trace().span(filename.removesuffix(".log"), "command", module=module.name, command=" ".join(args)) as span:
+            exitcode = Util._run_logged_internal(module, logpath, args, callback_func)
+            span["exit-code"] = exitcode
 
         if directory:
             logger_logged_cmd.debug("\tReturning to the original working directory after running _run_logged_internal().")
@@ -0,0 +1,139 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from __future__ import annotations
+
+import copy
+import os
+import pickle
+from typing import Any
+from typing import Callable
+
+import yaml
+
+
+class WarmCache:
+    """
+    Keeps data that is expensive to build (e.g. the KDE projects read from thousands of metadata.yaml files) between runs served by the daemon. See the Daemon class.
+
+    Every entry is stored with a signature of the files it was built from (see files_signature() and tree_signature()),
+    and is rebuilt when the signature no longer matches, i.e. when the files have changed.
+
+    Every run served by the daemon is a forked copy of the daemon process, so it sees the entries the daemon had when
+    the run started. The entries built or extended by the run are sent back to the daemon when it ends (see
+    take_updates() and merge()), so the following runs can use them.
+
+    When not running in the daemon, the cache is disabled, and get() just builds the value.
+
+    Example:
+    ::
+
+        repositories = WarmCache().get(f"kde-projects {path}", lambda: WarmCache.tree_signature(path), lambda: read_projects(path))
+    """
+
+    __instance = None
+    __initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if cls.__instance is None:  # This ensures that we have only one instance of WarmCache class (Singleton)
+            cls.__instance = super().__new__(cls)
+        return cls.__instance
+
+    def __init__(self):
+        if not self.__initialized:
+            self.__initialized = True
+            self.enabled = False
+            self.entries: dict[str, tuple[Any, Any]] = {}
+            """Maps keys to their (signature, value)."""
+            self.updated: set[str] = set()
+            """Keys of the entries built or extended in this process."""
+
+    def get(self, key: str, signature_func: Callable[[], Any], loader: Callable[[], Any]) -> Any:
+        """
+        Return the value stored for the key, or build it with the loader if there is none, or it is outdated.
+
+        Args:
+            key: Identifies the value, e.g. the kind of data and the path it is read from.
+            signature_func: Returns the current signature of the files the value is built from. Not called if the cache is disabled.
+            loader: Builds the value. Exceptions are passed through, and nothing is stored then.
+        """
+        if not self.enabled:
+            return loader()
+
+        signature = signature_func()
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        value = loader()
+        self.entries[key] = (signature, value)
+        self.updated.add(key)
+        return value
+
+    def load_yaml(self, path: str) -> Any:
+        """
+        Return the content of the YAML file. The caller may modify it, in the daemon it gets a copy of the cached content.
+
+        Raises:
+            OSError: If the file cannot be read.
+            yaml.YAMLError: If the file is not valid YAML.
+        """
+        def load():
+            with open(path, "r") as f:
+                return yaml.safe_load(f)
+
+        content = self.get(f"yaml {path}", lambda: WarmCache.files_signature([path]), load)
+        return copy.deepcopy(content) if self.enabled else content
+
+    def mark_updated(self, key: str) -> None:
+        """
+        Note that the value stored for the key was extended in place, so it has to be sent back to the daemon.
+        """
+        if self.enabled and key in self.entries:
+            self.updated.add(key)
+
+    def take_updates(self) -> bytes:
+        """
+        Return the entries built or extended in this process, serialized to be passed to merge() in the daemon.
+        """
+        updates = {key: self.entries[key] for key in self.updated}
+        self.updated.clear()
+        return pickle.dumps(updates)
+
+    def merge(self, data: bytes) -> None:
+        """
+        Store the entries returned by take_updates() in another process.
+        """
+        self.entries.update(pickle.loads(data))
+
+    @staticmethod
+    def files_signature(paths: list[str]) -> tuple:
+        """
+        Return the modification times and sizes of the files, None for the missing ones.
+        """
+        signature = []
+        for path in paths:
+            try:
+                file_stat = os.stat(path)
+                signature.append((path, file_stat.st_mtime_ns, file_stat.st_size))
+            except OSError:
+                signature.append((path, None))
+        return tuple(signature)
+
+    @staticmethod
+    def tree_signature(directory: str) -> tuple:
+        """
+        Return the modification times and sizes of all files under the directory, following symlinks.
+        """
+        signature = []
+        for dir_path, dir_names, file_names in os.walk(directory, followlinks=True):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                path = os.path.join(dir_path, file_name)
+                try:
+                    file_stat = os.stat(path)
+                except OSError:
+                    continue
+                signature.append((path, file_stat.st_mtime_ns, file_stat.st_size))
+        return tuple(signature)
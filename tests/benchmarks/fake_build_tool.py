@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+A stand-in for cmake and ninja, used by the orchestration benchmark (see run_orchestration_benchmark.py).
+
+The script is linked as "cmake" and "ninja" into a directory which is put first in PATH, and behaves like the tool it was
+called as, as far as kde-builder can tell: "cmake" creates the files of a configured build directory, and "ninja" prints
+ninja-style "[x/y]" progress. Instead of doing real work, they sleep and keep the CPU busy and memory allocated, as told
+by the JSON file in the KDE_BUILDER_FAKE_BUILD_SPEC environment variable. It maps project names to:
+
+- ``configure_seconds``: duration of "cmake";
+- ``steps``: number of build steps printed by "ninja";
+- ``step_seconds``: duration of each step;
+- ``cpu``: number of cores kept busy while building, at most the number of jobs given with -j;
+- ``memory_mb``: memory allocated while building.
+
+The project is determined from the name of the build directory, which is the working directory of both tools. The CPU
+time used by every call is appended to the file in the KDE_BUILDER_FAKE_BUILD_CPU_LOG environment variable, so that it
+can be told apart from the CPU time of kde-builder itself.
+"""
+
+import json
+import math
+import os
+import sys
+import time
+
+DEFAULT_SPEC = {"configure_seconds": 0.5, "steps": 20, "step_seconds": 0.05, "cpu": 1.0, "memory_mb": 50}
+
+
+def project_spec() -> dict:
+    spec = dict(DEFAULT_SPEC)
+    spec_file = os.environ.get("KDE_BUILDER_FAKE_BUILD_SPEC")
+    if spec_file:
+        with open(spec_file, "r") as f:
+            spec.update(json.load(f).get(os.path.basename(os.getcwd()), {}))
+    return spec
+
+
+def busy_wait(duration: float, duty: float) -> None:
+    """
+    Keep one core busy for the given fraction of the duration, and sleep for the rest.
+    """
+    period = 0.01
+    end = time.monotonic() + duration
+    while (now := time.monotonic()) < end:
+        spin_until = now + period * duty
+        while time.monotonic() < spin_until:
+            pass
+        time.sleep(max(0.0, period * (1 - duty)))
+
+
+def start_cpu_workers(cores: float, duration: float) -> list[int]:
+    """
+    Fork processes which keep the given number of cores busy for the duration.
+    """
+    count = math.ceil(cores)
+    pids = []
+    for _ in range(count):
+        pid = os.fork()
+        if pid == 0:
+            busy_wait(duration, cores / count)
+            os._exit(0)
+        pids.append(pid)
+    return pids
+
+
+def parse_jobs(args: list[str]) -> int:
+    for index, arg in enumerate(args):
+        if arg == "-j" and index + 1 < len(args):
+            return int(args[index + 1])
+        if arg.startswith("-j") and arg[2:].isdigit():
+            return int(arg[2:])
+    return os.cpu_count() or 1
+
+
+def fake_cmake(args: list[str], spec: dict) -> int:
+    if "--version" in args:
+        print("cmake version 3.30.0 (fake)")
+        return 0
+    print("-- The CXX compiler identification is GNU 14.2.0 (fake)")
+    time.sleep(spec["configure_seconds"])
+    with open("CMakeCache.txt", "w") as f:
+        f.write(f"CMAKE_COMMAND:INTERNAL={' '.join(args)}\n")
+    for file_name in ["build.ninja", "cmake_install.cmake"]:
+        open(file_name, "w").close()
+    print("-- Configuring done\n-- Generating done")
+    print(f"-- Build files have been written to: {os.getcwd()}")
+    return 0
+
+
+def fake_ninja(args: list[str], spec: dict) -> int:
+    if "--version" in args:
+        print("1.12.1")
+        return 0
+    if "install" in args:
+        print(f"-- Install configuration: \"RelWithDebInfo\"\n-- Installing: {os.path.basename(os.getcwd())}")
+        return 0
+    if "test" in args:
+        print("100% tests passed, 0 tests failed out of 1")
+        return 0
+
+    steps = spec["steps"]
+    duration = steps * spec["step_seconds"]
+    memory = bytearray(spec["memory_mb"] * 1024 * 1024)
+    memory[::4096] = b"\x01" * len(memory[::4096])  # Touch every page, so it is really allocated
+    workers = start_cpu_workers(min(spec["cpu"], parse_jobs(args)), duration) if spec["cpu"] > 0 else []
+
+    for step in range(1, steps + 1):
+        time.sleep(spec["step_seconds"])
+        print(f"[{step}/{steps}] Building CXX object src/CMakeFiles/fake.dir/file{step}.cpp.o", flush=True)
+
+    for pid in workers:
+        os.waitpid(pid, 0)
+    del memory
+    return 0
+
+
+def main() -> int:
+    tool = os.path.basename(sys.argv[0])
+    spec = project_spec()
+    if tool == "cmake":
+        result = fake_cmake(sys.argv[1:], spec)
+    elif tool == "ninja":
+        result = fake_ninja(sys.argv[1:], spec)
+    else:
+        print(f"fake_build_tool.py must be called as cmake or ninja, not {tool}", file=sys.stderr)
+        return 1
+
+    cpu_log = os.environ.get("KDE_BUILDER_FAKE_BUILD_CPU_LOG")
+    if cpu_log:
+        times = os.times()
+        with open(cpu_log, "a") as f:
+            f.write(f"{times.user + times.system + times.children_user + times.children_system}\n")
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Benchmarks of the planning and orchestration code of kde-builder at scale, on synthetic data.
+
+For each size, a repo-metadata tree, a kde-dependencies file and a large config are generated, and the stages which
+kde-builder runs before building anything are timed: loading the projects metadata, reading the config, expanding the
+selectors, resolving the dependency graph, sorting into build order and rendering the dependency tree. The throughput of
+the IPC pipe between the updater and build processes is measured as well.
+
+Usage:
+::
+
+    python tests/benchmarks/run_benchmarks.py --sizes 1000 5000 10000 --output results.json
+    python tests/benchmarks/run_benchmarks.py --compare results-old.json --output results-new.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from kde_builder.application import Application  # noqa: E402
+from kde_builder.build_context import BuildContext  # noqa: E402
+from kde_builder.debug import Debug  # noqa: E402
+from kde_builder.dependency_resolver import DependencyResolver  # noqa: E402
+from kde_builder.ipc.ipc import IPC  # noqa: E402
+from kde_builder.ipc.pipe import IPCPipe  # noqa: E402
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader  # noqa: E402
+from kde_builder.module_resolver import ModuleResolver  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic_data  # noqa: E402
+
+STAGES = ["kde-projects-reader-load", "config-read", "selector-expansion", "dependency-resolution", "build-order-sort",
+          "dependency-tree", "ipc-throughput"]
+
+IPC_LOG_MESSAGES_PER_PROJECT = 5
+"""Log messages sent for each project in the IPC benchmark, in addition to its update status."""
+
+
+class Timer:
+    """
+    Collects the durations of the stages of one benchmark run.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        yield
+        self.durations[name] = time.perf_counter() - start
+
+
+def run_planning(work_dir: str, config_path: str, group_names: list[str], timer: Timer) -> None:
+    """
+    Run the planning stages of kde-builder once, like generate_module_list() does for the selected groups.
+    """
+    ctx = BuildContext()
+    ctx.rc_file = config_path
+    ctx.set_metadata_module()
+    metadata_dir = ctx.metadata_module.fullpath("source")
+
+    with timer.stage("kde-projects-reader-load"):
+        KDEProjectsReader(metadata_dir)
+    ctx.set_metadata()
+
+    with timer.stage("config-read"):
+        modules_and_sets, overrides = Application._process_configs_content(ctx, config_path, {})
+
+    with timer.stage("selector-expansion"):
+        module_resolver = ModuleResolver(ctx)
+        module_resolver.cmdline_per_project_options = {}
+        module_resolver.set_deferred_options(overrides)
+        module_resolver.set_initial_projects_and_groups(modules_and_sets)
+        module_resolver.handle_initial_projects()
+        module_resolver.ignored_selectors = set()
+        module_resolver.expand_all_groups()
+        module_resolver.set_explicit_cmdline_selectors(group_names)
+        modules = module_resolver.resolve_selectors_into_modules(group_names)
+
+    with timer.stage("dependency-resolution"):
+        dependency_resolver = DependencyResolver(module_resolver)
+        with open(f"{metadata_dir}/kde-dependencies/kde-dependencies-{synthetic_data.BRANCH_GROUP}", "r") as f:
+            dependency_resolver.read_dependency_data(f)
+        dependency_resolver.resolve_to_module_graph(modules)
+
+    with timer.stage("build-order-sort"):
+        dependency_resolver.sort_modules_into_build_order()
+
+    with timer.stage("dependency-tree"), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        dependency_resolver.walk_module_dependency_trees("tree", modules)
+
+
+def run_ipc(project_count: int, timer: Timer) -> None:
+    """
+    Send the messages of an update run of the given number of projects through the IPC pipe, and receive them.
+    """
+    ipc = IPCPipe()
+    pid = os.fork()
+    if pid == 0:
+        ipc.set_sender()
+        ipc.send_ipc_message(IPC.ALL_UPDATING, "starting-updates")
+        for name in synthetic_data.project_names(project_count):
+            ipc.set_logged_module(name)
+            for index in range(IPC_LOG_MESSAGES_PER_PROJECT):
+                ipc.send_log_message("updater", "info", f"\tUpdating {name}, step {index}")
+            ipc.notify_update_success(name, "3 commits pulled")
+        ipc.send_ipc_message(IPC.ALL_DONE, "had_errors: 0")
+        os._exit(0)
+
+    IPC.waited = 0  # Set once per process by wait_for_stream_start()
+    ipc.set_receiver()
+    with timer.stage("ipc-throughput"):
+        ipc.wait_for_end()
+    os.waitpid(pid, 0)
+    ipc.close()
+
+
+def benchmark_size(project_count: int, repeats: int) -> dict:
+    """
+    Generate the data for the given number of projects, and time every stage the given number of times.
+
+    Returns:
+        A dict mapping each stage to its minimum and median duration in seconds.
+    """
+    runs: list[dict[str, float]] = []
+    with tempfile.TemporaryDirectory(prefix="kde-builder-benchmark-") as work_dir:
+        os.environ["XDG_STATE_HOME"] = f"{work_dir}/state"  # The location of repo-metadata, see BuildContext.set_metadata_module()
+        synthetic_data.generate_repo_metadata(f"{work_dir}/state/sysadmin-repo-metadata", project_count)
+        config_path = f"{work_dir}/kde-builder.yaml"
+        group_names = synthetic_data.generate_config(config_path, work_dir, project_count)
+
+        for _ in range(repeats):
+            timer = Timer()
+            run_planning(work_dir, config_path, group_names, timer)
+            run_ipc(project_count, timer)
+            runs.append(timer.durations)
+
+    return {stage: {"min": min(run[stage] for run in runs), "median": statistics.median(run[stage] for run in runs)} for stage in STAGES}
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes: list[int], repeats: int) -> dict:
+    """
+    Run the benchmarks for all sizes, and return the results in the format saved to the JSON file.
+    """
+    was_pretending = Debug().pretending()
+    Debug().set_pretending(True)  # Do not create log files of the synthetic config
+    logging.disable(logging.WARNING)  # Warnings about the synthetic data are expected
+    old_state_home = os.environ.get("XDG_STATE_HOME")
+    try:
+        results = {str(size): benchmark_size(size, repeats) for size in sizes}
+    finally:
+        logging.disable(logging.NOTSET)
+        Debug().set_pretending(was_pretending)
+        if old_state_home is None:
+            os.environ.pop("XDG_STATE_HOME", None)
+        else:
+            os.environ["XDG_STATE_HOME"] = old_state_home
+
+    return {
+        "commit": current_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def print_results(report: dict, baseline: dict | None = None) -> None:
+    print(f"{'projects':>9}  {'stage':<26} {'median, s':>10} {'min, s':>10}" + (f" {'baseline, s':>12} {'change':>8}" if baseline else ""))
+    for size, stages in report["results"].items():
+        for stage, values in stages.items():
+            line = f"{size:>9}  {stage:<26} {values['median']:10.4f} {values['min']:10.4f}"
+            old = (baseline or {}).get("results", {}).get(size, {}).get(stage)
+            if old:
+                line += f" {old['median']:12.4f} {(values['median'] / old['median'] - 1) * 100 if old['median'] else 0.0:+7.1f}%"
+            print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the planning and orchestration of kde-builder on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000], help="Numbers of projects to benchmark with.")
+    parser.add_argument("--repeats", type=int, default=3, help="How many times every stage is run for each size.")
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file with the results of an earlier run, e.g. of another commit, to compare with.")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    report = run_benchmarks(args.sizes, args.repeats)
+    print_results(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
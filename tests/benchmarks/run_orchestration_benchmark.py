@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+End-to-end benchmark of the orchestration of kde-builder: updating and building many projects, without a network and real builds.
+
+Local bare git repositories with generated commit histories are used as the project repositories, and cmake and ninja are
+replaced with fake_build_tool.py, which sleeps, prints ninja-style progress and uses the configured CPU and memory.
+kde-builder is then run as usual (in a pseudo-terminal, so the progress output is processed like for a user), in an
+isolated home directory, with and without ``--async``. Two scenarios are run for each mode: the initial run, which
+clones and builds everything, and an incremental run after new commits were added to some repositories.
+
+For each run, the following is reported:
+
+- ``wall``: wall time of the run;
+- ``kde_builder_cpu``: CPU time used by the kde-builder processes themselves (not by git or the build tools);
+- ``build_tool_cpu``: CPU time used by the fake build tools;
+- ``idle``: time between the start of the first and the end of the last build phase, during which no project was being
+  configured, built or installed, read from the trace of the run;
+- ``largest_gap``: the longest of these idle periods;
+- ``wait_for_updates``: time the build process spent waiting for the updates of projects.
+
+Usage:
+::
+
+    python tests/benchmarks/run_orchestration_benchmark.py --projects 30 --output results.json
+    python tests/benchmarks/run_orchestration_benchmark.py --compare results-old.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import pty
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(BENCHMARKS_DIR))
+
+sys.path.insert(0, BENCHMARKS_DIR)
+import synthetic_data  # noqa: E402
+from run_benchmarks import current_commit  # noqa: E402
+
+MODES = ["async", "no-async"]
+SCENARIOS = ["initial", "incremental"]
+METRICS = ["wall", "kde_builder_cpu", "build_tool_cpu", "idle", "largest_gap", "wait_for_updates"]
+
+BUILD_PHASES = ("configure ", "build ", "install ", "test ")
+"""Prefixes of the names of the trace spans in which a project is being built."""
+
+CPU_SAMPLE_INTERVAL = 0.02
+"""Seconds between the samples of the CPU time of kde-builder processes."""
+
+
+class Workspace:
+    """
+    An isolated environment for running kde-builder on fake projects: home directory, repositories, config and fake tools.
+    """
+
+    def __init__(self, root: str, names: list[str], commits: int, build_spec: dict, num_cores: int, seed: int):
+        self.root = root
+        self.names = names
+        self.rng = random.Random(seed)
+        self.config_path = f"{root}/kde-builder.yaml"
+        self.cpu_log = f"{root}/build-tool-cpu.log"
+
+        self._create_fake_tools(build_spec)
+        self._create_repo_metadata()
+        for name in self.names:
+            subprocess.run(["git", "init", "--quiet", "--bare", "-b", "master", self.repo_path(name)], check=True)
+            self.add_commits(name, commits)
+        self._create_config(num_cores)
+
+    def repo_path(self, name: str) -> str:
+        return f"{self.root}/repos/{name}.git"
+
+    def _create_fake_tools(self, build_spec: dict) -> None:
+        os.makedirs(f"{self.root}/bin")
+        for tool in ["cmake", "ninja"]:
+            os.symlink(f"{BENCHMARKS_DIR}/fake_build_tool.py", f"{self.root}/bin/{tool}")
+        with open(f"{self.root}/build-spec.json", "w") as f:
+            json.dump(build_spec, f, indent=2)
+
+    def _create_repo_metadata(self) -> None:
+        """
+        Create a small repo-metadata, so that kde-builder does not try to download it. The benchmark does not use kde-projects.
+        """
+        metadata_dir = f"{self.root}/state/sysadmin-repo-metadata"
+        synthetic_data.generate_repo_metadata(metadata_dir, 10)
+        with open(f"{REPO_DIR}/kde_builder/resources/supported-formats.yaml", "r") as f:
+            supported_format = yaml.safe_load(f)["kde-builder-format"]
+        os.makedirs(f"{metadata_dir}/config")
+        with open(f"{metadata_dir}/config/repo-metadata-format.yaml", "w") as f:
+            f.write(f"kde-builder-format: {supported_format}\n")
+
+    def _create_config(self, num_cores: int) -> None:
+        lines = ["config-version: 2",
+                 "global:",
+                 f"    source-dir: {self.root}/src",
+                 f"    build-dir: {self.root}/build",
+                 f"    install-dir: {self.root}/usr",
+                 f"    log-dir: {self.root}/log",
+                 f"    persistent-data-file: {self.root}/persistent-data.json",
+                 "    cmake-generator: Ninja",
+                 f"    num-cores: \"{num_cores}\"",
+                 "    check-self-updates: false",
+                 ""]
+        for name in self.names:
+            lines += [f"project {name}:",
+                      f"    repository: file://{self.repo_path(name)}",
+                      "    branch: master",
+                      ""]
+        with open(self.config_path, "w") as f:
+            f.write("\n".join(lines))
+
+    def add_commits(self, name: str, count: int) -> None:
+        """
+        Add the given number of commits to the master branch of the project repository, each changing one source file.
+        """
+        stream = []
+        is_new = not os.listdir(f"{self.repo_path(name)}/refs/heads")
+        for index in range(count):
+            stamp = 1_700_000_000 + self.rng.randrange(100_000_000)
+            message = f"Change {index} of {name}\n"
+            stream += ["commit refs/heads/master",
+                       f"committer Benchmark <benchmark@example.org> {stamp} +0000",
+                       f"data {len(message.encode())}", message]
+            if index == 0 and not is_new:
+                stream.append("from refs/heads/master^0")
+            files = {f"src/file{self.rng.randrange(50)}.cpp": f"int value() {{ return {stamp}; }}\n"}
+            if index == 0 and is_new:
+                files["CMakeLists.txt"] = f"project({name})\n"
+            for path, content in files.items():
+                stream += [f"M 644 inline {path}", f"data {len(content.encode())}", content]
+        subprocess.run(["git", "fast-import", "--quiet"], input="\n".join(stream) + "\n", text=True, check=True,
+                       cwd=self.repo_path(name))
+
+    def environment(self) -> dict[str, str]:
+        env = dict(os.environ)
+        env.update({
+            "HOME": f"{self.root}/home",
+            "XDG_CONFIG_HOME": f"{self.root}/home/.config",
+            "XDG_STATE_HOME": f"{self.root}/state",
+            "PATH": f"{self.root}/bin:{env.get('PATH', '')}",
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GIT_AUTHOR_NAME": "Benchmark", "GIT_AUTHOR_EMAIL": "benchmark@example.org",
+            "GIT_COMMITTER_NAME": "Benchmark", "GIT_COMMITTER_EMAIL": "benchmark@example.org",
+            "KDE_BUILDER_FAKE_BUILD_SPEC": f"{self.root}/build-spec.json",
+            "KDE_BUILDER_FAKE_BUILD_CPU_LOG": self.cpu_log,
+        })
+        os.makedirs(env["HOME"], exist_ok=True)
+        return env
+
+
+def generate_build_spec(names: list[str], steps: int, step_seconds: float, configure_seconds: float, cpu: float,
+                        memory_mb: int, seed: int) -> dict:
+    """
+    Return the fake_build_tool.py spec for the projects. The number of build steps of each project varies around the given one.
+    """
+    rng = random.Random(seed)
+    return {name: {"configure_seconds": configure_seconds, "steps": rng.randint(max(1, steps // 2), steps * 3 // 2),
+                   "step_seconds": step_seconds, "cpu": cpu, "memory_mb": memory_mb} for name in names}
+
+
+def process_cpu_times(pids: set[int]) -> dict[int, float]:
+    """
+    Return the CPU time (user and system) of the given processes which are still running, in seconds.
+    """
+    ticks = os.sysconf("SC_CLK_TCK")
+    times = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        times[pid] = (int(fields[11]) + int(fields[12])) / ticks
+    return times
+
+
+def kde_builder_pids(root_pid: int, cmdline: bytes) -> set[int]:
+    """
+    Return the pids of the kde-builder processes: the given one, and the processes forked from it (updater, monitor, etc.).
+    """
+    pids = set()
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                if f.read() == cmdline:
+                    pids.add(int(entry))
+        except OSError:
+            continue
+    return pids | {root_pid}
+
+
+def run_kde_builder(workspace: Workspace, mode: str, output_file: str) -> dict:
+    """
+    Run kde-builder in a pseudo-terminal, and return its wall time and CPU time.
+    """
+    args = [sys.executable, f"{REPO_DIR}/kde-builder", "--rc-file", workspace.config_path, "--no-metadata", f"--{mode}", "--all-config-projects"]
+    cmdline = b"\0".join(arg.encode() for arg in args) + b"\0"
+
+    controller, terminal = pty.openpty()
+    with open(output_file, "ab") as output:
+        def copy_output():
+            while True:
+                try:
+                    data = os.read(controller, 65536)
+                except OSError:  # The terminal is closed after kde-builder exited
+                    return
+                if not data:
+                    return
+                output.write(data)
+
+        copier = threading.Thread(target=copy_output, daemon=True)
+        copier.start()
+
+        cpu_times: dict[int, float] = {}
+        start = time.perf_counter()
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=terminal, stderr=terminal, env=workspace.environment(),
+                                   cwd=workspace.root)
+        os.close(terminal)
+        while process.poll() is None:
+            cpu_times.update(process_cpu_times(kde_builder_pids(process.pid, cmdline)))
+            time.sleep(CPU_SAMPLE_INTERVAL)
+        wall = time.perf_counter() - start
+        copier.join(timeout=5)
+        os.close(controller)
+
+    if process.returncode != 0:
+        with open(output_file, "r", errors="replace") as f:
+            tail = f.read()[-3000:]
+        raise RuntimeError(f"kde-builder exited with {process.returncode}, output:\n{tail}")
+    return {"wall": wall, "kde_builder_cpu": sum(cpu_times.values())}
+
+
+def idle_periods(trace_file: str) -> dict:
+    """
+    Read the trace of the run, and return the build idle time and the time spent waiting for updates.
+    """
+    with open(trace_file, "r") as f:
+        events = json.load(f)
+    spans = [event for event in events if event.get("ph") == "X"]
+    build_spans = sorted((span["ts"], span["ts"] + span["dur"]) for span in spans if span["name"].startswith(BUILD_PHASES))
+
+    idle = 0.0
+    largest_gap = 0.0
+    if build_spans:
+        busy_until = build_spans[0][1]
+        for start, end in build_spans[1:]:
+            if start > busy_until:
+                gap = (start - busy_until) / 1_000_000
+                idle += gap
+                largest_gap = max(largest_gap, gap)
+            busy_until = max(busy_until, end)
+
+    waited = sum(span["dur"] for span in spans if span.get("cat") == "ipc") / 1_000_000
+    return {"idle": idle, "largest_gap": largest_gap, "wait_for_updates": waited}
+
+
+def build_tool_cpu(workspace: Workspace) -> float:
+    """
+    Return the CPU time used by the fake build tools since the last call.
+    """
+    if not os.path.exists(workspace.cpu_log):
+        return 0.0
+    with open(workspace.cpu_log, "r") as f:
+        total = sum(float(line) for line in f if line.strip())
+    os.unlink(workspace.cpu_log)
+    return total
+
+
+def benchmark_mode(mode: str, args: argparse.Namespace) -> dict:
+    """
+    Run both scenarios in a fresh workspace with the given mode ("async" or "no-async").
+
+    Returns:
+        A dict mapping each scenario to its metrics.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="kde-builder-orchestration-") as root:
+        names = [f"fake-{name}" for name in synthetic_data.project_names(args.projects)]
+        build_spec = generate_build_spec(names, args.steps, args.step_seconds, args.configure_seconds, args.cpu, args.memory,
+                                         args.seed)
+        workspace = Workspace(root, names, args.commits, build_spec, args.num_cores, args.seed)
+
+        for scenario in SCENARIOS:
+            if scenario == "incremental":
+                for name in workspace.rng.sample(workspace.names, max(1, int(len(workspace.names) * args.changed_fraction))):
+                    workspace.add_commits(name, args.new_commits)
+
+            result = run_kde_builder(workspace, mode, f"{root}/output-{scenario}.log")
+            result["build_tool_cpu"] = build_tool_cpu(workspace)
+            result.update(idle_periods(f"{root}/log/latest/trace.json"))
+            results[scenario] = result
+    return results
+
+
+def run_orchestration_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Run the benchmark in all modes the given number of times, and return the results in the format saved to the JSON file.
+    """
+    runs = {mode: [benchmark_mode(mode, args) for _ in range(args.repeats)] for mode in args.modes}
+    results = {mode: {scenario: {metric: statistics.median(run[scenario][metric] for run in mode_runs) for metric in METRICS}
+                      for scenario in SCENARIOS} for mode, mode_runs in runs.items()}
+    return {
+        "commit": current_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeats": args.repeats,
+        "parameters": {name: getattr(args, name) for name in ["projects", "commits", "new_commits", "changed_fraction", "steps",
+                                                              "step_seconds", "configure_seconds", "cpu", "memory", "num_cores"]},
+        "results": results,
+    }
+
+
+def print_results(report: dict, baseline: dict | None = None) -> None:
+    print(f"{'mode':<9} {'scenario':<12} {'metric':<17} {'median, s':>10}" + (f" {'baseline, s':>12} {'change':>8}" if baseline else ""))
+    for mode, scenarios in report["results"].items():
+        for scenario, metrics in scenarios.items():
+            for metric, value in metrics.items():
+                line = f"{mode:<9} {scenario:<12} {metric:<17} {value:10.3f}"
+                old = (baseline or {}).get("results", {}).get(mode, {}).get(scenario, {}).get(metric)
+                if old is not None:
+                    line += f" {old:12.3f} {(value / old - 1) * 100 if old else 0.0:+7.1f}%"
+                print(line)
+
+
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the orchestration of kde-builder with local repositories and fake build tools.")
+    parser.add_argument("--projects", type=int, default=30, help="Number of projects.")
+    parser.add_argument("--commits", type=int, default=20, help="Number of commits in the history of each project.")
+    parser.add_argument("--new-commits", type=int, default=3, help="Commits added to the changed projects before the incremental run.")
+    parser.add_argument("--changed-fraction", type=float, default=0.5, help="Fraction of the projects changed before the incremental run.")
+    parser.add_argument("--steps", type=int, default=20, help="Average number of build steps of a project.")
+    parser.add_argument("--step-seconds", type=float, default=0.05, help="Duration of each build step.")
+    parser.add_argument("--configure-seconds", type=float, default=0.3, help="Duration of configuring a project.")
+    parser.add_argument("--cpu", type=float, default=1.0, help="Number of cores kept busy while building a project.")
+    parser.add_argument("--memory", type=int, default=50, help="Memory used while building a project, in MiB.")
+    parser.add_argument("--num-cores", type=int, default=4, help="Value of the num-cores option.")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="Run kde-builder with these options.")
+    parser.add_argument("--repeats", type=int, default=1, help="How many times every mode is run.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated histories and build durations.")
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file with the results of an earlier run, e.g. of another commit, to compare with.")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_arguments()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    report = run_orchestration_benchmark(args)
+    print_results(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
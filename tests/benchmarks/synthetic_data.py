@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""
+Generators of synthetic repo-metadata trees, kde-dependencies files and configs, for benchmarking kde-builder at scale.
+
+The generated data is deterministic for the given size and seed, so the results of different runs can be compared.
+"""
+
+import os
+import random
+
+GROUPS = ["frameworks", "plasma", "utilities", "multimedia", "graphics", "education", "games", "network", "office", "pim",
+          "sdk", "system", "accessibility", "libraries", "plasma-mobile", "documentation", "sysadmin", "websites",
+          "packaging", "unmaintained"]
+"""Top-level repository groups, as in invent.kde.org. The projects are spread over them, giving "group/project" repopaths."""
+
+BRANCH_GROUP = "latest-kf6"
+"""The branch group of the generated kde-dependencies file, the default of the branch-group option."""
+
+BASE_TIERS = 4
+"""Number of tiers the base projects are split into, like the tiers of KDE Frameworks."""
+
+
+def project_names(count: int) -> list[str]:
+    """
+    Return the identifiers of the synthetic projects, e.g. "project-0042".
+    """
+    width = len(str(count))
+    return [f"project-{index:0{width}}" for index in range(count)]
+
+
+def repopath(index: int, name: str) -> str:
+    return f"{GROUPS[index % len(GROUPS)]}/{name}"
+
+
+def generate_repo_metadata(metadata_dir: str, count: int, seed: int = 0) -> list[str]:
+    """
+    Create a repo-metadata tree with the given number of projects in metadata_dir.
+
+    The tree contains the files read by kde-builder: projects/<group>/<project>/metadata.yaml, ignore-kde-projects,
+    branch-groups.yaml and the kde-dependencies files (see generate_dependencies()).
+
+    Returns:
+        The project identifiers.
+    """
+    rng = random.Random(seed)
+    names = project_names(count)
+
+    for index, name in enumerate(names):
+        project_dir = f"{metadata_dir}/projects/{repopath(index, name)}"
+        os.makedirs(project_dir, exist_ok=True)
+        active = "false" if rng.random() < 0.05 else "true"  # Some projects are archived
+        with open(f"{project_dir}/metadata.yaml", "w") as f:
+            f.write(f"identifier: {name}\n"
+                    f"kind: software\n"
+                    f"repoactive: {active}\n"
+                    f"repopath: {repopath(index, name)}\n"
+                    f"name: {name.title()}\n"
+                    f"description: Synthetic project number {index}\n"
+                    f"projectpath: {repopath(index, name)}\n")
+
+    with open(f"{metadata_dir}/ignore-kde-projects", "w") as f:
+        f.write("# Projects which are not built\n")
+        f.write(f"{repopath(len(names) - 1, names[-1])}\n")
+
+    with open(f"{metadata_dir}/branch-groups.yaml", "w") as f:
+        f.write(f'"layers": ["{BRANCH_GROUP}"]\n'
+                f'"groups": {{"*": {{"{BRANCH_GROUP}": "master"}}}}\n')
+
+    os.makedirs(f"{metadata_dir}/kde-dependencies", exist_ok=True)
+    generate_dependencies(f"{metadata_dir}/kde-dependencies/kde-dependencies-{BRANCH_GROUP}", count, seed)
+    with open(f"{metadata_dir}/kde-dependencies/third-party-dependencies", "w") as f:
+        f.write("# No third-party dependencies in the synthetic data\n")
+
+    return names
+
+
+def generate_dependencies(path: str, count: int, seed: int = 0, max_dependencies: int = 6) -> None:
+    """
+    Write a kde-dependencies file for the synthetic projects.
+
+    Like in the real data, the first tenth of the projects (the "frameworks") are split into tiers, each depending only
+    on a few projects of the lower tiers, and the rest (the "applications") depend on several frameworks and sometimes on
+    another application. Every project only depends on projects with a lower number, so there are no cycles.
+    """
+    rng = random.Random(seed)
+    names = project_names(count)
+    base_count = max(1, count // 10)
+    tier_size = max(1, base_count // BASE_TIERS)
+
+    with open(path, "w") as f:
+        f.write("# Synthetic dependency data\n")
+        for index in range(1, count):
+            if index < base_count:
+                candidates = range(min(index, index // tier_size * tier_size))  # Projects of the lower tiers
+                dependency_count = rng.randint(0, 3)
+            else:
+                candidates = range(base_count)
+                dependency_count = rng.randint(1, max_dependencies)
+            dependencies = set(rng.sample(candidates, min(len(candidates), dependency_count)))
+            if index > base_count and rng.random() < 0.2:
+                dependencies.add(rng.randrange(base_count, index))  # Sometimes a sibling application or library
+            for dependency in sorted(dependencies):
+                f.write(f"{repopath(index, names[index])}: {repopath(dependency, names[dependency])}\n")
+
+
+def generate_config(config_path: str, work_dir: str, count: int, projects_per_group: int = 25, seed: int = 0) -> list[str]:
+    """
+    Write a large config with the synthetic projects split into groups, with some overrides and standalone projects.
+
+    Returns:
+        The names of the groups, to be used as selectors.
+    """
+    rng = random.Random(seed)
+    names = project_names(count)
+    group_names = []
+
+    lines = ["config-version: 2",
+             "global:",
+             f"    source-dir: {work_dir}/src",
+             f"    build-dir: {work_dir}/build",
+             f"    install-dir: {work_dir}/usr",
+             f"    log-dir: {work_dir}/log",
+             "    cmake-generator: Ninja",
+             "    cmake-options: -DCMAKE_BUILD_TYPE=RelWithDebInfo",
+             "    num-cores: \"8\"",
+             "    check-self-updates: false",
+             "    include-dependencies: false",
+             ""]
+
+    for start in range(0, count, projects_per_group):
+        group_name = f"group-{start // projects_per_group}"
+        group_names.append(group_name)
+        lines += [f"group {group_name}:",
+                  "    repository: kde-projects",
+                  f"    cmake-options: -DGROUP_OPTION={start}",
+                  "    use-projects:"]
+        lines += [f"        - {repopath(index, names[index])}" for index in range(start, min(count, start + projects_per_group))]
+        lines.append("")
+
+    for index in rng.sample(range(count), max(1, count // 20)):
+        lines += [f"override {names[index]}:",
+                  "    cmake-options: -DOVERRIDDEN=ON",
+                  "    make-options: -j ${num-cores}",
+                  ""]
+
+    for index in range(max(1, count // 100)):
+        lines += [f"project standalone-{index}:",
+                  f"    repository: https://example.org/standalone-{index}.git",
+                  "    branch: main",
+                  ""]
+
+    with open(config_path, "w") as f:
+        f.write("\n".join(lines))
+
+    return group_names
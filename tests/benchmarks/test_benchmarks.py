@@ -0,0 +1,43 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import sys
+
+from kde_builder.debug import Debug
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import run_benchmarks  # noqa: E402
+import run_orchestration_benchmark  # noqa: E402
+
+
+def test_benchmarks_run(monkeypatch):
+    """
+    Run the benchmarks on a small size, to make sure they keep working with the code they measure.
+    """
+    monkeypatch.setattr(Debug, "is_testing", lambda self: False)  # Read the synthetic repo-metadata, not the test fixtures
+    report = run_benchmarks.run_benchmarks([40], 1)
+
+    assert report["repeats"] == 1
+    assert list(report["results"].keys()) == ["40"]
+    assert list(report["results"]["40"].keys()) == run_benchmarks.STAGES
+    assert all(values["min"] >= 0 for values in report["results"]["40"].values())
+    assert not Debug().pretending(), "Pretending is restored"
+
+
+def test_orchestration_benchmark_run():
+    """
+    Run the orchestration benchmark on two tiny projects, to make sure kde-builder still works with the fake repositories and build tools.
+    """
+    args = run_orchestration_benchmark.parse_arguments(["--projects", "2", "--commits", "3", "--steps", "2", "--step-seconds", "0.01",
+                                                        "--configure-seconds", "0", "--memory", "1", "--modes", "async"])
+    report = run_orchestration_benchmark.run_orchestration_benchmark(args)
+
+    assert list(report["results"].keys()) == ["async"]
+    for scenario in run_orchestration_benchmark.SCENARIOS:
+        metrics = report["results"]["async"][scenario]
+        assert list(metrics.keys()) == run_orchestration_benchmark.METRICS
+        assert metrics["wall"] > 0
+        assert metrics["kde_builder_cpu"] > 0, "The CPU time of kde-builder processes is sampled"
+        assert metrics["build_tool_cpu"] > 0, "The fake build tools were run"
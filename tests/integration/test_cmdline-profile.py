@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import atexit
+import pstats
+
+from kde_builder.application import Application
+from kde_builder.cmd_line import Cmdline
+from kde_builder.debug import Debug
+from kde_builder.util.profiler import Profiler
+
+
+def test_profile_option():
+    """
+    Verify that --profile can be given with and without the file name.
+    """
+    assert Cmdline().read_command_line_options_and_selectors(["--profile"])["global"]["profile"] == ""
+    assert Cmdline().read_command_line_options_and_selectors(["--profile=/tmp/run.pstats"])["global"]["profile"] == "/tmp/run.pstats"
+    assert "profile" not in Cmdline().read_command_line_options_and_selectors([])["global"]
+    assert Profiler("").phase_file("config") == "kde-builder-profile-config.pstats"
+
+
+def test_profile_phases(tmp_path, capsys):
+    """
+    Verify that --profile writes a pstats file for every phase of the run, and prints a summary.
+    """
+    profile_file = tmp_path / "run.pstats"
+    args = f"--pretend --rc-file tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml --profile={profile_file} kcalc".split(" ")
+    app = Application(args)
+    app.generate_module_list()
+    atexit.unregister(app.profiler._write_results)  # Written below, the tmp_path is gone at exit
+    app.profiler._write_results()
+
+    for phase in ["metadata", "config", "modules", "dependencies"]:
+        stats = pstats.Stats(str(tmp_path / f"run-{phase}.pstats"))
+        assert stats.total_calls > 0, f"Phase {phase} is profiled"
+
+    output = capsys.readouterr().out
+    assert "dependencies" in output
+    assert "calls" in output, "The functions with the most own time are listed"
+    Debug().set_pretending(False)  # disable pretending, to not influence on other tests, because Debug is singleton
@@ -0,0 +1,23 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from kde_builder.application import Application
+from kde_builder.debug import Debug
+
+
+def test_rebuild_dependents():
+    """
+    Verify that --rebuild-dependents adds the config-defined dependents of the selected project, in build order.
+    """
+    args = "--pretend --rc-file tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml --rebuild-dependents kcalc".split(" ")
+    app = Application(args)
+    app.generate_module_list()
+    module_list = app.modules
+
+    assert [module.name for module in module_list] == ["kcalc", "juk", "kde-builder"], "Dependents are added in build order"
+    assert app.context.get_option("include-dependencies") is False, "--rebuild-dependents implies --no-include-dependencies"
+
+    stored_index = app.context.get_persistent_option("global", "reverse-dependency-index")
+    assert stored_index["index"]["kcalc"] == ["juk"], "Reverse dependency index is stored in persistent data"
+    Debug().set_pretending(False)  # disable pretending, to not influence on other tests, because Debug is singleton
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import json
+import os
+
+import pytest
+
+from kde_builder.application import Application
+from kde_builder.debug import Debug
+from kde_builder.task_manager import TaskManager
+from kde_builder.util.file_watcher import FileWatcher
+
+
+def test_watch_rebuilds_dependents():
+    """
+    Verify that --watch rebuilds the changed projects and the selected projects depending on them, in build order.
+    """
+    args = "--pretend --rc-file tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml --watch juk kcalc kde-builder".split(" ")
+    app = Application(args)
+    app.generate_module_list()
+    assert app.context.get_option("watch") is True
+
+    modules = app.modules
+    dependency_graph = app.dependency_resolver.dependency_graph
+    assert [module.name for module in modules] == ["kcalc", "juk", "kde-builder"]
+
+    def rebuilt(changed_names):
+        return [module.name for module in Application._modules_to_rebuild(modules, dependency_graph, changed_names)]
+
+    assert rebuilt({"kcalc"}) == ["kcalc", "juk", "kde-builder"]
+    assert rebuilt({"kde-builder", "juk"}) == ["juk", "kde-builder"], "Build order is kept"
+    assert rebuilt({"taglib"}) == ["kde-builder"], "Dependents are found through projects that are not selected"
+    Debug().set_pretending(False)  # disable pretending, to not influence on other tests, because Debug is singleton
+
+
+def test_watch_stops_on_interrupt(tmp_path, monkeypatch):
+    """
+    Verify that Ctrl+C while watching returns the result of the last rebuild, and the persistent data of the rebuilds is stored.
+    """
+    args = f"--pretend --rc-file tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml --watch --source-dir {tmp_path}/src --log-dir {tmp_path}/log --persistent-data-file {tmp_path}/persistent.json juk kcalc kde-builder".split(" ")
+    app = Application(args)
+    app.generate_module_list()
+    Debug().set_pretending(False)  # Nothing is stored when pretending
+    for module in app.modules:
+        os.makedirs(module.fullpath("source"))
+
+    changes = iter([{"juk"}])
+
+    def wait_for_changes(self, *args, **kwargs):
+        try:
+            return next(changes)
+        except StopIteration:
+            raise KeyboardInterrupt  # Ctrl+C after the first rebuild
+
+    def run_all_tasks(self):
+        app.context.set_persistent_option("juk", "failure-count", 0)  # As recorded by the rebuild
+        return 0
+
+    monkeypatch.setattr(FileWatcher, "wait_for_changes", wait_for_changes)
+    monkeypatch.setattr(TaskManager, "run_all_tasks", run_all_tasks)
+
+    assert app._watch_and_rebuild(1) == 0, "The result of the last rebuild"
+    with pytest.raises(SystemExit):
+        app.finish(0)
+    assert json.loads((tmp_path / "persistent.json").read_text())["juk"]["failure-count"] == 0
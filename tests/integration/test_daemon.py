@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import signal
+import time
+
+from kde_builder.daemon import Daemon
+
+
+def test_daemon_serves_requests(tmp_path, capfd):
+    """
+    Verify that runs requested with --use-daemon are done by the daemon with the output of the client, and that the client runs kde-builder itself when the daemon is gone.
+    """
+    socket_path = str(tmp_path / "daemon.socket")
+    daemon_pid = os.fork()
+    if daemon_pid == 0:
+        exit_code = 1
+        try:
+            exit_code = Daemon(socket_path).serve()
+        finally:
+            os._exit(exit_code)
+
+    try:
+        for _ in range(50):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.1)
+
+        sigint_handler = signal.getsignal(signal.SIGINT)
+        args = ["--rc-file", "tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml", "--query", "source-dir", "kcalc"]
+        assert Daemon.run_client(args, socket_path) == 0
+        assert Daemon.run_client(args, socket_path) == 0, "Second run with the cached data"
+        assert Daemon.run_client(["--rc-file", "/nonexistent/kde-builder.yaml", "kcalc"], socket_path) != 0
+        assert signal.getsignal(signal.SIGINT) is sigint_handler, "The forwarding of signals is undone"
+
+        output = capfd.readouterr().out
+        assert output.count("kcalc: ") == 2
+    finally:
+        os.kill(daemon_pid, signal.SIGTERM)
+        _, status = os.waitpid(daemon_pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert not os.path.exists(socket_path), "The socket is removed when the daemon stops"
+    assert Daemon.run_client(args, socket_path) is None
+    assert "running without it" in capfd.readouterr().err
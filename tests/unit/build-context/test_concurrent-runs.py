@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import json
+import os
+
+from kde_builder.build_context import BuildContext
+from kde_builder.log_dir import LogDir
+
+
+def test_persistent_options_of_concurrent_runs(tmp_path):
+    """
+    Test that runs storing the persistent options one after the other keep the options changed by each other.
+    """
+    data_file = tmp_path / "persistent-data.json"
+    data_file.write_text(json.dumps({"global": {"resume-list": "juk"}, "juk": {"failure-count": 1}}))
+
+    first, second = BuildContext(), BuildContext()
+    for ctx in first, second:
+        ctx.set_option("persistent-data-file", str(data_file))
+        ctx.load_persistent_options()
+
+    first.set_persistent_option("juk", "failure-count", 0)
+    first.unset_persistent_option("global", "resume-list")
+    second.set_persistent_option("kcalc", "failure-count", 2)
+    first.store_persistent_options()
+    second.store_persistent_options()
+
+    assert json.loads(data_file.read_text()) == {"global": {}, "juk": {"failure-count": 0}, "kcalc": {"failure-count": 2}}
+
+
+def test_log_dirs_of_concurrent_runs(tmp_path):
+    """
+    Test that concurrent runs get their own log directories, which are not purged while they run.
+    """
+    log_dir = tmp_path / "log"
+    (log_dir / "latest").mkdir(parents=True)
+    (log_dir / "2020-01-01_01").mkdir()
+
+    first, second = BuildContext(), BuildContext()
+    for ctx in first, second:
+        ctx.set_option("log-dir", str(log_dir))
+    first_log_dir, second_log_dir = first.get_log_dir(), second.get_log_dir()
+    assert first_log_dir != second_log_dir
+
+    LogDir.delete_unreferenced_log_directories(first)
+    assert sorted(os.listdir(log_dir)) == sorted(["latest", os.path.basename(first_log_dir), os.path.basename(second_log_dir),
+                                                  f".{os.path.basename(first_log_dir)}.kde-builder-lock", f".{os.path.basename(second_log_dir)}.kde-builder-lock"])
+
+    for lock in second.log_dir_locks:
+        lock.release()
+    LogDir.delete_unreferenced_log_directories(first)
+    assert not os.path.exists(second_log_dir), "Removed when the run has finished"
+    assert not os.path.exists(f"{log_dir}/.{os.path.basename(second_log_dir)}.kde-builder-lock")
+    for lock in first.log_dir_locks:
+        lock.release()
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+
+import pytest
+
+from kde_builder.build_context import BuildContext
+from kde_builder.build_system.build_system import BuildSystem
+from kde_builder.module.module import Module
+from kde_builder.os_support import CoresAndMemorySupport
+
+
+@pytest.fixture
+def available_memory(monkeypatch):
+    memory = {"KiB": 8 * 1024 * 1024}
+    monkeypatch.setattr(CoresAndMemorySupport, "detect_available_memory", staticmethod(lambda: memory["KiB"]))
+    return memory
+
+
+def test_detect_available_memory():
+    """
+    Test that the available memory is either detected as a positive number or reported as unknown.
+    """
+    mem_available = CoresAndMemorySupport.detect_available_memory()
+    assert mem_available is None or mem_available > 0
+
+
+def test_adaptive_num_cores(available_memory, monkeypatch):
+    """
+    Test that the job count is limited by the memory used per job in the previous builds.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    module.set_option("num-cores", "16")
+    module.set_option("adaptive-num-cores", True)
+
+    assert build_system._num_cores_to_use() == 16, "Without history the configured job count is used"
+
+    module.set_persistent_option("peak-rss-history", [1024 * 1024, 2 * 1024 * 1024])  # up to 2 GiB per job
+    assert build_system._num_cores_to_use() == 3, "8 GiB available allow 3 jobs taking 2 GiB each"
+
+    available_memory["KiB"] = 1024 * 1024
+    assert build_system._num_cores_to_use() == 1, "At least one job is used"
+
+    available_memory["KiB"] = 64 * 1024 * 1024
+    assert build_system._num_cores_to_use() == 16, "Configured job count is not exceeded"
+
+    available_memory["KiB"] = None
+    assert build_system._num_cores_to_use() == 16, "Unknown available memory does not change the job count"
+
+    available_memory["KiB"] = 8 * 1024 * 1024
+    module.set_option("adaptive-num-cores", False)
+    assert build_system._num_cores_to_use() == 16, "Nothing is adapted when the option is disabled"
+
+    module.set_option("adaptive-num-cores", True)
+    module.set_option("num-cores", "")
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    assert build_system._num_cores_to_use() == 3, "Adapted also when the job count is left to the build system"
+
+    available_memory["KiB"] = 64 * 1024 * 1024
+    assert build_system._num_cores_to_use() is None, "No job count is passed when memory is not the limit"
+
+
+def test_record_peak_memory_per_job():
+    """
+    Test that the peak memory history keeps the recent builds, and ignores builds which compiled nothing.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+
+    def finish_build(max_rss, cpu_seconds):
+        module.set_persistent_option("resource-usage", {"build": {"user-time": cpu_seconds, "system-time": 0.0, "max-rss": max_rss}})
+        build_system._record_peak_memory_per_job()
+
+    finish_build(2 * 1024 * 1024, 600.0)
+    finish_build(50 * 1024, 0.5)  # no-op incremental build
+    assert module.get_persistent_option("peak-rss-history") == [2 * 1024 * 1024], "Build without compiling is not recorded"
+
+    for _ in range(BuildSystem.PEAK_RSS_HISTORY_LENGTH):
+        finish_build(1024 * 1024, 60.0)
+    assert module.get_persistent_option("peak-rss-history") == [1024 * 1024] * BuildSystem.PEAK_RSS_HISTORY_LENGTH, "Old builds are forgotten"
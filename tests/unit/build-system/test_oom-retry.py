@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import signal
+
+import pytest
+
+from kde_builder.build_context import BuildContext
+from kde_builder.build_system.build_system import BuildSystem
+from kde_builder.module.module import Module
+
+
+@pytest.fixture
+def mock_buildsystem(monkeypatch):
+    BuildSystem.made_arguments = []
+
+    # Pretend that the build runs out of memory with more than 4 jobs
+    def mock_safe_make(self, opts):
+        BuildSystem.made_arguments.append(opts["make-options"])
+        jobs, _ = BuildSystem._split_jobs_from_build_options(opts["make-options"])
+        if jobs > 4:
+            return {"was_successful": 0, "oom_killed": True}
+        return {"was_successful": 1}
+
+    monkeypatch.setattr(BuildSystem, "safe_make", mock_safe_make)
+
+
+def test_split_jobs_from_build_options():
+    """
+    Test that all spellings of the job count are recognized and removed.
+    """
+    test_matrix = [
+        [["-j", "8", "a"], (8, ["a"])],
+        [["-j8", "a"], (8, ["a"])],
+        [["--jobs=8", "a"], (8, ["a"])],
+        [["--jobs", "8", "a"], (8, ["a"])],
+        [["-j", "8", "a", "-j2"], (2, ["a"])],
+        [["a", "b"], (None, ["a", "b"])],
+        [["-k", "0"], (None, ["-k", "0"])],
+    ]
+
+    for build_options, expected in test_matrix:
+        assert BuildSystem._split_jobs_from_build_options(build_options) == expected, f"Splitting {build_options}"
+
+
+def test_oom_detection(tmp_path, monkeypatch):
+    """
+    Test that out-of-memory failures are detected from the wait status and from the log.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    monkeypatch.setattr(Module, "get_log_dir", lambda self: str(tmp_path))
+
+    assert build_system._is_out_of_memory_failure(signal.SIGKILL, "build"), "Killed by SIGKILL"
+    assert build_system._is_out_of_memory_failure(137 << 8, "build"), "Exit code 137"
+    assert not build_system._is_out_of_memory_failure(1 << 8, "build"), "Ordinary failure without a log"
+
+    (tmp_path / "build.log").write_text("[12/50] Building CXX object foo.o\nc++: fatal error: Killed signal terminated program cc1plus\n")
+    assert build_system._is_out_of_memory_failure(1 << 8, "build"), "Compiler killed message in log"
+
+    (tmp_path / "build.log").write_text("foo.cpp:1:1: error: expected unqualified-id\n")
+    assert not build_system._is_out_of_memory_failure(1 << 8, "build"), "Compile error in log"
+
+
+def test_retry_with_fewer_jobs(mock_buildsystem):
+    """
+    Test that the build is retried with halved job count, and the working job count is remembered.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    module.set_option("num-cores", "16")
+    module.set_option("num-cores-low-mem", "2")
+    module.set_option("make-options", "-k")
+
+    result = build_system.build_internal()
+    assert result["was_successful"]
+    assert BuildSystem.made_arguments == [["-j", "16", "-k"], ["-j", "8", "-k"], ["-j", "4", "-k"]]
+    assert module.get_persistent_option("oom-safe-num-cores")["jobs"] == 4, "Job count that succeeded is remembered"
+
+    # The next build starts with the remembered job count
+    BuildSystem.made_arguments = []
+    build_system.build_internal()
+    assert BuildSystem.made_arguments == [["-j", "4", "-k"]]
+
+
+def test_no_retry_below_low_mem_cores(mock_buildsystem):
+    """
+    Test that the job count is not reduced below num-cores-low-mem, and that retries can be disabled.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    module.set_option("num-cores", "16")
+    module.set_option("num-cores-low-mem", "6")
+
+    result = build_system.build_internal()
+    assert not result["was_successful"]
+    assert BuildSystem.made_arguments == [["-j", "16"], ["-j", "8"], ["-j", "6"]]
+
+    BuildSystem.made_arguments = []
+    module.set_option("retry-build-on-oom", False)
+    build_system.build_internal()
+    assert BuildSystem.made_arguments == [["-j", "16"]]
+
+
+def test_oom_safe_cores_override_user_options(mock_buildsystem):
+    """
+    Test that the remembered job count also limits a job count given in the user's build options.
+    """
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    module.set_option("num-cores", "16")
+    module.set_option("make-options", "-k -j12")
+    module.set_persistent_option("oom-safe-num-cores", {"jobs": 4, "total-memory": None, "successes": 0})
+
+    assert build_system.get_build_options() == ["-j", "4", "-k"]
+
+    module.set_option("make-options", "-j2")
+    assert build_system.get_build_options() == ["-j", "16", "-j2"], "Lower job count of the user is kept"
+
+
+def test_oom_safe_cores_recover(mock_buildsystem, monkeypatch):
+    """
+    Test that the remembered job count is raised after successful builds, and forgotten when the memory changes.
+    """
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    ctx = BuildContext()
+    module = Module(ctx, "test")
+    build_system = BuildSystem(module)
+    module.set_option("num-cores", "16")
+    module.set_option("retry-build-on-oom", False)
+    module.set_persistent_option("oom-safe-num-cores", {"jobs": 2, "total-memory": None, "successes": 0})
+
+    for _ in range(BuildSystem.OOM_SAFE_REPROBE_AFTER):
+        build_system.build_internal()
+    assert module.get_persistent_option("oom-safe-num-cores")["jobs"] == 4, "Job count doubled after successful builds"
+
+    for _ in range(BuildSystem.OOM_SAFE_REPROBE_AFTER):
+        build_system.build_internal()
+    assert module.get_persistent_option("oom-safe-num-cores")["jobs"] == 8
+
+    for _ in range(BuildSystem.OOM_SAFE_REPROBE_AFTER):
+        build_system.build_internal()  # runs out of memory with 8 jobs, so nothing is counted
+    assert module.get_persistent_option("oom-safe-num-cores") == {"jobs": 8, "total-memory": None, "successes": 0}
+
+    module.set_persistent_option("oom-safe-num-cores", {"jobs": 8, "total-memory": 1024, "successes": 0})
+    monkeypatch.setattr(BuildSystem, "_total_memory", staticmethod(lambda: 2048))
+    assert build_system.get_build_options() == ["-j", "16"], "Job count is forgotten when the total memory changed"
+    assert module.get_persistent_option("oom-safe-num-cores") is None
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+import time
+
+import pytest
+
+from kde_builder.build_context import BuildContext
+from kde_builder.module.module import Module
+from kde_builder.os_support import CoresAndMemorySupport
+from kde_builder.util.pressure_governor import PressureGovernor
+
+HIGH_PRESSURE = {"cpu": 90.0, "memory": 0.0, "load": 0.1}
+MEDIUM_PRESSURE = {"cpu": 40.0, "memory": 0.0, "load": 0.1}
+LOW_PRESSURE = {"cpu": 5.0, "memory": 0.0, "load": 0.1}
+
+
+def process_state(pid: int) -> str:
+    with open(f"/proc/{pid}/stat", "r") as f:
+        return f.read().rsplit(")", 1)[1].split()[0]
+
+
+def is_paused(pid: int) -> bool:
+    """
+    Return whether the process is stopped, after the signals sent to it were delivered.
+    """
+    deadline = time.monotonic() + 5
+    while process_state(pid) not in ("T", "S") and time.monotonic() < deadline:
+        time.sleep(0.01)  # Still running, before the signal was handled
+    return process_state(pid) == "T"
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    """
+    Start a process tree like the one of a build tool running four compile jobs, next to one like the updater's.
+    """
+    monkeypatch.setattr(PressureGovernor, "CHECK_INTERVAL_SECONDS", 3600)  # Only the checks of the test
+    updater = subprocess.Popen(["sh", "-c", "sleep 60 & wait"])  # Started before the build, like the updater process
+    governor = PressureGovernor(Module(BuildContext(), "test"))
+    governor.start()
+    build = subprocess.Popen(["sh", "-c", "sleep 60 & sleep 60 & sleep 60 & sleep 60 & wait"])
+    deadline = time.monotonic() + 10
+    while len(governor.find_running_jobs()) < 4 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield governor
+    governor.stop()
+    for process in (build, updater):
+        process.kill()
+        subprocess.run(["pkill", "-P", str(process.pid)])
+        process.wait()
+
+
+def test_read_pressure():
+    """
+    Test that the pressure values are either detected, or left out.
+    """
+    avg = CoresAndMemorySupport.read_pressure_average("cpu")
+    assert avg is None or 0 <= avg <= 100
+
+    pressure = PressureGovernor.read_pressure()
+    assert set(pressure.keys()) <= {"cpu", "memory", "load"}
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs the /proc filesystem")
+def test_throttle_and_restore(fake_build):
+    """
+    Test that the running jobs are paused while the system is under pressure, and continued afterwards.
+    """
+    governor = fake_build
+    jobs = governor.find_running_jobs()
+    assert len(jobs) == 4, "Leaf processes of the build are its jobs, the build tool itself and the other processes are not"
+
+    governor.check(LOW_PRESSURE)
+    assert governor.allowed_jobs is None, "Not throttled without pressure"
+
+    governor.check(HIGH_PRESSURE)
+    assert governor.allowed_jobs == 2
+    assert governor.paused_pids == jobs[2:], "The newest jobs are paused"
+    assert all(is_paused(pid) for pid in jobs[2:])
+    assert governor.find_running_jobs() == jobs[:2]
+
+    governor.check(HIGH_PRESSURE)
+    assert governor.allowed_jobs == 1, "Throttled further while the pressure stays high"
+    assert governor.paused_pids == [jobs[2], jobs[3], jobs[1]]
+
+    governor.check(MEDIUM_PRESSURE)
+    assert governor.allowed_jobs == 1, "Not restored until the pressure goes well below the limits"
+
+    governor.check(LOW_PRESSURE)
+    assert governor.allowed_jobs == 2
+    assert governor.find_running_jobs() == [jobs[0], jobs[2]], "Paused jobs are continued step by step"
+
+    governor.check(LOW_PRESSURE)
+    assert governor.allowed_jobs is None, "Full parallelism is restored"
+    assert governor.paused_pids == []
+    assert sorted(governor.find_running_jobs()) == sorted(jobs)
+    assert governor.throttle_count == 2
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs the /proc filesystem")
+def test_stop_continues_paused_jobs(fake_build):
+    """
+    Test that no job is left paused when the governor is stopped.
+    """
+    governor = fake_build
+    jobs = governor.find_running_jobs()
+    governor.check(HIGH_PRESSURE)
+    assert governor.paused_pids
+
+    governor.stop()
+    assert governor.paused_pids == []
+    assert not any(is_paused(pid) for pid in jobs)
@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import io
+
+from kde_builder.dependency_resolver import DependencyResolver
+
+
+def test_reverse_dependency_index():
+    """
+    Test building the reverse dependency index and expanding transitive dependents from it.
+    """
+    dependency_data = io.StringIO("""
+        frameworks/kcoreaddons: third-party/extra-cmake-modules
+        frameworks/ki18n: frameworks/kcoreaddons
+        frameworks/kio: frameworks/ki18n
+        frameworks/kio: frameworks/kcoreaddons
+        utilities/kcalc: frameworks/kio
+        utilities/kcalc[stable]: -frameworks/kio
+        utilities/juk: frameworks/ki18n
+        utilities/kate: utilities/kate
+        """)
+
+    resolver = DependencyResolver(None)
+    resolver.read_dependency_data(dependency_data)
+    index = resolver.build_reverse_dependency_index()
+
+    assert index == {
+        "extra-cmake-modules": ["kcoreaddons"],
+        "kcoreaddons": ["ki18n", "kio"],
+        "ki18n": ["juk", "kio"],
+        "kio": ["kcalc"],
+    }, "Reverse edges are collected regardless of branch, self-dependencies are dropped"
+
+    assert resolver.get_transitive_dependents("kcoreaddons") == ["ki18n", "kio", "juk", "kcalc"]
+    assert resolver.get_transitive_dependents("kio") == ["kcalc"]
+    assert resolver.get_transitive_dependents("kcalc") == []
+    assert resolver.get_transitive_dependents("not-a-project") == []
+
+
+def test_transitive_dependents_with_cycle():
+    """
+    Test that a cycle in the index does not make the expansion loop forever.
+    """
+    resolver = DependencyResolver(None)
+    resolver.reverse_dependency_index = {
+        "a": ["b"],
+        "b": ["c"],
+        "c": ["a"],
+    }
+
+    assert resolver.get_transitive_dependents("a") == ["b", "c"]
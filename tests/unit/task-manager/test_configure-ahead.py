@@ -0,0 +1,60 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from kde_builder.build_context import BuildContext
+from kde_builder.ipc.ipc import IPC
+from kde_builder.ipc.null import IPCNull
+from kde_builder.module.module import Module
+from kde_builder.task_manager import TaskManager
+
+
+def test_receive_pending_messages(monkeypatch):
+    """
+    Test that the update results which already arrived are received without waiting.
+    """
+    monkeypatch.setattr(IPC, "waited", 1, raising=False)
+    ctx = BuildContext()
+    a, b = Module(ctx, "a"), Module(ctx, "b")
+
+    ipc = IPCNull()
+    ipc.notify_update_success("a", "3 commits pulled")
+    assert not ipc.is_module_updated(a)
+
+    ipc.receive_pending_messages()
+    assert ipc.is_module_updated(a)
+    assert not ipc.is_module_updated(b)
+    assert ipc.wait_for_module(a) == ("success", "3 commits pulled"), "Message of the update is kept for wait_for_module()"
+
+
+def test_find_configure_ahead_candidate(monkeypatch):
+    """
+    Test that only modules with completed updates and already built dependencies are configured ahead.
+    """
+    monkeypatch.setattr(IPC, "waited", 1, raising=False)
+    ctx = BuildContext()
+    ctx.set_option("configure-ahead", True)
+    modules = {name: Module(ctx, name) for name in ["a", "b", "c", "d"]}
+    graph = {
+        "a": {"all_deps": {"items": {}}},
+        "b": {"all_deps": {"items": {"a": 1}}},
+        "c": {"all_deps": {"items": {"a": 1, "external": 1}}},
+        "d": {"all_deps": {"items": {}}},
+    }
+    remaining = [modules["b"], modules["c"], modules["d"]]
+    build_names = ["a", "b", "c", "d"]
+
+    ipc = IPCNull()
+    for name in ["b", "c", "d"]:
+        ipc.notify_update_success(name, "1 commit pulled")
+    ipc.receive_pending_messages()
+
+    assert TaskManager._find_configure_ahead_candidate(ipc, remaining, graph, build_names, []) is modules["d"], "Dependencies must be built first"
+    assert TaskManager._find_configure_ahead_candidate(ipc, remaining, graph, build_names, ["a"]) is modules["b"]
+    assert TaskManager._find_configure_ahead_candidate(ipc, remaining[1:], graph, build_names, ["a"]) is modules["c"], "Dependencies not built in this run do not matter"
+
+    modules["c"].set_option("refresh-build", True)
+    assert TaskManager._find_configure_ahead_candidate(ipc, remaining[1:], graph, build_names, ["a"]) is modules["d"], "Modules rebuilt from scratch are not configured ahead"
+
+    ctx.set_option("configure-ahead", False)
+    assert TaskManager._find_configure_ahead_candidate(ipc, remaining, graph, build_names, ["a"]) is None
@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import pytest
+
+from kde_builder.module.module import Module
+from kde_builder.task_manager import TaskManager
+
+
+@pytest.fixture
+def mock_module_from_attrs(monkeypatch):
+    def mock__init__(self, **kwargs):
+        self.name = kwargs.get("name", None)
+
+    monkeypatch.setattr(Module, "__init__", mock__init__)
+
+
+def test_find_failed_dependency(mock_module_from_attrs):
+    """
+    Test that only transitive dependents of failed (or skipped) modules are reported for skipping.
+    """
+    graph = {
+        "a": {"all_deps": {"items": {}}},
+        "b": {"all_deps": {"items": {"a": 1}}},
+        "c": {"all_deps": {"items": {"a": 1, "b": 1}}},
+        "d": {"all_deps": {"items": {}}},
+        "e": {"all_deps": {}},  # graph entry of a module that is not built
+    }
+
+    assert TaskManager._find_failed_dependency(graph, "b", []) is None, "Nothing failed yet"
+    assert TaskManager._find_failed_dependency(graph, "b", [Module(name="a")]) == "a", "Direct dependent of failed module is skipped"
+    assert TaskManager._find_failed_dependency(graph, "c", [Module(name="b")]) == "b", "Transitive dependent of failed module is skipped"
+    assert TaskManager._find_failed_dependency(graph, "d", [Module(name="a")]) is None, "Independent module is built"
+    assert TaskManager._find_failed_dependency(graph, "e", [Module(name="a")]) is None, "Module without dependency info is built"
+    assert TaskManager._find_failed_dependency(graph, "unknown", [Module(name="a")]) is None, "Module missing in graph is built"
@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from types import SimpleNamespace
+
+from kde_builder.application import Application
+from kde_builder.build_context import BuildContext
+from kde_builder.debug import Debug
+from kde_builder.module.module import Module
+from kde_builder.task_manager import TaskManager
+
+
+class FakeIPC:
+    """
+    Reports the given update results, instead of receiving them from the updater.
+    """
+
+    def __init__(self, update_results: dict[str, str]):
+        self.update_results = update_results
+
+    def wait_for_stream_start(self):
+        pass
+
+    def wait_for_module(self, module):
+        return self.update_results.get(module.name, "skipped"), ""
+
+    def forget_module(self, module):
+        pass
+
+
+def test_handle_build_skips_dependents(tmp_path, monkeypatch):
+    """
+    Test that dependents of a failed project are skipped and reported, and independent projects are still built.
+    """
+    ctx = BuildContext()
+    ctx.set_option("log-dir", str(tmp_path))
+    (tmp_path / "latest").mkdir()  # Normally created with the log dirs of the projects
+    ctx.set_option("skip-dependents-on-failure", True)
+    ctx.set_option("stop-on-failure", False)
+    ctx.modules = [Module(ctx, name) for name in ["a", "b", "c", "d"]]
+
+    graph = {
+        "a": {"all_deps": {"items": {}}},
+        "b": {"all_deps": {"items": {"a": 1}}},
+        "c": {"all_deps": {"items": {"a": 1, "b": 1}}},
+        "d": {"all_deps": {"items": {}}},
+    }
+    app = SimpleNamespace(dependency_resolver=SimpleNamespace(dependency_graph=graph))
+
+    built = []
+
+    def mock_build_single_module(ipc, module):
+        ipc.wait_for_module(module)
+        built.append(module.name)
+        return "build" if module.name == "a" else ""
+
+    monkeypatch.setattr(TaskManager, "_build_single_module", staticmethod(mock_build_single_module))
+    monkeypatch.setattr(Module, "is_kde_project", lambda self: False)
+
+    result = TaskManager(app)._handle_build(FakeIPC({"c": "failed"}), ctx)
+    assert result == 1
+    assert built == ["a", "d"], "Dependents of the failed project are not built"
+
+    latest = tmp_path / "latest"
+    assert (latest / "status-list.log").read_text() == ("a: Failed to build.\n"
+                                                        "b: Skipped: dependency a failed.\n"
+                                                        "c: Skipped: dependency a failed.\n"
+                                                        "d: Succeeded.\n")
+    assert (latest / "skipped-dependents.log").read_text() == "b\nc\n"
+    assert (latest / "failed-to-update.log").read_text() == "c\n", "Failed update of a skipped project is recorded"
+    assert (latest / "failed-to-build.log").read_text() == "a\n"
+
+    assert ctx.get_persistent_option("global", "resume-list") == "a, b, c", "Independent project that succeeded is not resumed"
+    assert [module.name for module in ctx.list_skipped_modules()] == ["b", "c"]
+    assert ctx.status_view.mod_failed == 1
+    assert ctx.status_view.mod_skipped == 2
+    assert ctx.status_view.mod_success == 1
+
+
+def test_rebuild_failures_includes_skipped(monkeypatch):
+    """
+    Test that --rebuild-failures selects the projects that were skipped because of a failed dependency.
+    """
+    def mock_load_persistent_options(self):
+        self.persistent_options = {
+            "global": {
+                "last-failed-module-list": "juk",
+                "last-skipped-module-list": "kcalc,juk",
+            },
+        }
+
+    monkeypatch.setattr(BuildContext, "load_persistent_options", mock_load_persistent_options)
+
+    args = "--pretend --rc-file tests/integration/fixtures/kde-projects/kde-builder-with-deps.yaml --no-include-dependencies --rebuild-failures".split(" ")
+    app = Application(args)
+    app.generate_module_list()
+
+    assert sorted(module.name for module in app.modules) == ["juk", "kcalc"]
+    Debug().set_pretending(False)  # disable pretending, to not influence on other tests, because Debug is singleton
@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+import time
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+from kde_builder.updater.git_maintenance import GitMaintenance
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_git_maintenance(tmp_path):
+    """
+    Test that the maintenance runs in the clones which are due for it, and is recorded in their history.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    (work_dir / "file").write_text("content\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", "commit 1")
+    git(work_dir, "push", "-q", "origin", "master")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    ctx.set_option("git-maintenance-days", "7")
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(remote))
+    module.set_option("branch", "master")
+    not_cloned = Module(ctx, "not-cloned")
+    disabled = Module(ctx, "disabled")
+    disabled.set_option("git-maintenance-days", "0")
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    srcdir = tmp_path / "src" / "project"
+
+    orig_wd = os.getcwd()
+    try:
+        module.scm.update_internal()
+        disabled.set_option("source-dir", str(tmp_path / "src" / "project"))
+        assert GitMaintenance.due_modules([module, not_cloned, disabled]) == [module]
+        assert GitMaintenance.tasks(module)[-1] == "prefetch"
+        module.set_option("narrow-fetch", True)
+        assert "prefetch" not in GitMaintenance.tasks(module)
+
+        GitMaintenance.run_due([module, not_cloned, disabled], lambda: True)
+        assert GitMaintenance.history(module) == [], "Stopped before the first maintenance"
+
+        GitMaintenance.run_due([module, not_cloned, disabled])
+        assert (srcdir / ".git" / "objects" / "info" / "commit-graphs" / "commit-graph-chain").exists()
+        assert "# exit code was: 0, time: " in (tmp_path / "log" / "latest" / "project" / "git-maintenance.log").read_text()
+        history = GitMaintenance.history(module)
+        assert len(history) == 1 and history[0][2] == 0
+
+        assert GitMaintenance.due_modules([module]) == [], "Maintained less than 7 days ago"
+        assert GitMaintenance.due_modules([module], now=time.time() + 8 * 24 * 60 * 60) == [module]
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+from kde_builder.updater.updater import Updater
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def push_commit(work_dir, message: str) -> None:
+    (work_dir / "file").write_text(f"{message}\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", message)
+    git(work_dir, "push", "-q", "origin", "master")
+
+
+def make_module(tmp_path, remote, config: str) -> Module:
+    """
+    Create the module "project" of a config, with its own source directory, and the mirror directory shared by all configs.
+    """
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / config / "src"))
+    ctx.set_option("log-dir", str(tmp_path / config / "log"))
+    ctx.set_option("build-dir", str(tmp_path / config / "build"))
+    ctx.set_option("git-mirror-dir", str(tmp_path / "mirrors"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", f"file://{remote}")
+    module.set_option("branch", "master")
+    (tmp_path / config / "src").mkdir(parents=True)  # Created by TaskManager
+    return module
+
+
+def test_git_mirror(tmp_path):
+    """
+    Test that the clones of several configs are made from a shared mirror, which is fetched once per run.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    push_commit(work_dir, "commit 1")
+
+    mirror = tmp_path / "mirrors" / str(remote).lstrip("/")
+    stable = make_module(tmp_path, remote, "stable")
+    master = make_module(tmp_path, remote, "master")
+    stable_srcdir = tmp_path / "stable" / "src" / "project"
+    master_srcdir = tmp_path / "master" / "src" / "project"
+
+    orig_wd = os.getcwd()
+    Updater._updated_mirrors.clear()
+    try:
+        stable.scm.update_internal()
+        master.scm.update_internal()
+        assert git(mirror, "rev-parse", "master") == git(remote, "rev-parse", "master")
+        for srcdir in (stable_srcdir, master_srcdir):
+            assert (srcdir / ".git" / "objects" / "info" / "alternates").read_text().strip() == f"{mirror}/objects"
+            assert git(srcdir, "remote", "get-url", "origin") == f"file://{remote}", "The remote is not the mirror"
+
+        # Next run
+        Updater._updated_mirrors.clear()
+        push_commit(work_dir, "commit 2")
+        assert stable.scm.update_internal() == 1
+        assert git(stable_srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "master")
+
+        push_commit(work_dir, "commit 3")
+        assert master.scm.update_internal() == 1, "The mirror is not fetched again in the same run"
+        assert git(master_srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "master~1")
+        assert git(master_srcdir, "rev-parse", "origin/master") == git(remote, "rev-parse", "master~1")
+    finally:
+        Updater._updated_mirrors.clear()
+        os.chdir(orig_wd)
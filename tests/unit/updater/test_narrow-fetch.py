@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(work_dir, message: str) -> None:
+    (work_dir / "file").write_text(f"{message}\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", message)
+
+
+def test_narrow_fetch(tmp_path):
+    """
+    Test that only the wanted branch, tag or commit is fetched, and that changing the wanted branch or tag still works.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    commit(work_dir, "commit 1")
+    git(work_dir, "push", "-q", "origin", "master")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(remote))
+    module.set_option("branch", "master")
+    module.set_option("narrow-fetch", True)
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    srcdir = tmp_path / "src" / "project"
+
+    orig_wd = os.getcwd()
+    try:
+        module.scm.update_internal()
+
+        commit(work_dir, "commit 2")
+        git(work_dir, "tag", "-a", "-m", "on master", "v2")
+        git(work_dir, "checkout", "-q", "-b", "other")
+        commit(work_dir, "commit 3")
+        git(work_dir, "tag", "-a", "-m", "on other", "v3")
+        git(work_dir, "push", "-q", "origin", "master", "other", "v2", "v3")
+
+        assert module.scm.update_internal() == 1
+        assert git(srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "master")
+        assert git(srcdir, "branch", "-r", "--format=%(refname:short)").split() == ["origin/HEAD", "origin/master"]
+        assert git(srcdir, "tag").split() == ["v2"], "Only the tags of the fetched branch"
+
+        module.set_option("branch", "other")
+        module.scm.update_internal()
+        assert git(srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "other")
+        assert git(srcdir, "rev-parse", "--abbrev-ref", "HEAD") == "other"
+
+        module.set_option("branch", "")
+        module.set_option("tag", "v2")
+        module.scm.update_internal()
+        assert git(srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "v2^{commit}")
+
+        module.set_option("tag", "")
+        module.set_option("commit", git(remote, "rev-parse", "other"))
+        module.scm.update_internal()
+        assert git(srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "other")
+        assert "--tags" not in (tmp_path / "log" / "latest" / "project" / "git-fetch.log").read_text()
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def make_remote(tmp_path):
+    """
+    Create a bare repository with 10 commits on master, and the tags v1 at the first commit and v9 at the ninth.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    git(remote, "config", "uploadpack.allowFilter", "true")
+    git(remote, "config", "uploadpack.allowAnySHA1InWant", "true")
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    for i in range(1, 11):
+        (work_dir / "file").write_text(f"{i}\n")
+        git(work_dir, "add", "file")
+        git(work_dir, "commit", "-q", "-m", f"commit {i}")
+        if i in (1, 9):
+            git(work_dir, "tag", "-a", "-m", f"v{i}", f"v{i}")
+    git(work_dir, "push", "-q", "--tags", "origin", "master")
+    return remote, work_dir
+
+
+def make_module(tmp_path, remote, name, **options) -> Module:
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, name)
+    module.set_option("#resolved-repository", f"file://{remote}")  # Not a local path, so that git uses the filters
+    for option, value in options.items():
+        module.set_option(option.replace("_", "-"), value)
+    return module
+
+
+def test_partial_and_shallow_clones(tmp_path):
+    """
+    Test that blobless and shallow clones are made as asked, and that shallow clones are updated and deepened for older tags.
+    """
+    remote, work_dir = make_remote(tmp_path)
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    orig_wd = os.getcwd()
+    try:
+        blobless = make_module(tmp_path, remote, "blobless", branch="master", partial_clone="blobless")
+        assert blobless.scm.update_internal() == 10
+        assert git(tmp_path / "src" / "blobless", "config", "remote.origin.partialclonefilter") == "blob:none"
+
+        shallow = make_module(tmp_path, remote, "shallow", branch="master", shallow_clone_depth="2")
+        assert shallow.scm.update_internal() == 2, "Only the commits of the shallow history are counted"
+        assert not git(tmp_path / "src" / "shallow", "tag"), "Tags are not cloned with their history"
+
+        (work_dir / "file").write_text("11\n")
+        git(work_dir, "commit", "-q", "-a", "-m", "commit 11")
+        git(work_dir, "push", "-q", "origin", "master")
+        assert shallow.scm.update_internal() == 1
+        assert git(tmp_path / "src" / "shallow", "rev-list", "--count", "HEAD") == "3", "The history is not deepened by updates"
+
+        shallow.set_option("branch", "")
+        shallow.set_option("tag", "v1")
+        shallow.scm.update_internal()
+        assert git(tmp_path / "src" / "shallow", "rev-parse", "HEAD") == git(remote, "rev-parse", "v1^{commit}"), "The older tag is fetched"
+        assert (tmp_path / "src" / "shallow" / ".git" / "shallow").exists(), "Without the complete history"
+
+        tagged = make_module(tmp_path, remote, "tagged", tag="v9", shallow_clone_depth="1")
+        tagged.scm.update_internal()
+        assert git(tmp_path / "src" / "tagged", "rev-parse", "HEAD") == git(remote, "rev-parse", "v9^{commit}")
+        assert git(tmp_path / "src" / "tagged", "rev-list", "--count", "HEAD") == "1"
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+from kde_builder.updater.prefetcher import Prefetcher
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def push_commit(work_dir, message: str) -> None:
+    (work_dir / "file").write_text(f"{message}\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", message)
+    git(work_dir, "push", "-q", "origin", "master")
+
+
+def test_prefetch_and_update_without_network(tmp_path):
+    """
+    Test that prefetching only updates the remote-tracking branch, and that an update without network uses what was prefetched.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    push_commit(work_dir, "commit 1")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(remote))
+    module.set_option("branch", "master")
+    not_cloned = Module(ctx, "not-cloned")
+    not_cloned.set_option("#resolved-repository", str(remote))
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    srcdir = tmp_path / "src" / "project"
+
+    orig_wd = os.getcwd()
+    try:
+        module.scm.update_internal()
+        first_commit = git(srcdir, "rev-parse", "HEAD")
+        (srcdir / "file").write_text("local change\n")
+
+        push_commit(work_dir, "commit 2")
+        assert Prefetcher.prefetch_modules([module, not_cloned]) == {module: "", not_cloned: ""}
+        assert git(srcdir, "rev-parse", "origin/master") == git(remote, "rev-parse", "master")
+        assert git(srcdir, "rev-parse", "HEAD") == first_commit, "The branch is not updated"
+        assert (srcdir / "file").read_text() == "local change\n", "The working tree is not touched"
+        assert not (tmp_path / "src" / "not-cloned").exists()
+
+        git(srcdir, "checkout", "-q", "file")
+        push_commit(work_dir, "commit 3")
+        module.set_option("network-update", False)
+        assert module.scm.update_internal() == 1
+        assert git(srcdir, "rev-parse", "HEAD") == git(remote, "rev-parse", "master~1"), "Updated to the prefetched commit, not fetched again"
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import subprocess
+
+import pytest
+
+from kde_builder.build_context import BuildContext
+from kde_builder.kb_exception import KBRuntimeError
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+from kde_builder.updater.remote_probe import RemoteProbe
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def commit_and_push(work_dir, name, *push_args):
+    (work_dir / name).write_text(name)
+    git(work_dir, "add", name)
+    git(work_dir, "commit", "-m", name)
+    git(work_dir, "push", "-q", "origin", "master", *push_args)
+
+
+def test_find_unchanged_modules(tmp_path):
+    """
+    Test that only the clones whose remote (a local bare repository) has a moved branch or new tags are fetched.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    commit_and_push(work_dir, "first")
+    git(work_dir, "tag", "-a", "-m", "v1", "v1")
+    git(work_dir, "push", "-q", "origin", "v1")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include those below
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("probe-remotes", True)
+    modules = {}
+    for name, option, value in [("on-branch", "branch", "master"), ("on-tag", "tag", "v1"), ("default-branch", "", ""), ("other-url", "branch", "master")]:
+        git(tmp_path, "clone", "-q", str(remote), str(tmp_path / "src" / name))
+        modules[name] = Module(ctx, name)
+        modules[name].set_option("#resolved-repository", str(remote))
+        if option:
+            modules[name].set_option(option, value)
+    git(tmp_path / "src" / "on-tag", "checkout", "-q", "v1")
+    modules["other-url"].set_option("#resolved-repository", str(tmp_path / "moved.git"))
+    modules["not-cloned"] = Module(ctx, "not-cloned")
+    modules["not-cloned"].set_option("branch", "master")
+
+    assert RemoteProbe.find_unchanged_modules(list(modules.values())) == [modules["on-branch"], modules["on-tag"]]
+    modules["on-tag"].set_option("probe-remotes", False)
+    assert RemoteProbe.find_unchanged_modules(list(modules.values())) == [modules["on-branch"]], "Disabled for the project"
+    modules["on-tag"].set_option("probe-remotes", True)
+
+    commit_and_push(work_dir, "second")
+    assert RemoteProbe.find_unchanged_modules([modules["on-branch"], modules["on-tag"]]) == [modules["on-tag"]], "Moved branch"
+
+    git(tmp_path / "src" / "on-branch", "pull", "-q")
+    git(work_dir, "tag", "v2")
+    git(work_dir, "push", "-q", "origin", "v2")
+    assert RemoteProbe.find_unchanged_modules([modules["on-branch"], modules["on-tag"]]) == [], "New tag"
+
+    git(tmp_path / "src" / "on-branch", "fetch", "-q", "--tags")
+    git(tmp_path / "src" / "on-tag", "fetch", "-q", "--tags")
+    assert RemoteProbe.find_unchanged_modules([modules["on-branch"], modules["on-tag"]]) == [modules["on-branch"], modules["on-tag"]]
+
+    git(tmp_path / "src" / "on-branch", "remote", "set-url", "origin", str(tmp_path / "missing.git"))
+    modules["on-branch"].set_option("#resolved-repository", str(tmp_path / "missing.git"))
+    assert RemoteProbe.find_unchanged_modules([modules["on-branch"]]) == [], "Remote which cannot be listed"
+
+
+def test_verify_refs_of_new_clones(tmp_path):
+    """
+    Test that the refs of the projects to clone are verified together, and that the clones use the results.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    commit_and_push(work_dir, "first")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include those below
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    modules = {}
+    for name, branch in [("present", "master"), ("missing", "no-such-branch"), ("cloned", "no-such-branch")]:
+        modules[name] = Module(ctx, name)
+        modules[name].set_option("#resolved-repository", str(remote))
+        modules[name].set_option("branch", branch)
+    git(tmp_path, "clone", "-q", str(remote), str(tmp_path / "src" / "cloned"))
+
+    missing_refs = RemoteProbe.verify_refs_of_new_clones(list(modules.values()))
+    assert list(missing_refs) == [modules["missing"]]
+    assert "no-such-branch" in missing_refs[modules["missing"]]
+    assert modules["present"].get_option("#ref-present")
+    assert not modules["cloned"].get_option("#ref-present") and not modules["cloned"].get_option("#ref-missing")
+
+    (remote / "HEAD").rename(remote / "HEAD.moved")  # Not a repository anymore, the results must come from the verification
+    modules["present"].scm._verify_ref_present(str(remote))
+    with pytest.raises(KBRuntimeError, match="no-such-branch"):
+        modules["missing"].scm._verify_ref_present(str(remote))
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(work_dir, message: str) -> None:
+    (work_dir / "file").write_text(f"{message}\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", message)
+
+
+def test_submodules(tmp_path, monkeypatch):
+    """
+    Test that the submodules are cloned, and that updates only update the submodules whose recorded commit has changed.
+    """
+    # Submodules with file URLs are refused by default.
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", "protocol.file.allow")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "always")
+
+    for name in ("sub1", "sub2", "super"):
+        git(tmp_path, "init", "-q", "-b", "master", name)
+        commit(tmp_path / name, "commit 1")
+    superproject = tmp_path / "super"
+    for name in ("sub1", "sub2"):
+        git(superproject, "submodule", "add", "-q", str(tmp_path / name), name)
+    git(superproject, "commit", "-q", "-m", "Add submodules")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(superproject))
+    module.set_option("branch", "master")
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    srcdir = tmp_path / "src" / "project"
+    submodule_log = tmp_path / "log" / "latest" / "project" / "git-submodule-update.log"
+
+    orig_wd = os.getcwd()
+    try:
+        module.scm.update_internal()
+        for name in ("sub1", "sub2"):
+            assert git(srcdir / name, "rev-parse", "HEAD") == git(tmp_path / name, "rev-parse", "HEAD")
+        assert submodule_log.read_text().count("# exit code was: 0, time: ") == 2
+
+        commit(tmp_path / "sub2", "commit 2")
+        git(superproject / "sub2", "pull", "-q")
+        git(superproject, "commit", "-q", "-a", "-m", "Update sub2")
+        assert module.scm.update_internal() == 1
+        assert git(srcdir / "sub2", "rev-parse", "HEAD") == git(tmp_path / "sub2", "rev-parse", "HEAD")
+        assert "-- sub2\n" in submodule_log.read_text()
+        assert "-- sub1\n" not in submodule_log.read_text(), "Only the changed submodule is updated"
+
+        submodule_log.unlink()
+        commit(superproject, "commit 2")
+        assert module.scm.update_internal() == 1
+        assert not submodule_log.exists(), "No submodule has changed"
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import subprocess
+
+from kde_builder.build_context import BuildContext
+from kde_builder.metadata.kde_projects_reader import KDEProjectsReader
+from kde_builder.module.module import Module
+from kde_builder.updater.updater import Updater
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.org", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_update_git_commands(tmp_path):
+    """
+    Test that an update which finds nothing new runs only a few git commands, and that updates with new commits and local changes still work.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    (work_dir / "file").write_text("first\n")
+    (work_dir / "other").write_text("other\n")
+    git(work_dir, "add", "file", "other")
+    git(work_dir, "commit", "-q", "-m", "first")
+    git(work_dir, "push", "-q", "origin", "master")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(remote))
+    module.set_option("branch", "master")
+    git(tmp_path, "clone", "-q", str(remote), str(tmp_path / "src" / "project"))
+
+    orig_wd = os.getcwd()
+    try:
+        assert module.scm.update_internal() == 0
+        assert module.scm.git_commands <= 4, "Reading the configuration and branches, fetch and the commit of the remote branch"
+
+        (tmp_path / "src" / "project" / "other").write_text("local change\n")
+        assert module.scm.update_internal() == 0
+        assert module.scm.git_commands <= 4, "The working tree is not scanned if nothing is checked out"
+        assert git(tmp_path / "src" / "project", "stash", "list") == "", "Nothing is stashed"
+
+        (work_dir / "file").write_text("second\n")
+        git(work_dir, "commit", "-q", "-a", "-m", "second")
+        git(work_dir, "push", "-q", "origin", "master")
+        assert module.scm.update_internal() == 1
+        assert (tmp_path / "src" / "project" / "file").read_text() == "second\n"
+        assert (tmp_path / "src" / "project" / "other").read_text() == "local change\n", "Local changes are stashed and re-applied"
+    finally:
+        os.chdir(orig_wd)
+
+
+def test_git_status_cache(tmp_path):
+    """
+    Test that the git-status-cache option enables the untracked cache, and the file system monitor if git has it.
+    """
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "master", str(remote))
+    work_dir = tmp_path / "work"
+    git(tmp_path, "clone", "-q", str(remote), str(work_dir))
+    (work_dir / "file").write_text("first\n")
+    git(work_dir, "add", "file")
+    git(work_dir, "commit", "-q", "-m", "first")
+    git(work_dir, "push", "-q", "origin", "master")
+
+    ctx = BuildContext()
+    ctx.projects_db = KDEProjectsReader("")  # The test projects, which do not include this one
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("log-dir", str(tmp_path / "log"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    module = Module(ctx, "project")
+    module.set_option("#resolved-repository", str(remote))
+    module.set_option("branch", "master")
+    (tmp_path / "src").mkdir()  # Created by TaskManager
+    srcdir = tmp_path / "src" / "project"
+
+    orig_wd = os.getcwd()
+    try:
+        module.scm.update_internal()
+        assert git(srcdir, "config", "--local", "--default", "", "core.untrackedCache").strip() == ""
+
+        module.set_option("git-status-cache", True)
+        module.scm.update_internal()
+        assert git(srcdir, "config", "--local", "core.untrackedCache").strip() == "true"
+        assert (git(srcdir, "config", "--local", "--default", "", "core.fsmonitor").strip() == "true") == Updater._fsmonitor_supported
+        commands = module.scm.git_commands
+
+        module.scm.update_internal()
+        assert module.scm.git_commands < commands, "The configuration is not set again"
+    finally:
+        os.chdir(orig_wd)
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+
+import pytest
+
+from kde_builder.util.file_watcher import FileWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_file_watcher(tmp_path, use_inotify):
+    """
+    Test that changes are reported for the trees they happen in, except in the ignored directories and files.
+    """
+    for path in ["juk/src", "juk/.git", "juk/build", "kcalc"]:
+        (tmp_path / path).mkdir(parents=True)
+    (tmp_path / "juk/src/main.cpp").write_text("int main() {}\n")
+
+    watcher = FileWatcher(use_inotify=use_inotify)
+    watcher.add_tree("juk", str(tmp_path / "juk"), excluded=[str(tmp_path / "juk/build")])
+    watcher.add_tree("kcalc", str(tmp_path / "kcalc"))
+    try:
+        assert watcher.wait_for_changes(debounce=0.1, timeout=0.1) == set()
+
+        (tmp_path / "juk/src/main.cpp").write_text("int main() { return 0; }\n")
+        assert watcher.wait_for_changes(debounce=0.1) == {"juk"}
+
+        (tmp_path / "juk/.git/index").write_text("")
+        (tmp_path / "juk/build/main.o").write_text("")
+        (tmp_path / "juk/src/.main.cpp.swp").write_text("")
+        (tmp_path / "juk/src/compile_commands.json").write_text("")
+        assert watcher.wait_for_changes(debounce=0.1, timeout=0.3) == set(), "Ignored files"
+
+        (tmp_path / "kcalc/src").mkdir()
+        assert watcher.wait_for_changes(debounce=0.1) == {"kcalc"}
+        (tmp_path / "kcalc/src/main.cpp").write_text("")
+        os.remove(tmp_path / "juk/src/main.cpp")
+        assert watcher.wait_for_changes(debounce=0.1) == {"juk", "kcalc"}, "Files in new directories are watched"
+    finally:
+        watcher.close()
@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from kde_builder.ipc.ipc import IPC
+from kde_builder.ipc.null import IPCNull
+from kde_builder.util.metrics import Metrics
+
+
+def test_metrics_file(tmp_path):
+    """
+    Test that the metrics of the projects, including those sent over IPC by the updater, are written in the OpenMetrics format.
+    """
+    metrics = Metrics()
+    metrics.samples.clear()  # Recorded by other tests
+    metrics_file = tmp_path / "textfile" / "kde-builder.prom"
+    metrics.set_metrics_file(str(metrics_file))
+
+    ipc = IPCNull()
+    ipc.notify_update_metrics("juk", 1.5, 3, 5)
+    ipc.notify_update_metrics("kcalc", 0.25, None)
+    ipc.send_ipc_message(IPC.MODULE_FAILURE, "kcalc")
+    for _ in range(3):
+        ipc._update_seen_modules_from_message(*ipc.receive_ipc_message())
+
+    with metrics.phase("juk", "build"):
+        pass
+    metrics.add("compile_warnings", 2, project="juk")
+    metrics.add("compile_warnings", 1, project="juk")  # The build was retried
+    metrics.merge({"cmake_runs": {(("project", "juk"),): 1}})  # From the configure-ahead process
+
+    log_dir = tmp_path / "log" / "juk"
+    log_dir.mkdir(parents=True)
+    (log_dir / "build.log").write_text("x" * 100)
+    metrics.record_project_result("juk", "success", str(log_dir))
+    metrics.record_project_result("kcalc", "failed", str(tmp_path / "log" / "kcalc"), "update")
+    assert "kde_builder_run_in_progress 1" in metrics_file.read_text(), "The file is updated during the run"
+
+    metrics.write(finished=True)
+    text = metrics_file.read_text()
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF"
+    assert "# TYPE kde_builder_phase_duration_seconds gauge" in lines
+    assert "# UNIT kde_builder_phase_duration_seconds seconds" in lines
+    assert 'kde_builder_phase_duration_seconds{phase="update",project="juk"} 1.5' in lines
+    assert 'kde_builder_update_git_commands{project="juk"} 5' in lines
+    assert any(line.startswith('kde_builder_phase_duration_seconds{phase="build",project="juk"} ') for line in lines)
+    assert 'kde_builder_commits_pulled{project="juk"} 3' in lines
+    assert 'kde_builder_commits_pulled{project="kcalc"}' not in text, "Failed updates have no pulled commits"
+    assert 'kde_builder_compile_warnings{project="juk"} 3' in lines
+    assert 'kde_builder_cmake_runs{project="juk"} 1' in lines
+    assert 'kde_builder_logged_bytes{project="juk"} 100' in lines
+    assert 'kde_builder_project_success{project="kcalc"} 0' in lines
+    assert 'kde_builder_project_failed_phase{phase="update",project="kcalc"} 1' in lines
+    assert 'kde_builder_projects{result="success"} 1' in lines
+    assert "kde_builder_run_in_progress 0" in lines
+    assert list(metrics_file.parent.iterdir()) == [metrics_file], "No temporary files are left"
+
+    metrics.set_metrics_file("")
+    metrics.samples.clear()
+
+
+def test_metrics_file_tilde(monkeypatch):
+    """
+    Test that only a leading "~" of the metrics file is expanded to the home directory.
+    """
+    monkeypatch.setenv("HOME", "/home/user")
+    metrics = Metrics()
+    metrics.set_metrics_file("~/metrics/kde-builder.prom")
+    assert metrics.metrics_file == "/home/user/metrics/kde-builder.prom"
+    metrics.set_metrics_file("/tmp/a~b.prom")
+    assert metrics.metrics_file == "/tmp/a~b.prom"
+    metrics.set_metrics_file("")
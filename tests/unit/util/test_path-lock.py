@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from kde_builder.build_context import BuildContext
+from kde_builder.module.module import Module
+from kde_builder.util.path_lock import PathLock
+
+
+def test_path_lock(tmp_path):
+    """
+    Test that shared locks of a directory can be held together, and exclusive ones only alone.
+    """
+    directory = str(tmp_path / "build" / "juk")
+    first, second = PathLock(directory, "juk"), PathLock(directory, "juk")
+    assert first.lock_file == str(tmp_path / "build" / ".juk.kde-builder-lock"), "Next to the directory, which does not need to exist"
+
+    assert first.acquire(exclusive=False)
+    assert second.acquire(exclusive=False, wait=False)
+    second.release()
+    assert not second.acquire(exclusive=True, wait=False)
+    first.release()
+    assert second.acquire(exclusive=True, wait=False)
+    assert not first.acquire(exclusive=False, wait=False)
+    second.release()
+
+
+def test_module_directory_locks(tmp_path):
+    """
+    Test that the update and the build of a module exclude each other, and that installs into the same directory do not.
+    """
+    ctx = BuildContext()
+    ctx.set_option("source-dir", str(tmp_path / "src"))
+    ctx.set_option("build-dir", str(tmp_path / "build"))
+    ctx.set_option("install-dir", str(tmp_path / "usr"))
+    juk, kcalc = Module(ctx, "juk"), Module(ctx, "kcalc")
+
+    with juk.lock_directories(["build", "install"]):
+        kcalc_locks = kcalc.lock_directories(["build", "install"], wait=False)
+        assert kcalc_locks is not None, "Other modules are not locked, and both can install"
+        kcalc_locks.close()
+        assert juk.lock_directories(["update"], wait=False) is None, "The sources are not updated during the build"
+        assert juk.lock_directories(["install"], wait=False) is None
+
+    with juk.lock_directories(["update"]):
+        assert juk.lock_directories(["build"], wait=False) is None
+        install_locks = juk.lock_directories(["install"], wait=False)
+        assert install_locks is not None, "The install does not use the sources"
+        install_locks.close()
+
+    juk.set_option("remove-after-install", "all")
+    with juk.lock_directories(["install"]):
+        assert juk.lock_directories(["update"], wait=False) is None, "The sources are removed after the install"
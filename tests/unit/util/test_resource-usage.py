@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+import shutil
+import sys
+import tempfile
+
+from kde_builder.build_context import BuildContext
+from kde_builder.module.module import Module
+from kde_builder.util.logged_subprocess import UtilLoggedSubprocess
+from kde_builder.util.util import Util
+
+
+def test_resource_usage_is_recorded():
+    """
+    Test that logged commands record their resource usage in the log footer and in persistent options.
+    """
+    origdir = os.getcwd()
+    ctx = BuildContext()
+    m = Module(ctx, "test")
+
+    tmp = tempfile.mkdtemp()
+    ctx.set_option("log-dir", f"{tmp}/kde-builder-test")
+
+    # Allocate and touch ~64 MiB, so that the max RSS is clearly above the interpreter baseline.
+    allocating_command = [sys.executable, "-c", "x = bytearray(64 * 1024 * 1024)"]
+
+    exitcode = Util.run_logged(m, "usage-direct", tmp, allocating_command)
+    assert exitcode == 0
+
+    with open(f"{tmp}/kde-builder-test/latest/test/usage-direct.log") as f:
+        log_content = f.read()
+    assert "# exit code was: 0\n# resource usage: user time " in log_content, "Resource usage footer written"
+
+    usage = m.get_persistent_option("resource-usage")["usage-direct"]
+    assert list(usage.keys()) == Util.RESOURCE_USAGE_FIELDS
+    assert usage["max-rss"] > 64 * 1024, "Max RSS recorded in KiB"
+
+    # The same through UtilLoggedSubprocess, where the command is run from another process.
+    cmd = UtilLoggedSubprocess() \
+        .module(m) \
+        .log_to("usage-subprocess") \
+        .set_command(allocating_command) \
+        .chdir_to(tmp)
+    cmd.child_output_handler = lambda line: None
+    assert cmd.start() == 0
+
+    usage = m.get_persistent_option("resource-usage")["usage-subprocess"]
+    assert usage["max-rss"] > 64 * 1024, "Resource usage passed back to the parent process"
+    assert isinstance(usage["max-rss"], int)
+    assert "usage-direct" in m.get_persistent_option("resource-usage"), "Usage of other phases is kept"
+
+    os.chdir(origdir)  # ensure we're out of the test directory
+    shutil.rmtree(tmp)
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import json
+import os
+
+from kde_builder.util.trace import Trace
+
+
+def test_trace_file(tmp_path):
+    """
+    Test that spans recorded before and after setting the trace file, and from forked processes, end up in a valid trace.
+    """
+    trace = Trace()
+    trace.pending_events.clear()  # Recorded by other tests
+    trace.add_span("update repo-metadata", "setup", 100, 200)
+
+    trace_file = tmp_path / "trace.json"
+    trace.set_trace_file(str(trace_file))
+
+    with trace.span("build juk", "phase", module="juk") as span:
+        span["success"] = True
+
+    pid = os.fork()
+    if pid == 0:
+        trace.set_lane("update")
+        trace.add_span("update kcalc", "phase", 300, 400, module="kcalc")
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert json.loads(trace_file.read_text() + "{}]"), "The trace can be loaded before it is closed"
+    trace.close()
+
+    events = json.loads(trace_file.read_text())
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert spans.keys() == {"update repo-metadata", "build juk", "update kcalc", "kde-builder"}
+    assert spans["update repo-metadata"]["dur"] == 100
+    assert spans["build juk"]["args"] == {"module": "juk", "success": True}
+    assert spans["update kcalc"]["tid"] == Trace.LANES["update"]
+    assert spans["build juk"]["tid"] == Trace.LANES["build"]
+    assert len({event["pid"] for event in events}) == 1, "The whole run is shown as one process"
@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: 2026 KDE Builder contributors
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+import os
+
+from kde_builder.util.warm_cache import WarmCache
+
+
+def test_warm_cache(tmp_path):
+    """
+    Test that values are rebuilt only when their files change, and that the values built in a run are passed to the daemon.
+    """
+    cache = WarmCache()
+    data_file = tmp_path / "data.yaml"
+    data_file.write_text("projects:\n  - juk\n")
+    loads = []
+
+    def get():
+        def load():
+            loads.append(1)
+            return data_file.read_text()
+        return cache.get("data", lambda: WarmCache.tree_signature(str(tmp_path)), load)
+
+    get()
+    get()
+    assert len(loads) == 2, "Disabled outside of the daemon"
+
+    cache.enabled = True
+    try:
+        loads.clear()
+        assert get() == get()
+        assert len(loads) == 1
+
+        data_file.write_text("projects:\n  - juk\n  - kcalc\n")
+        os.utime(data_file, ns=(0, 0))  # Make sure the modification time differs, whatever the file system resolution
+        assert "kcalc" in get()
+        (tmp_path / "new.yaml").write_text("")
+        get()
+        assert len(loads) == 3, "Rebuilt when a file changed, and when a file was added"
+
+        cache.load_yaml(str(data_file))["projects"].append("juk")
+        assert cache.load_yaml(str(data_file)) == {"projects": ["juk", "kcalc"]}, "The caller gets a copy of the cached content"
+
+        updates = cache.take_updates()
+        assert cache.updated == set()
+        cache.mark_updated("data")
+        assert cache.updated == {"data"}
+
+        daemon_entries = cache.entries
+        cache.entries = {}
+        cache.merge(updates)
+        assert cache.entries == daemon_entries
+    finally:
+        cache.enabled = False
+        cache.entries = {}
+        cache.updated.clear()